@@ -0,0 +1,88 @@
+#!/usr/bin/env python3
+"""
+Excel读取引擎基准测试
+Excel Reader Engine Benchmark
+
+用法: python benchmarks/bench_excel_readers.py [行数]
+"""
+
+import sys
+import time
+import logging
+import tempfile
+from datetime import datetime, timedelta
+from pathlib import Path
+
+# 添加项目路径
+sys.path.append(str(Path(__file__).parent.parent))
+
+import pandas as pd
+
+from src.input_parser.excel_parser import ExcelParser
+from src.input_parser.excel_readers import available_engines
+
+logging.basicConfig(
+    level=logging.INFO,
+    format='%(asctime)s - %(levelname)s - %(message)s'
+)
+logger = logging.getLogger(__name__)
+
+def create_sample_workbook(directory: Path, rows: int) -> Path:
+    """生成包含车辆、发动机两个工作表的测试工作簿，并导出CSV"""
+    base_date = datetime(2023, 1, 1)
+    vins = [f"LVSHFAEM{i:09d}" for i in range(rows)]
+    vehicles = pd.DataFrame({
+        'VIN码': vins,
+        '品牌': ['奥迪', '宝马', '奔驰', '大众'] * (rows // 4) + ['奥迪'] * (rows % 4),
+        '车型': [f"型号{i % 50}" for i in range(rows)],
+        '年份': [2020 + i % 5 for i in range(rows)],
+        '生产日期': [base_date + timedelta(days=i % 365) for i in range(rows)]
+    })
+    engines = pd.DataFrame({
+        'VIN码': vins,
+        '发动机型号': [f"EA{888 + i % 7}" for i in range(rows)],
+        '排量': [1.5 + (i % 4) * 0.5 for i in range(rows)],
+        '功率': [100 + i % 120 for i in range(rows)]
+    })
+
+    excel_path = directory / 'benchmark.xlsx'
+    with pd.ExcelWriter(excel_path) as writer:
+        vehicles.to_excel(writer, index=False, sheet_name='车辆信息')
+        engines.to_excel(writer, index=False, sheet_name='发动机信息')
+    vehicles.to_csv(directory / '车辆信息.csv', index=False)
+    return excel_path
+
+def time_parse(file_path: Path, engine: str):
+    """计时解析一个文件"""
+    parser = ExcelParser(engine=engine)
+    start = time.perf_counter()
+    result = parser.parse_file(str(file_path))
+    return time.perf_counter() - start, result
+
+def main():
+    rows = int(sys.argv[1]) if len(sys.argv) > 1 else 20000
+    engines = [e for e in ('openpyxl', 'calamine') if e in available_engines()]
+
+    with tempfile.TemporaryDirectory() as tmp:
+        directory = Path(tmp)
+        excel_path = create_sample_workbook(directory, rows)
+        logger.info(f"测试文件: {rows} 行 x 2 个工作表，可用引擎: {engines}")
+
+        baseline = None
+        for engine in engines:
+            elapsed, result = time_parse(excel_path, engine)
+            logger.info(f"  {engine:<10} {elapsed:8.3f}s  {rows * 2 / elapsed:10.0f} 行/秒")
+            sheets = {name: sheet.get('data') for name, sheet in result['sheets'].items()}
+            if baseline is None:
+                baseline = sheets
+            elif sheets != baseline:
+                logger.error(f"  ✗ {engine} 的解析结果与 {engines[0]} 不一致")
+
+        csv_path = directory / '车辆信息.csv'
+        elapsed, result = time_parse(csv_path, 'csv')
+        logger.info(f"  {'csv':<10} {elapsed:8.3f}s  {rows / elapsed:10.0f} 行/秒")
+        if baseline is not None and result['sheets']['车辆信息']['data'] != baseline['车辆信息']:
+            logger.error("  ✗ csv 的解析结果与Excel不一致")
+
+if __name__ == "__main__":
+    main()
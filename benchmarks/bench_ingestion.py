@@ -0,0 +1,63 @@
+#!/usr/bin/env python3
+"""
+解析结果入库基准测试
+Ingestion Throughput Benchmark
+
+用法: python benchmarks/bench_ingestion.py [车辆数]
+目标: 每分钟至少写入 50,000 辆车（含发动机、排放记录）
+"""
+
+import sys
+import time
+import logging
+import tempfile
+from pathlib import Path
+
+# 添加项目路径
+sys.path.append(str(Path(__file__).parent.parent))
+
+from src.database.data_importer import DataImporter
+
+logging.basicConfig(
+    level=logging.INFO,
+    format='%(asctime)s - %(levelname)s - %(message)s'
+)
+logger = logging.getLogger(__name__)
+
+TARGET_PER_MINUTE = 50000
+
+def build_parsed_data(count: int):
+    """构造与 ExcelParser 输出一致的结构化数据"""
+    vins = [f"LVSHFAEM{i:09d}" for i in range(count)]
+    return {
+        'file_info': {'file_name': 'benchmark.xlsx', 'file_path': '/benchmark/benchmark.xlsx', 'file_type': 'excel'},
+        'structured_data': {
+            'vehicle_info': [{'VIN': vin, 'make': '奥迪', 'model': 'A4L', 'year': 2023} for vin in vins],
+            'engine_info': [{'VIN': vin, 'engine_code': 'EA888', 'displacement': 2.0, 'power': 140} for vin in vins],
+            'emission_info': [{'VIN': vin, 'emission_standard': '国六', 'co2_emission': 150.0} for vin in vins]
+        }
+    }
+
+def main():
+    count = int(sys.argv[1]) if len(sys.argv) > 1 else 100000
+    parsed_data = build_parsed_data(count)
+
+    with tempfile.TemporaryDirectory() as tmp:
+        importer = DataImporter(f"sqlite:///{Path(tmp) / 'benchmark.db'}")
+
+        start = time.perf_counter()
+        stats = importer.import_parsed_data(parsed_data)
+        elapsed = time.perf_counter() - start
+        rate = count / elapsed * 60
+        logger.info(f"首次导入 {count} 辆车: {elapsed:.2f}s, {rate:,.0f} 辆/分钟 {stats}")
+
+        start = time.perf_counter()
+        stats = importer.import_parsed_data(parsed_data)
+        logger.info(f"重复导入（无变化）: {time.perf_counter() - start:.2f}s {stats}")
+        importer.engine.dispose()
+
+    if rate < TARGET_PER_MINUTE:
+        logger.warning(f"⚠ 未达到目标吞吐量 {TARGET_PER_MINUTE:,} 辆/分钟")
+
+if __name__ == "__main__":
+    main()
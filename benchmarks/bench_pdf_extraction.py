@@ -0,0 +1,93 @@
+#!/usr/bin/env python3
+"""
+PDF页面并行提取基准测试
+PDF Page-Parallel Extraction Benchmark
+
+用法: python benchmarks/bench_pdf_extraction.py [页数]
+按 1, 2, 4 ... CPU核数 个工作进程解析同一份合成PDF，输出耗时和加速比
+"""
+
+import os
+import sys
+import time
+import logging
+import tempfile
+from pathlib import Path
+
+# 添加项目路径
+sys.path.append(str(Path(__file__).parent.parent))
+
+from reportlab.lib import colors
+from reportlab.lib.pagesizes import A4
+from reportlab.lib.styles import ParagraphStyle
+from reportlab.pdfbase import pdfmetrics
+from reportlab.pdfbase.cidfonts import UnicodeCIDFont
+from reportlab.platypus import SimpleDocTemplate, Paragraph, Table, TableStyle, PageBreak
+
+from src.input_parser.pdf_parser import PDFParser
+
+logging.basicConfig(
+    level=logging.INFO,
+    format='%(asctime)s - %(levelname)s - %(message)s'
+)
+logger = logging.getLogger(__name__)
+
+def create_sample_pdf(directory: Path, pages: int) -> Path:
+    """生成每页包含证书正文和车辆参数表的合成PDF"""
+    pdfmetrics.registerFont(UnicodeCIDFont('STSong-Light'))
+    style = ParagraphStyle('cn', fontName='STSong-Light', fontSize=10, leading=14)
+    table_style = TableStyle([
+        ('FONTNAME', (0, 0), (-1, -1), 'STSong-Light'),
+        ('GRID', (0, 0), (-1, -1), 0.5, colors.black)
+    ])
+
+    elements = []
+    for page in range(pages):
+        elements.append(Paragraph(f"机动车型式认证证书 第 {page + 1} 页", style))
+        elements.append(Paragraph(f"VIN码：LVSHFAEM{page:09d}　品牌：奥迪　车型：A4L", style))
+        for line in range(10):
+            elements.append(Paragraph(f"检验项目 {line + 1}：符合 GB 18352.6-2016 第 {line + 5} 条要求", style))
+        rows = [['VIN码', '品牌', '车型']]
+        rows += [[f"LVSHFAEN{page * 20 + i:09d}", '大众', f"型号{i}"] for i in range(20)]
+        table = Table(rows)
+        table.setStyle(table_style)
+        elements.extend([table, PageBreak()])
+
+    pdf_path = directory / 'benchmark.pdf'
+    SimpleDocTemplate(str(pdf_path), pagesize=A4).build(elements[:-1])
+    return pdf_path
+
+def main():
+    pages = int(sys.argv[1]) if len(sys.argv) > 1 else 500
+    cpu_count = os.cpu_count() or 1
+    worker_counts = [1]
+    while worker_counts[-1] * 2 <= cpu_count:
+        worker_counts.append(worker_counts[-1] * 2)
+    if worker_counts[-1] != cpu_count:
+        worker_counts.append(cpu_count)
+
+    with tempfile.TemporaryDirectory() as tmp:
+        pdf_path = create_sample_pdf(Path(tmp), pages)
+        logger.info(f"合成PDF: {pages} 页, {pdf_path.stat().st_size / 1024 / 1024:.1f} MB")
+
+        baseline, reference = None, None
+        for workers in worker_counts:
+            parser = PDFParser(max_workers=workers)
+            start = time.perf_counter()
+            result = parser.parse_file(str(pdf_path))
+            elapsed = time.perf_counter() - start
+
+            if reference is None:
+                baseline, reference = elapsed, result['structured_data']
+            elif result['structured_data'] != reference:
+                logger.error(f"✗ {workers} 个进程的解析结果与单进程不一致")
+
+            records = len(result['structured_data'].get('vehicle_info', []))
+            logger.info(f"{workers:>2} 个进程: {elapsed:.2f}s, {pages / elapsed:.1f} 页/秒, "
+                        f"加速比 {baseline / elapsed:.2f}x, {records} 条记录")
+
+    if cpu_count == 1:
+        logger.warning("⚠ 当前环境只有1个CPU核，无法体现并行加速")
+
+if __name__ == "__main__":
+    main()
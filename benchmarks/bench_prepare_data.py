@@ -0,0 +1,81 @@
+#!/usr/bin/env python3
+"""
+报告数据准备基准测试
+Report Data Preparation Benchmark
+
+用法: python benchmarks/bench_prepare_data.py [报告份数]
+对比逐次解析字段路径、每份报告取两次当前时间与预编译取值函数、整批共享生成时间两种方式
+"""
+
+import sys
+import time
+import logging
+from datetime import datetime
+from pathlib import Path
+
+# 添加项目路径
+sys.path.append(str(Path(__file__).parent.parent))
+
+from src.output_generator.report_generator import ReportGenerator
+
+logging.basicConfig(
+    level=logging.INFO,
+    format='%(asctime)s - %(levelname)s - %(message)s'
+)
+logger = logging.getLogger(__name__)
+
+def prepare_without_compilation(data: dict, fields: dict) -> dict:
+    """预编译之前的做法：每个占位符拆分路径并逐层查找，每份报告取两次当前时间"""
+    prepared = {}
+    for placeholder, field_path in fields.items():
+        value = data
+        for key in field_path.split('.'):
+            if isinstance(value, dict) and key in value:
+                value = value[key]
+            else:
+                value = None
+                break
+        if value is None:
+            prepared[placeholder] = ""
+        elif isinstance(value, datetime):
+            prepared[placeholder] = value.strftime('%Y年%m月%d日')
+        else:
+            prepared[placeholder] = str(value)
+    prepared['[生成日期]'] = datetime.now().strftime('%Y年%m月%d日')
+    prepared['[生成时间]'] = datetime.now().strftime('%H:%M:%S')
+    return prepared
+
+def main():
+    count = int(sys.argv[1]) if len(sys.argv) > 1 else 100000
+
+    generator = ReportGenerator()
+    template_config = dict(generator.field_mappings['vehicle_emission_report'])
+    template_config['fields'] = dict(template_config['fields'], **{'[功率]': 'engine.power'})
+    data_list = [
+        {
+            'vin': f'LVSHFAEM1EF{i:06d}', 'make': '奥迪', 'model': 'A4L', 'engine_code': 'EA888',
+            'displacement': 2.0, 'emission_standard': '国VI', 'co2_emission': 150 + i % 20,
+            'test_date': datetime(2024, 1, 15), 'engine': {'power': 140.0}
+        }
+        for i in range(count)
+    ]
+
+    start = time.perf_counter()
+    legacy = [prepare_without_compilation(data, template_config['fields']) for data in data_list]
+    legacy_elapsed = time.perf_counter() - start
+
+    start = time.perf_counter()
+    generated_at = datetime.now()
+    compiled = [generator._prepare_data(data, template_config, generated_at) for data in data_list]
+    compiled_elapsed = time.perf_counter() - start
+
+    if [{k: v for k, v in item.items() if k != '[生成时间]'} for item in legacy[:100]] != \
+            [{k: v for k, v in item.items() if k != '[生成时间]'} for item in compiled[:100]]:
+        logger.error("✗ 两种方式准备的数据不一致")
+
+    logger.info(f"逐次解析: {legacy_elapsed:.2f}s, {legacy_elapsed / count * 1e6:.2f} 微秒/份")
+    logger.info(f"预编译: {compiled_elapsed:.2f}s, {compiled_elapsed / count * 1e6:.2f} 微秒/份")
+    logger.info(f"加速比: {legacy_elapsed / compiled_elapsed:.2f}x")
+
+if __name__ == "__main__":
+    main()
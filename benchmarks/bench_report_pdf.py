@@ -0,0 +1,85 @@
+#!/usr/bin/env python3
+"""
+PDF报告生成基准测试
+PDF Report Generation Benchmark
+
+用法: python benchmarks/bench_report_pdf.py [报告份数]
+对比每份报告重新创建样式表/段落样式/表格样式与复用渲染上下文两种方式，输出每秒生成的报告数
+"""
+
+import sys
+import time
+import logging
+import tempfile
+from pathlib import Path
+
+# 添加项目路径
+sys.path.append(str(Path(__file__).parent.parent))
+
+from reportlab.lib import colors
+from reportlab.lib.pagesizes import A4
+from reportlab.lib.units import inch
+from reportlab.lib.styles import getSampleStyleSheet, ParagraphStyle
+from reportlab.platypus import SimpleDocTemplate, Paragraph, Spacer, Table, TableStyle
+
+from src.output_generator.pdf_render import get_render_context, register_cjk_font
+from src.output_generator.report_generator import ReportGenerator
+
+logging.basicConfig(
+    level=logging.INFO,
+    format='%(asctime)s - %(levelname)s - %(message)s'
+)
+logger = logging.getLogger(__name__)
+
+def build_without_context(data: dict, output_path: str):
+    """每份报告重新创建样式（渲染上下文之前的做法，字体与上下文相同以便公平对比）"""
+    font = register_cjk_font()
+    doc = SimpleDocTemplate(output_path, pagesize=A4)
+    styles = getSampleStyleSheet()
+    title_style = ParagraphStyle('CustomTitle', parent=styles['Heading1'], fontName=font,
+                                 fontSize=16, spaceAfter=30, alignment=1)
+    story = [Paragraph("车辆检测报告", title_style), Spacer(1, 20)]
+    rows = [[key[1:-1], value] for key, value in data.items() if key.startswith('[') and key.endswith(']')]
+    table = Table(rows, colWidths=[3 * inch, 4 * inch])
+    table.setStyle(TableStyle([
+        ('BACKGROUND', (0, 0), (-1, 0), colors.grey),
+        ('TEXTCOLOR', (0, 0), (-1, 0), colors.whitesmoke),
+        ('ALIGN', (0, 0), (-1, -1), 'LEFT'),
+        ('FONTNAME', (0, 0), (-1, -1), font),
+        ('FONTSIZE', (0, 0), (-1, 0), 12),
+        ('BOTTOMPADDING', (0, 0), (-1, 0), 12),
+        ('BACKGROUND', (0, 1), (-1, -1), colors.beige),
+        ('GRID', (0, 0), (-1, -1), 1, colors.black)
+    ]))
+    story.append(table)
+    doc.build(story)
+
+def main():
+    count = int(sys.argv[1]) if len(sys.argv) > 1 else 300
+
+    generator = ReportGenerator()
+    template_config = generator.field_mappings['vehicle_emission_report']
+    data_list = [
+        generator._prepare_data({
+            'vin': f'LVSHFAEM1EF{i:06d}', 'make': '奥迪', 'model': 'A4L', 'engine_code': 'EA888',
+            'displacement': 2.0, 'emission_standard': '国VI', 'co2_emission': 150 + i % 20,
+            'fuel_consumption': 6.5, 'test_date': '2024-01-15', 'inspector': '张三'
+        }, template_config)
+        for i in range(count)
+    ]
+
+    context = get_render_context()
+    with tempfile.TemporaryDirectory() as tmp:
+        timings = {}
+        for label, build in (('每份重新创建样式', build_without_context), ('复用渲染上下文', context.build)):
+            start = time.perf_counter()
+            for i, data in enumerate(data_list):
+                build(data, str(Path(tmp) / f"report_{i:05d}.pdf"))
+            timings[label] = time.perf_counter() - start
+            logger.info(f"{label}: {timings[label]:.2f}s, {count / timings[label]:.1f} 份/秒")
+
+    baseline, reused = timings.values()
+    logger.info(f"复用渲染上下文加速比: {baseline / reused:.2f}x")
+
+if __name__ == "__main__":
+    main()
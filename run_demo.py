@@ -84,25 +84,12 @@ def demo_database_operations(excel_file):
         query_engine = QueryEngine()
         logger.info("✓ 查询引擎创建成功")
 
-        # 添加示例数据到数据库
-        sample_vehicles = [
-            {
-                'vin': 'LVSHFAEM1EF123456',
-                'make': '奥迪',
-                'model': 'A4L',
-                'year': 2023
-            },
-            {
-                'vin': 'LVSHFAEM1EF123457',
-                'make': '奥迪',
-                'model': 'A6L',
-                'year': 2023
-            }
-        ]
-
-        for vehicle_data in sample_vehicles:
-            if query_engine.add_vehicle(vehicle_data):
-                logger.info(f"✓ 添加车辆: {vehicle_data['vin']}")
+        # 将解析结果直接导入数据库（按VIN增量写入）
+        if excel_file:
+            from src.database.data_importer import DataImporter
+            stats = DataImporter().ingest_file(excel_file)
+            logger.info(f"✓ 导入Excel数据: 新增 {stats['inserted']}，更新 {stats['updated']}，"
+                        f"未变化 {stats['unchanged']}，跳过 {stats['skipped']}")
 
         # 查询演示
         logger.info("✓ 执行查询测试:")
@@ -0,0 +1,444 @@
+"""
+数据导入器
+Data Importer
+
+将 ExcelParser 的解析结果写入数据库：
+- 各工作表的 vehicle_info / engine_info / emission_info 记录经 RecordJoiner 按VIN归并为完整车辆
+- 按批次事务批量写入 vehicles / engines / emissions 表（executemany，不逐条构造ORM对象）
+- 同一数据源再次导入时按VIN比对行指纹，只写入新增、变更、删除的车辆
+- PDF文件解析前按文档指纹与已入库文档比对，内容完全相同的文档不再解析
+"""
+
+import logging
+from datetime import datetime
+from typing import Dict, List, Any, Optional, Iterable
+
+import pandas as pd
+from sqlalchemy import select, insert, update, delete
+from sqlalchemy.orm import sessionmaker
+
+from .models import (Vehicle, Engine, Transmission, Emission, VehicleParameter, EngineParameter, TransmissionParameter,
+                     TestReport, GeneratedReport, DataSource, ImportedRow, VehicleOrigin, DocumentFingerprint,
+                     init_database)
+from ..input_parser.excel_parser import ExcelParser
+from ..input_parser.pdf_parser import PDFParser
+from ..input_parser.record_joiner import RecordJoiner
+
+logger = logging.getLogger(__name__)
+
+# 结构化数据类型 -> (数据表, 字段列表)
+MODEL_FIELDS = {
+    'vehicle_info': (Vehicle, ['make', 'model', 'year', 'production_date']),
+    'engine_info': (Engine, ['engine_code', 'displacement', 'power', 'torque', 'fuel_type']),
+    'emission_info': (Emission, ['emission_standard', 'co2_emission', 'fuel_consumption'])
+}
+
+# 挂在车辆下的一对一子表
+CHILD_TYPES = ['engine_info', 'emission_info']
+
+# 各数据表的必填字段
+REQUIRED_FIELDS = {
+    'vehicle_info': ['make', 'model'],
+    'engine_info': ['engine_code'],
+    'emission_info': ['emission_standard']
+}
+
+# 每个事务写入的车辆数
+DEFAULT_BATCH_SIZE = 2000
+
+# IN 查询每批的参数个数（兼容旧版SQLite的999变量限制）
+QUERY_CHUNK_SIZE = 500
+
+class DataImporter:
+    """解析结果导入器"""
+
+    def __init__(self, database_url=None, batch_size: int = DEFAULT_BATCH_SIZE):
+        self.engine = init_database(database_url)
+        self.Session = sessionmaker(bind=self.engine)
+        self.batch_size = batch_size
+
+    def get_session(self):
+        """获取数据库会话"""
+        return self.Session()
+
+    def ingest_file(self, file_path: str, parser: Optional[ExcelParser] = None,
+                    pdf_parser: Optional[PDFParser] = None) -> Dict[str, Any]:
+        """解析Excel/PDF文件并导入数据库（Excel文件使用 parser，PDF文件使用 pdf_parser）"""
+        if file_path.lower().endswith('.pdf'):
+            return self.ingest_pdf(file_path, pdf_parser)
+        parser = parser or ExcelParser()
+        parsed_data = parser.parse_file(file_path)
+        return self.import_parsed_data(parsed_data, parser.compute_row_fingerprints(parsed_data))
+
+    def ingest_pdf(self, file_path: str, parser: Optional[PDFParser] = None) -> Dict[str, Any]:
+        """
+        解析PDF文件并导入数据库
+
+        解析前与其他数据源的文档指纹比对：内容完全相同的文档跳过解析，
+        数据源状态记为 duplicate；近似重复的文档照常导入，统计中给出相似文档。
+        """
+        parser = parser or PDFParser()
+        parsed_data = parser.parse_file(file_path, self.known_documents(exclude_path=file_path))
+        file_info = parsed_data['file_info']
+        duplicate = file_info.get('duplicate', {})
+
+        if parsed_data.get('skipped'):
+            match = duplicate['match']
+            self._record_duplicate(file_info, match)
+            return {'inserted': 0, 'updated': 0, 'deleted': 0, 'unchanged': 0, 'skipped': 0,
+                    'duplicate_of': match['data_source_id']}
+
+        stats = self.import_parsed_data(parsed_data)
+        if 'error' not in stats:
+            self._save_document_fingerprint(file_info)
+        if duplicate.get('status') == 'near_duplicate':
+            stats['near_duplicate_of'] = duplicate['match']['data_source_id']
+        return stats
+
+    def known_documents(self, exclude_path: Optional[str] = None) -> List[Dict[str, Any]]:
+        """获取已入库文档的指纹（用于重复检测）"""
+        session = self.get_session()
+        try:
+            query = select(
+                DocumentFingerprint.data_source_id, DocumentFingerprint.content_hash,
+                DocumentFingerprint.text_simhash, DataSource.file_path
+            ).join(DataSource, DataSource.id == DocumentFingerprint.data_source_id)
+            if exclude_path is not None:
+                query = query.where(DataSource.file_path != exclude_path)
+            return [dict(row._mapping) for row in session.execute(query)]
+        except Exception as e:
+            logger.error(f"读取文档指纹失败: {e}")
+            return []
+        finally:
+            session.close()
+
+    def _save_document_fingerprint(self, file_info: Dict[str, Any]):
+        """保存数据源的文档指纹"""
+        fingerprint = file_info.get('fingerprint')
+        if not fingerprint:
+            return
+        session = self.get_session()
+        try:
+            source_id = session.scalar(select(DataSource.id).where(DataSource.file_path == file_info.get('file_path')))
+            record = session.scalar(select(DocumentFingerprint).where(DocumentFingerprint.data_source_id == source_id))
+            if record is None:
+                record = DocumentFingerprint(data_source_id=source_id)
+                session.add(record)
+            record.content_hash = fingerprint['content_hash']
+            record.text_simhash = fingerprint['text_simhash']
+            record.page_count = fingerprint['page_count']
+            session.commit()
+        except Exception as e:
+            session.rollback()
+            logger.error(f"保存文档指纹失败: {e}")
+        finally:
+            session.close()
+
+    def _record_duplicate(self, file_info: Dict[str, Any], match: Dict[str, Any]):
+        """记录重复文档的数据源（不导入数据）"""
+        session = self.get_session()
+        try:
+            self._get_or_create_source(session, file_info)
+            session.execute(
+                update(DataSource).where(DataSource.file_path == file_info.get('file_path')).values(
+                    processed='duplicate', processed_date=datetime.utcnow(),
+                    error_message=f"与已导入文档内容相同: {match.get('file_path')}"
+                )
+            )
+            session.commit()
+        except Exception as e:
+            session.rollback()
+            logger.error(f"记录重复文档失败: {e}")
+        finally:
+            session.close()
+
+    def import_parsed_data(self, parsed_data: Dict[str, Any],
+                           fingerprints: Optional[Dict[str, str]] = None) -> Dict[str, Any]:
+        """
+        导入解析结果（增量、分批事务）
+
+        Args:
+            parsed_data: ExcelParser.parse_file 的返回值
+            fingerprints: 预先计算的行指纹，默认按解析结果计算
+
+        Returns:
+            导入统计：inserted/updated/deleted/unchanged/skipped，以及无法关联的孤立行数 orphans
+        """
+        stats = {'inserted': 0, 'updated': 0, 'deleted': 0, 'unchanged': 0, 'skipped': 0}
+        file_info = parsed_data.get('file_info', {})
+        joined = RecordJoiner().add_parsed(parsed_data).join()
+        grouped = joined['records']
+        stats['orphans'] = joined['statistics']['missing_key_rows'] + joined['statistics']['unmatched_rows']
+        if fingerprints is None:
+            fingerprints = {vin: ExcelParser.fingerprint_record(records) for vin, records in grouped.items()}
+
+        session = self.get_session()
+        try:
+            source_id = self._get_or_create_source(session, file_info)
+            session.commit()
+
+            # 上次导入的指纹 {VIN: (行ID, 指纹)}
+            previous = {
+                vin: (row_id, fingerprint)
+                for row_id, vin, fingerprint in session.execute(
+                    select(ImportedRow.id, ImportedRow.vin, ImportedRow.fingerprint)
+                    .where(ImportedRow.data_source_id == source_id)
+                )
+            }
+
+            pending = [vin for vin in fingerprints
+                       if vin not in previous or previous[vin][1] != fingerprints[vin]]
+            deleted = [vin for vin in previous if vin not in fingerprints]
+            stats['unchanged'] = len(fingerprints) - len(pending)
+
+            for batch in _chunks(pending, self.batch_size):
+                self._write_batch(session, source_id, batch, grouped, fingerprints, previous, stats)
+                session.commit()
+
+            for batch in _chunks(deleted, self.batch_size):
+                self._delete_batch(session, source_id, batch, previous)
+                session.commit()
+                stats['deleted'] += len(batch)
+
+            session.execute(
+                update(DataSource).where(DataSource.id == source_id).values(
+                    processed='completed', processed_date=datetime.utcnow(), error_message=None
+                )
+            )
+            session.commit()
+
+            logger.info(f"数据导入完成: {file_info.get('file_name')} {stats}")
+            return stats
+
+        except Exception as e:
+            session.rollback()
+            logger.error(f"导入数据时出错: {e}")
+            self._mark_source_failed(file_info, str(e))
+            stats['error'] = str(e)
+            return stats
+        finally:
+            session.close()
+
+    def _get_or_create_source(self, session, file_info: Dict[str, Any]) -> int:
+        """按文件路径查找数据源，不存在则创建"""
+        source = session.query(DataSource).filter(
+            DataSource.file_path == file_info.get('file_path')
+        ).first()
+        if source is None:
+            source = DataSource(
+                file_name=file_info.get('file_name'),
+                file_path=file_info.get('file_path'),
+                file_type=file_info.get('file_type', 'excel')
+            )
+            session.add(source)
+        source.file_size = file_info.get('file_size')
+        source.processed = 'processing'
+        session.flush()
+        return source.id
+
+    def _mark_source_failed(self, file_info: Dict[str, Any], error: str):
+        """记录数据源导入失败"""
+        session = self.get_session()
+        try:
+            session.execute(
+                update(DataSource).where(DataSource.file_path == file_info.get('file_path'))
+                .values(processed='failed', error_message=error)
+            )
+            session.commit()
+        except Exception as e:
+            session.rollback()
+            logger.error(f"记录数据源状态失败: {e}")
+        finally:
+            session.close()
+
+    def _write_batch(self, session, source_id: int, vins: List[str],
+                     grouped: Dict[str, Dict[str, Dict[str, Any]]], fingerprints: Dict[str, str],
+                     previous: Dict[str, tuple], stats: Dict[str, int]):
+        """批量写入一批车辆及其子表记录"""
+        now = datetime.utcnow()
+        vehicle_ids = self._select_map(session, Vehicle.vin, Vehicle.id, vins)
+
+        new_vehicles, vehicle_updates, written = [], [], []
+        for vin in vins:
+            values = self._model_values('vehicle_info', grouped[vin].get('vehicle_info', {}))
+            if vin in vehicle_ids:
+                if values:
+                    vehicle_updates.append(dict(values, id=vehicle_ids[vin], updated_at=now))
+            elif self._has_required('vehicle_info', values):
+                new_vehicles.append(dict(values, vin=vin))
+            else:
+                logger.warning(f"车辆信息缺少必填字段，跳过: {vin}")
+                stats['skipped'] += 1
+                continue
+            written.append(vin)
+
+        if new_vehicles:
+            session.execute(insert(Vehicle), new_vehicles)
+            created_ids = self._select_map(session, Vehicle.vin, Vehicle.id, [row['vin'] for row in new_vehicles])
+            vehicle_ids.update(created_ids)
+            # 记录车辆由本数据源创建，之后从本数据源删除该行时才删除车辆
+            session.execute(insert(VehicleOrigin), [
+                {'vehicle_id': vehicle_id, 'data_source_id': source_id} for vehicle_id in created_ids.values()
+            ])
+        if vehicle_updates:
+            session.execute(update(Vehicle), vehicle_updates)
+
+        for data_type in CHILD_TYPES:
+            model = MODEL_FIELDS[data_type][0]
+            child_ids = self._select_map(session, model.vehicle_id, model.id,
+                                         [vehicle_ids[vin] for vin in written])
+            new_children, child_updates = [], []
+            for vin in written:
+                values = self._model_values(data_type, grouped[vin].get(data_type, {}))
+                vehicle_id = vehicle_ids[vin]
+                if vehicle_id in child_ids:
+                    if values:
+                        child_updates.append(dict(values, id=child_ids[vehicle_id], updated_at=now))
+                elif self._has_required(data_type, values):
+                    new_children.append(dict(values, vehicle_id=vehicle_id))
+            if new_children:
+                session.execute(insert(model), new_children)
+            if child_updates:
+                session.execute(update(model), child_updates)
+
+        changed = [vin for vin in written if vin in previous]
+        if changed:
+            self._delete_dropped_children(session, source_id, changed, grouped, vehicle_ids)
+
+        # 记录本次导入的行指纹
+        new_rows = [{'data_source_id': source_id, 'vin': vin, 'fingerprint': fingerprints[vin]}
+                    for vin in written if vin not in previous]
+        changed_rows = [{'id': previous[vin][0], 'fingerprint': fingerprints[vin], 'updated_at': now}
+                        for vin in written if vin in previous]
+        if new_rows:
+            session.execute(insert(ImportedRow), new_rows)
+        if changed_rows:
+            session.execute(update(ImportedRow), changed_rows)
+        stats['inserted'] += len(new_rows)
+        stats['updated'] += len(changed_rows)
+
+    def _delete_batch(self, session, source_id: int, vins: List[str], previous: Dict[str, tuple]):
+        """
+        删除一批不再出现在数据源中的车辆
+
+        只删除由本数据源创建的车辆（导入前已存在的车辆保留）；仍被其他数据源引用的车辆保留，
+        并由引用它的其他数据源接管。车辆的全部子表记录一并删除，生成报告记录解除关联。
+        """
+        shared = {}
+        for chunk in _chunks(vins, QUERY_CHUNK_SIZE):
+            for vin, other_source in session.execute(
+                select(ImportedRow.vin, ImportedRow.data_source_id).where(
+                    ImportedRow.vin.in_(chunk), ImportedRow.data_source_id != source_id
+                )
+            ):
+                shared.setdefault(vin, other_source)
+
+        vehicle_ids = self._select_map(session, Vehicle.vin, Vehicle.id, vins)
+        owned = self._owned_vehicle_ids(session, source_id, list(vehicle_ids.values()))
+
+        removed = []
+        for vin, vehicle_id in vehicle_ids.items():
+            if vehicle_id not in owned:
+                continue
+            if vin in shared:
+                session.execute(update(VehicleOrigin).where(VehicleOrigin.vehicle_id == vehicle_id)
+                                .values(data_source_id=shared[vin]))
+            else:
+                removed.append(vehicle_id)
+
+        for chunk in _chunks(removed, QUERY_CHUNK_SIZE):
+            engine_ids = select(Engine.id).where(Engine.vehicle_id.in_(chunk))
+            transmission_ids = select(Transmission.id).where(Transmission.vehicle_id.in_(chunk))
+            session.execute(delete(EngineParameter).where(EngineParameter.engine_id.in_(engine_ids)))
+            session.execute(delete(TransmissionParameter).where(
+                TransmissionParameter.transmission_id.in_(transmission_ids)))
+            # 已生成的报告文件仍然存在，保留记录（含VIN），只解除与车辆、测试报告的关联
+            session.execute(update(GeneratedReport).where(
+                GeneratedReport.test_report_id.in_(select(TestReport.id).where(TestReport.vehicle_id.in_(chunk)))
+            ).values(test_report_id=None))
+            session.execute(update(GeneratedReport).where(GeneratedReport.vehicle_id.in_(chunk))
+                            .values(vehicle_id=None))
+            for model in (Engine, Transmission, Emission, VehicleParameter, TestReport, VehicleOrigin):
+                session.execute(delete(model).where(model.vehicle_id.in_(chunk)))
+            session.execute(delete(Vehicle).where(Vehicle.id.in_(chunk)))
+
+        row_ids = [previous[vin][0] for vin in vins]
+        for chunk in _chunks(row_ids, QUERY_CHUNK_SIZE):
+            session.execute(delete(ImportedRow).where(ImportedRow.id.in_(chunk)))
+
+    def _delete_dropped_children(self, session, source_id: int, vins: List[str],
+                                 grouped: Dict[str, Dict[str, Dict[str, Any]]], vehicle_ids: Dict[str, int]):
+        """
+        删除变更车辆中不再出现的子表记录（如重新交付的表格去掉了某车的排放行）
+
+        只处理由本数据源创建的车辆，其他来源的车辆的子表记录保留。
+        """
+        owned = self._owned_vehicle_ids(session, source_id, [vehicle_ids[vin] for vin in vins])
+        for data_type in CHILD_TYPES:
+            model = MODEL_FIELDS[data_type][0]
+            dropped = [vehicle_ids[vin] for vin in vins
+                       if vehicle_ids[vin] in owned and not grouped[vin].get(data_type)]
+            for chunk in _chunks(dropped, QUERY_CHUNK_SIZE):
+                if model is Engine:
+                    session.execute(delete(EngineParameter).where(
+                        EngineParameter.engine_id.in_(select(Engine.id).where(Engine.vehicle_id.in_(chunk)))))
+                session.execute(delete(model).where(model.vehicle_id.in_(chunk)))
+
+    def _owned_vehicle_ids(self, session, source_id: int, vehicle_ids: List[int]) -> set:
+        """筛选由指定数据源创建的车辆ID"""
+        owned = set()
+        for chunk in _chunks(vehicle_ids, QUERY_CHUNK_SIZE):
+            owned.update(session.scalars(
+                select(VehicleOrigin.vehicle_id).where(
+                    VehicleOrigin.vehicle_id.in_(chunk), VehicleOrigin.data_source_id == source_id
+                )
+            ))
+        return owned
+
+    def _select_map(self, session, key_column, value_column, keys: List[Any]) -> Dict[Any, Any]:
+        """分批执行 IN 查询，返回 {键: 值}"""
+        result = {}
+        for chunk in _chunks(keys, QUERY_CHUNK_SIZE):
+            rows = session.execute(select(key_column, value_column).where(key_column.in_(chunk)))
+            result.update((key, value) for key, value in rows)
+        return result
+
+    def _model_values(self, data_type: str, record: Dict[str, Any]) -> Dict[str, Any]:
+        """将结构化记录转换为数据表字段值"""
+        model, fields = MODEL_FIELDS[data_type]
+        values = {}
+        for field in fields:
+            if field not in record:
+                continue
+            value = record[field]
+            if value is None or (not isinstance(value, str) and pd.isna(value)):
+                continue
+            try:
+                values[field] = _convert_value(model.__table__.columns[field].type.python_type, value)
+            except (ValueError, TypeError, OverflowError):
+                # 供应商表格中常见 'N/A'、'-' 等占位值，单个字段无法转换时按空值导入，不中断整批
+                logger.warning(f"字段值无法转换，按空值导入: {record.get('VIN', '')} {field}={value!r}")
+                values[field] = None
+        return values
+
+    def _has_required(self, data_type: str, values: Dict[str, Any]) -> bool:
+        """检查必填字段"""
+        return all(values.get(field) not in (None, '') for field in REQUIRED_FIELDS[data_type])
+
+def _chunks(items: List[Any], size: int) -> Iterable[List[Any]]:
+    """按固定大小切分列表"""
+    for i in range(0, len(items), size):
+        yield items[i:i + size]
+
+def _convert_value(python_type: type, value: Any) -> Any:
+    """按字段类型转换值"""
+    if python_type is datetime:
+        timestamp = pd.Timestamp(value)
+        if pd.isna(timestamp):
+            raise ValueError(f"无效日期: {value!r}")
+        return timestamp.to_pydatetime()
+    if python_type is int:
+        return int(float(value))
+    if python_type is float:
+        return float(value)
+    return str(value).strip()
@@ -3,7 +3,7 @@
 Database Models Definition
 """
 
-from sqlalchemy import create_engine, Column, Integer, String, DateTime, Text, ForeignKey, Float
+from sqlalchemy import create_engine, Column, Integer, String, DateTime, Text, ForeignKey, Float, UniqueConstraint, Index
 from sqlalchemy.ext.declarative import declarative_base
 from sqlalchemy.orm import relationship, sessionmaker
 from datetime import datetime
@@ -300,6 +300,191 @@ class DataSource(Base):
             'updated_at': self.updated_at.isoformat() if self.updated_at else None
         }
 
+class ImportedRow(Base):
+    """数据源导入行指纹表（用于增量重新导入）"""
+    __tablename__ = 'imported_rows'
+    __table_args__ = (
+        UniqueConstraint('data_source_id', 'vin', name='uq_imported_rows_source_vin'),
+    )
+
+    id = Column(Integer, primary_key=True, autoincrement=True)
+    data_source_id = Column(Integer, ForeignKey('data_sources.id'), nullable=False, index=True)
+    vin = Column(String(17), nullable=False, comment='车辆识别码')
+    fingerprint = Column(String(40), nullable=False, comment='行内容指纹(SHA1)')
+    created_at = Column(DateTime, default=datetime.utcnow)
+    updated_at = Column(DateTime, default=datetime.utcnow, onupdate=datetime.utcnow)
+
+    def to_dict(self):
+        """转换为字典"""
+        return {
+            'id': self.id,
+            'data_source_id': self.data_source_id,
+            'vin': self.vin,
+            'fingerprint': self.fingerprint,
+            'created_at': self.created_at.isoformat() if self.created_at else None,
+            'updated_at': self.updated_at.isoformat() if self.updated_at else None
+        }
+
+class VehicleOrigin(Base):
+    """车辆来源表（记录由哪个数据源首次创建车辆，重新导入删除行时只删除该数据源创建的车辆）"""
+    __tablename__ = 'vehicle_origins'
+
+    id = Column(Integer, primary_key=True, autoincrement=True)
+    vehicle_id = Column(Integer, ForeignKey('vehicles.id'), nullable=False, unique=True)
+    data_source_id = Column(Integer, ForeignKey('data_sources.id'), nullable=False, index=True)
+    created_at = Column(DateTime, default=datetime.utcnow)
+    updated_at = Column(DateTime, default=datetime.utcnow, onupdate=datetime.utcnow)
+
+    def to_dict(self):
+        """转换为字典"""
+        return {
+            'id': self.id,
+            'vehicle_id': self.vehicle_id,
+            'data_source_id': self.data_source_id,
+            'created_at': self.created_at.isoformat() if self.created_at else None,
+            'updated_at': self.updated_at.isoformat() if self.updated_at else None
+        }
+
+class DocumentFingerprint(Base):
+    """文档指纹表（用于入库前的重复检测）"""
+    __tablename__ = 'document_fingerprints'
+
+    id = Column(Integer, primary_key=True, autoincrement=True)
+    data_source_id = Column(Integer, ForeignKey('data_sources.id'), nullable=False, unique=True)
+    content_hash = Column(String(40), nullable=False, index=True, comment='内容流哈希(SHA1)')
+    text_simhash = Column(String(16), nullable=False, comment='文本SimHash(64位十六进制)')
+    page_count = Column(Integer, comment='页数')
+    created_at = Column(DateTime, default=datetime.utcnow)
+    updated_at = Column(DateTime, default=datetime.utcnow, onupdate=datetime.utcnow)
+
+    def to_dict(self):
+        """转换为字典"""
+        return {
+            'id': self.id,
+            'data_source_id': self.data_source_id,
+            'content_hash': self.content_hash,
+            'text_simhash': self.text_simhash,
+            'page_count': self.page_count,
+            'created_at': self.created_at.isoformat() if self.created_at else None,
+            'updated_at': self.updated_at.isoformat() if self.updated_at else None
+        }
+
+class GeneratedReport(Base):
+    """报告清单（已生成报告的缓存键与文件，内容未变化时复用）"""
+    __tablename__ = 'generated_reports'
+
+    id = Column(Integer, primary_key=True, autoincrement=True)
+    cache_key = Column(String(64), nullable=False, unique=True, index=True, comment='内容缓存键(SHA256)')
+    vehicle_id = Column(Integer, ForeignKey('vehicles.id'), comment='车辆ID')
+    vin = Column(String(17), index=True, comment='车辆识别码')
+    template_name = Column(String(100), nullable=False, comment='模板名称')
+    template_version = Column(String(40), comment='模板版本')
+    output_format = Column(String(10), nullable=False, comment='输出格式')
+    stored_file = Column(String(255), comment='缓存文件路径')
+    report_file = Column(String(255), comment='最近一次输出的报告文件路径')
+    test_report_id = Column(Integer, ForeignKey('test_reports.id'), comment='对应的测试报告')
+    reuse_count = Column(Integer, default=0, comment='复用次数')
+    created_at = Column(DateTime, default=datetime.utcnow)
+    updated_at = Column(DateTime, default=datetime.utcnow, onupdate=datetime.utcnow)
+
+    def to_dict(self):
+        """转换为字典"""
+        return {
+            'id': self.id,
+            'cache_key': self.cache_key,
+            'vehicle_id': self.vehicle_id,
+            'vin': self.vin,
+            'template_name': self.template_name,
+            'template_version': self.template_version,
+            'output_format': self.output_format,
+            'stored_file': self.stored_file,
+            'report_file': self.report_file,
+            'test_report_id': self.test_report_id,
+            'reuse_count': self.reuse_count,
+            'created_at': self.created_at.isoformat() if self.created_at else None,
+            'updated_at': self.updated_at.isoformat() if self.updated_at else None
+        }
+
+class ReportJob(Base):
+    """报告生成任务表"""
+    __tablename__ = 'report_jobs'
+
+    id = Column(Integer, primary_key=True, autoincrement=True)
+    template_name = Column(String(100), nullable=False, comment='模板名称')
+    output_format = Column(String(10), nullable=False, comment='输出格式')
+    output_dir = Column(String(255), nullable=False, comment='输出目录')
+    name_field = Column(String(50), comment='用于文件名的字段')
+    status = Column(String(20), default='pending', index=True, comment='任务状态')
+    total_items = Column(Integer, default=0, comment='任务项总数')
+    completed_items = Column(Integer, default=0, comment='已完成数')
+    failed_items = Column(Integer, default=0, comment='失败数')
+    started_at = Column(DateTime, comment='开始时间')
+    finished_at = Column(DateTime, comment='结束时间')
+    created_at = Column(DateTime, default=datetime.utcnow)
+    updated_at = Column(DateTime, default=datetime.utcnow, onupdate=datetime.utcnow)
+
+    # 关联关系
+    items = relationship("ReportJobItem", back_populates="job")
+
+    def to_dict(self):
+        """转换为字典"""
+        return {
+            'id': self.id,
+            'template_name': self.template_name,
+            'output_format': self.output_format,
+            'output_dir': self.output_dir,
+            'name_field': self.name_field,
+            'status': self.status,
+            'total_items': self.total_items,
+            'completed_items': self.completed_items,
+            'failed_items': self.failed_items,
+            'started_at': self.started_at.isoformat() if self.started_at else None,
+            'finished_at': self.finished_at.isoformat() if self.finished_at else None,
+            'created_at': self.created_at.isoformat() if self.created_at else None,
+            'updated_at': self.updated_at.isoformat() if self.updated_at else None
+        }
+
+class ReportJobItem(Base):
+    """报告生成任务项表（每份报告一项）"""
+    __tablename__ = 'report_job_items'
+    __table_args__ = (
+        Index('ix_report_job_items_status', 'status', 'job_id', 'item_index'),
+    )
+
+    id = Column(Integer, primary_key=True, autoincrement=True)
+    job_id = Column(Integer, ForeignKey('report_jobs.id'), nullable=False, index=True)
+    item_index = Column(Integer, nullable=False, comment='在任务中的序号(从0开始)')
+    vin = Column(String(17), comment='车辆识别码')
+    data = Column(Text, comment='报告数据(JSON格式)，为空时按VIN从数据库读取')
+    status = Column(String(20), default='pending', comment='状态')
+    attempts = Column(Integer, default=0, comment='已尝试次数')
+    max_attempts = Column(Integer, default=3, comment='最大尝试次数')
+    lease_owner = Column(String(100), comment='认领的工作进程')
+    lease_expires = Column(DateTime, comment='认领租约到期时间')
+    output_file = Column(String(255), comment='报告文件路径')
+    error_message = Column(Text, comment='错误信息')
+    created_at = Column(DateTime, default=datetime.utcnow)
+    updated_at = Column(DateTime, default=datetime.utcnow, onupdate=datetime.utcnow)
+
+    # 关联关系
+    job = relationship("ReportJob", back_populates="items")
+
+    def to_dict(self):
+        """转换为字典"""
+        return {
+            'id': self.id,
+            'job_id': self.job_id,
+            'item_index': self.item_index,
+            'vin': self.vin,
+            'status': self.status,
+            'attempts': self.attempts,
+            'max_attempts': self.max_attempts,
+            'output_file': self.output_file,
+            'error_message': self.error_message,
+            'created_at': self.created_at.isoformat() if self.created_at else None,
+            'updated_at': self.updated_at.isoformat() if self.updated_at else None
+        }
+
 class Template(Base):
     """报告模板表"""
     __tablename__ = 'templates'
@@ -4,14 +4,21 @@ Database Query Engine
 """
 
 import logging
-from typing import Dict, List, Any, Optional
-from sqlalchemy.orm import sessionmaker
-from sqlalchemy import create_engine
+from typing import Dict, List, Any, Optional, Iterator
+from sqlalchemy.orm import sessionmaker, selectinload
+from sqlalchemy import create_engine, func
 
-from .models import Vehicle, Engine, Transmission, Emission, VehicleParameter, init_database
+from .models import (Vehicle, Engine, Transmission, Emission, VehicleParameter, TestReport, GeneratedReport,
+                     init_database)
 
 logger = logging.getLogger(__name__)
 
+# 批量查询时每批的车辆数
+DEFAULT_BATCH_SIZE = 200
+
+# 每批车辆数上限（旧版 SQLite 单条语句最多 999 个参数）
+MAX_BATCH_SIZE = 900
+
 class QueryEngine:
     """数据库查询引擎"""
 
@@ -32,40 +39,188 @@ class QueryEngine:
             if not vehicle:
                 return {}
 
-            result = {
-                'vehicle': vehicle.to_dict() if vehicle else None,
-                'engine': None,
-                'transmission': None,
-                'emission': None,
-                'parameters': []
-            }
+            return self._vehicle_result(vehicle)
+
+        except Exception as e:
+            logger.error(f"查询VIN {vin} 时出错: {e}")
+            return {}
+        finally:
+            session.close()
 
-            # 查询发动机信息
-            if vehicle.engine:
-                result['engine'] = vehicle.engine.to_dict()
+    def _vehicle_result(self, vehicle: Vehicle) -> Dict[str, Any]:
+        """车辆及其发动机、变速箱、排放、动态参数信息"""
+        return {
+            'vehicle': vehicle.to_dict(),
+            'engine': vehicle.engine.to_dict() if vehicle.engine else None,
+            'transmission': vehicle.transmission.to_dict() if vehicle.transmission else None,
+            'emission': vehicle.emission.to_dict() if vehicle.emission else None,
+            'parameters': [p.to_dict() for p in vehicle.parameters]
+        }
 
-            # 查询变速箱信息
-            if vehicle.transmission:
-                result['transmission'] = vehicle.transmission.to_dict()
+    def _full_vehicle_query(self, session):
+        """预加载关联信息的车辆查询（每种关联一条 IN 查询，而不是每辆车各查一次）"""
+        return session.query(Vehicle).options(
+            selectinload(Vehicle.engine),
+            selectinload(Vehicle.transmission),
+            selectinload(Vehicle.emission),
+            selectinload(Vehicle.parameters)
+        )
 
-            # 查询排放信息
-            if vehicle.emission:
-                result['emission'] = vehicle.emission.to_dict()
+    def _apply_filters(self, query, filters: Optional[Dict[str, Any]]):
+        """按车辆字段过滤，值为列表/元组时匹配其中任意一个"""
+        for name, value in (filters or {}).items():
+            if name not in Vehicle.__table__.columns:
+                raise ValueError(f"不支持的查询条件: {name}")
+            column = getattr(Vehicle, name)
+            query = query.filter(column.in_(value) if isinstance(value, (list, tuple, set)) else column == value)
+        return query
 
-            # 查询动态参数
-            parameters = session.query(VehicleParameter).filter(
-                VehicleParameter.vehicle_id == vehicle.id
-            ).all()
-            result['parameters'] = [p.to_dict() for p in parameters]
+    def search_by_vins(self, vins: List[str]) -> Dict[str, Dict[str, Any]]:
+        """
+        批量查询多个VIN码的完整信息
 
-            return result
+        Returns:
+            {VIN: 与 search_by_vin 结构相同的结果}，不存在的VIN不包含在结果中
+        """
+        session = self.get_session()
+        try:
+            results = {}
+            for start in range(0, len(vins), DEFAULT_BATCH_SIZE):
+                chunk = vins[start:start + DEFAULT_BATCH_SIZE]
+                vehicles = self._full_vehicle_query(session).filter(Vehicle.vin.in_(chunk)).all()
+                results.update((vehicle.vin, self._vehicle_result(vehicle)) for vehicle in vehicles)
+            return results
 
         except Exception as e:
-            logger.error(f"查询VIN {vin} 时出错: {e}")
+            logger.error(f"批量查询VIN时出错: {e}")
             return {}
         finally:
             session.close()
 
+    def count_vehicles(self, filters: Optional[Dict[str, Any]] = None) -> int:
+        """统计满足条件的车辆数"""
+        session = self.get_session()
+        try:
+            return self._apply_filters(session.query(func.count(Vehicle.id)), filters).scalar() or 0
+        except Exception as e:
+            logger.error(f"统计车辆数时出错: {e}")
+            return 0
+        finally:
+            session.close()
+
+    def iter_vehicle_batches(self,
+                             vins: Optional[List[str]] = None,
+                             filters: Optional[Dict[str, Any]] = None,
+                             batch_size: int = DEFAULT_BATCH_SIZE) -> Iterator[List[Dict[str, Any]]]:
+        """
+        分批查询车辆完整信息
+
+        Args:
+            vins: VIN码列表，按该顺序返回，不存在的VIN对应空字典
+            filters: 未指定 vins 时按车辆字段过滤（如 {'make': '奥迪', 'year': [2020, 2021]}），按ID顺序返回
+            batch_size: 每批车辆数
+
+        Yields:
+            每批结果列表，每项与 search_by_vin 结构相同
+        """
+        batch_size = max(1, min(batch_size, MAX_BATCH_SIZE))
+        if vins is not None:
+            for start in range(0, len(vins), batch_size):
+                chunk = list(vins[start:start + batch_size])
+                found = self._fetch_batch(lambda query: query.filter(Vehicle.vin.in_(chunk)))
+                yield [found.get(vin, {}) for vin in chunk]
+            return
+
+        # 按ID分页（键集分页），不使用 OFFSET，每批查询代价相同
+        last_id = 0
+        while True:
+            batch = self._fetch_batch(lambda query: self._apply_filters(query, filters).filter(
+                Vehicle.id > last_id).order_by(Vehicle.id).limit(batch_size))
+            if not batch:
+                return
+            last_id = batch[list(batch)[-1]]['vehicle']['id']
+            yield list(batch.values())
+
+    def _fetch_batch(self, build_query) -> Dict[str, Dict[str, Any]]:
+        """执行一批查询，返回 {VIN: 完整信息}（保持查询结果顺序）"""
+        session = self.get_session()
+        try:
+            vehicles = build_query(self._full_vehicle_query(session)).all()
+            return {vehicle.vin: self._vehicle_result(vehicle) for vehicle in vehicles}
+        except Exception as e:
+            logger.error(f"分批查询车辆信息时出错: {e}")
+            raise
+        finally:
+            session.close()
+
+    def record_generated_reports(self, entries: List[Dict[str, Any]]) -> int:
+        """
+        记录报告清单，并将报告文件路径写入对应车辆的测试报告
+
+        Args:
+            entries: ReportGenerator 生成的报告清单项（按 cache_key 更新，复用的报告累计复用次数）；
+                     车辆存在与模板同名类型的测试报告时，最近一次测试的 TestReport.report_file 更新为输出文件
+
+        Returns:
+            记录的清单项数
+        """
+        if not entries:
+            return 0
+
+        session = self.get_session()
+        try:
+            vins = list({entry['vin'] for entry in entries if entry.get('vin')})
+            keys = list({entry['cache_key'] for entry in entries})
+            vehicle_ids, records, test_reports = {}, {}, {}
+            for start in range(0, len(vins), DEFAULT_BATCH_SIZE):
+                chunk = vins[start:start + DEFAULT_BATCH_SIZE]
+                vehicle_ids.update(session.query(Vehicle.vin, Vehicle.id).filter(Vehicle.vin.in_(chunk)).all())
+            for start in range(0, len(keys), DEFAULT_BATCH_SIZE):
+                chunk = keys[start:start + DEFAULT_BATCH_SIZE]
+                records.update((record.cache_key, record) for record in
+                               session.query(GeneratedReport).filter(GeneratedReport.cache_key.in_(chunk)))
+
+            # 各车辆各类型最近一次的测试报告
+            ids = list(vehicle_ids.values())
+            for start in range(0, len(ids), DEFAULT_BATCH_SIZE):
+                chunk = ids[start:start + DEFAULT_BATCH_SIZE]
+                for report in session.query(TestReport).filter(TestReport.vehicle_id.in_(chunk)).order_by(
+                        TestReport.test_date, TestReport.id):
+                    test_reports[(report.vehicle_id, report.report_type)] = report
+
+            for entry in entries:
+                record = records.get(entry['cache_key'])
+                if record is None:
+                    record = GeneratedReport(cache_key=entry['cache_key'], reuse_count=0)
+                    session.add(record)
+                    records[entry['cache_key']] = record
+                elif entry.get('reused'):
+                    record.reuse_count = (record.reuse_count or 0) + 1
+
+                record.vehicle_id = vehicle_ids.get(entry.get('vin'))
+                record.vin = entry.get('vin')
+                record.template_name = entry['template_name']
+                record.template_version = entry.get('template_version')
+                record.output_format = entry['output_format']
+                record.stored_file = entry.get('stored_file')
+                record.report_file = entry.get('report_file')
+
+                test_report = test_reports.get((record.vehicle_id, entry['template_name']))
+                if test_report is not None:
+                    test_report.report_file = entry.get('report_file')
+                    record.test_report_id = test_report.id
+
+            session.commit()
+            logger.info(f"报告清单已记录: {len(entries)} 项")
+            return len(entries)
+
+        except Exception as e:
+            session.rollback()
+            logger.error(f"记录报告清单时出错: {e}")
+            return 0
+        finally:
+            session.close()
+
     def search_by_engine_code(self, engine_code: str) -> List[Dict[str, Any]]:
         """通过发动机型号查询相关车辆"""
         session = self.get_session()
@@ -0,0 +1,412 @@
+"""
+报告任务队列
+Report Job Queue
+
+基于本地SQLite数据库的报告生成任务队列：
+- 提交任务时每份报告写入一条任务项，状态持久化在数据库中，程序退出或崩溃后可以继续
+- 工作进程按批认领任务项并持有租约，租约到期仍未完成（进程崩溃）的任务项可被重新认领
+- 失败的任务项在最大尝试次数内自动重新排队，超过后标记为失败，可手动重试
+"""
+
+import json
+import uuid
+import logging
+from datetime import datetime, timedelta
+from typing import Dict, List, Any, Optional
+
+from sqlalchemy import select, insert, update, func, event, and_, or_
+from sqlalchemy.orm import sessionmaker
+
+from .models import ReportJob, ReportJobItem, init_database
+
+logger = logging.getLogger(__name__)
+
+# 任务项状态
+ITEM_PENDING = 'pending'
+ITEM_RUNNING = 'running'
+ITEM_DONE = 'done'
+ITEM_FAILED = 'failed'
+ITEM_CANCELLED = 'cancelled'
+
+# 任务状态
+JOB_PENDING = 'pending'
+JOB_RUNNING = 'running'
+JOB_COMPLETED = 'completed'
+JOB_CANCELLED = 'cancelled'
+
+# 默认最大尝试次数
+DEFAULT_MAX_ATTEMPTS = 3
+
+# 默认认领租约时长（秒），工作进程在租约内未完成的任务项视为中断
+DEFAULT_LEASE_SECONDS = 300
+
+# SQLite 等待写锁的时间（毫秒），多个工作进程同时写入时排队而不是立即报错
+SQLITE_BUSY_TIMEOUT_MS = 30000
+
+class ReportJobQueue:
+    """报告生成任务队列"""
+
+    def __init__(self, database_url: Optional[str] = None):
+        self.engine = init_database(database_url)
+        write_engine = self.engine
+        if self.engine.dialect.name == 'sqlite':
+            event.listen(self.engine, 'connect', _configure_sqlite)
+            event.listen(self.engine, 'begin', _begin_sqlite)
+            # 丢弃建表时未经配置的连接
+            self.engine.dispose()
+            write_engine = self.engine.execution_options(sqlite_begin_immediate=True)
+        self.database_url = self.engine.url.render_as_string(hide_password=False)
+        self.Session = sessionmaker(bind=self.engine)
+        self.WriteSession = sessionmaker(bind=write_engine)
+
+    def get_session(self, write: bool = False):
+        """获取数据库会话（write=True 时事务开始即取得写锁）"""
+        return self.WriteSession() if write else self.Session()
+
+    def submit(self,
+               template_name: str,
+               output_format: str,
+               output_dir: str,
+               vins: Optional[List[str]] = None,
+               records: Optional[List[Dict[str, Any]]] = None,
+               name_field: str = 'vin',
+               max_attempts: int = DEFAULT_MAX_ATTEMPTS) -> Optional[int]:
+        """
+        提交报告任务
+
+        Args:
+            template_name: 模板名称
+            output_format: 输出格式 (pdf, docx, excel)
+            output_dir: 输出目录
+            vins: VIN码列表，工作进程按VIN从数据库读取报告数据
+            records: 报告数据列表（与 vins 二选一），随任务项保存
+            name_field: 用于文件名的字段
+            max_attempts: 每个任务项的最大尝试次数
+
+        Returns:
+            任务ID，失败返回None
+        """
+        if records is not None:
+            items = [
+                {'vin': _text(record.get('vin')), 'data': json.dumps(record, ensure_ascii=False, default=str)}
+                for record in records
+            ]
+        else:
+            items = [{'vin': vin, 'data': None} for vin in vins or []]
+
+        session = self.get_session(write=True)
+        try:
+            job = ReportJob(template_name=template_name, output_format=output_format.lower(), output_dir=output_dir,
+                            name_field=name_field, status=JOB_PENDING, total_items=len(items))
+            session.add(job)
+            session.flush()
+            if items:
+                session.execute(insert(ReportJobItem), [
+                    dict(item, job_id=job.id, item_index=index, status=ITEM_PENDING,
+                         attempts=0, max_attempts=max_attempts)
+                    for index, item in enumerate(items)
+                ])
+            if not items:
+                job.status = JOB_COMPLETED
+                job.finished_at = datetime.utcnow()
+            session.commit()
+            logger.info(f"报告任务已提交: #{job.id} {template_name}, {len(items)} 份")
+            return job.id
+
+        except Exception as e:
+            session.rollback()
+            logger.error(f"提交报告任务失败: {e}")
+            return None
+        finally:
+            session.close()
+
+    def claim(self, worker_id: str, limit: int = 1,
+              lease_seconds: int = DEFAULT_LEASE_SECONDS) -> List[Dict[str, Any]]:
+        """
+        认领待处理的任务项（包括租约已过期的中断任务项）
+
+        认领在一条 UPDATE 语句中完成，多个工作进程同时认领时不会取得同一任务项。
+
+        Returns:
+            任务项列表，每项包含任务的模板、格式、输出目录等信息，以及本次认领的 lease 标识
+        """
+        now = datetime.utcnow()
+        lease = f"{worker_id}:{uuid.uuid4().hex}"
+        session = self.get_session(write=True)
+        try:
+            # 最后一次尝试中断的任务项不再认领，直接标记失败
+            exhausted = and_(
+                ReportJobItem.status == ITEM_RUNNING,
+                ReportJobItem.lease_expires < now,
+                ReportJobItem.attempts >= ReportJobItem.max_attempts
+            )
+            exhausted_jobs = set(session.scalars(select(ReportJobItem.job_id).where(exhausted).distinct()))
+            if exhausted_jobs:
+                session.execute(update(ReportJobItem).where(exhausted).values(
+                    status=ITEM_FAILED, lease_owner=None, lease_expires=None,
+                    error_message='处理中断且已达到最大尝试次数'))
+                for job_id in exhausted_jobs:
+                    self._refresh_job(session, job_id)
+
+            claimable = or_(
+                ReportJobItem.status == ITEM_PENDING,
+                and_(ReportJobItem.status == ITEM_RUNNING, ReportJobItem.lease_expires < now)
+            )
+            candidates = select(ReportJobItem.id).where(claimable).order_by(
+                ReportJobItem.job_id, ReportJobItem.item_index).limit(limit).scalar_subquery()
+            session.execute(
+                update(ReportJobItem).where(ReportJobItem.id.in_(candidates), claimable).values(
+                    status=ITEM_RUNNING, lease_owner=lease, lease_expires=now + timedelta(seconds=lease_seconds),
+                    attempts=ReportJobItem.attempts + 1
+                ).execution_options(synchronize_session=False)
+            )
+
+            rows = session.execute(
+                select(ReportJobItem, ReportJob).join(ReportJob, ReportJobItem.job_id == ReportJob.id).where(
+                    ReportJobItem.lease_owner == lease).order_by(ReportJobItem.job_id, ReportJobItem.item_index)
+            ).all()
+
+            job_ids = {job.id for _, job in rows}
+            if job_ids:
+                session.execute(
+                    update(ReportJob).where(ReportJob.id.in_(job_ids), ReportJob.status == JOB_PENDING).values(
+                        status=JOB_RUNNING, started_at=now)
+                )
+            session.commit()
+
+            return [
+                {
+                    'id': item.id,
+                    'lease': lease,
+                    'job_id': job.id,
+                    'item_index': item.item_index,
+                    'total': job.total_items,
+                    'vin': item.vin,
+                    'data': json.loads(item.data) if item.data else None,
+                    'attempts': item.attempts,
+                    'template_name': job.template_name,
+                    'output_format': job.output_format,
+                    'output_dir': job.output_dir,
+                    'name_field': job.name_field,
+                    'submitted_at': job.created_at
+                }
+                for item, job in rows
+            ]
+
+        except Exception as e:
+            session.rollback()
+            logger.error(f"认领报告任务项失败: {e}")
+            return []
+        finally:
+            session.close()
+
+    def complete(self, item: Dict[str, Any], output_file: str) -> bool:
+        """标记任务项完成"""
+        return self._finish(item, ITEM_DONE, output_file=output_file, error_message=None)
+
+    def fail(self, item: Dict[str, Any], error: str, retry: bool = True) -> bool:
+        """
+        标记任务项失败
+
+        Args:
+            retry: 未达到最大尝试次数时重新排队；数据缺失等重试也无法成功的错误传 False
+        """
+        session = self.get_session()
+        try:
+            attempts, max_attempts = session.execute(
+                select(ReportJobItem.attempts, ReportJobItem.max_attempts).where(ReportJobItem.id == item['id'])
+            ).one()
+        except Exception as e:
+            logger.error(f"读取报告任务项失败: {e}")
+            return False
+        finally:
+            session.close()
+
+        status = ITEM_PENDING if retry and attempts < max_attempts else ITEM_FAILED
+        if status == ITEM_PENDING:
+            logger.warning(f"报告任务项失败，将重试 ({attempts}/{max_attempts}): {error}")
+        return self._finish(item, status, error_message=error)
+
+    def _finish(self, item: Dict[str, Any], status: str, **values) -> bool:
+        """结束本次认领（只更新仍由该认领持有的任务项）"""
+        session = self.get_session(write=True)
+        try:
+            updated = session.execute(
+                update(ReportJobItem).where(
+                    ReportJobItem.id == item['id'],
+                    ReportJobItem.lease_owner == item['lease']
+                ).values(status=status, lease_owner=None, lease_expires=None, **values)
+            ).rowcount
+            if updated:
+                self._refresh_job(session, item['job_id'])
+            session.commit()
+            if not updated:
+                logger.warning(f"报告任务项 #{item['id']} 的租约已失效，结果未记录")
+            return bool(updated)
+
+        except Exception as e:
+            session.rollback()
+            logger.error(f"更新报告任务项失败: {e}")
+            return False
+        finally:
+            session.close()
+
+    def _refresh_job(self, session, job_id: int):
+        """按任务项状态更新任务的统计和状态"""
+        counts = dict(session.execute(
+            select(ReportJobItem.status, func.count()).where(ReportJobItem.job_id == job_id).group_by(
+                ReportJobItem.status)
+        ).all())
+        values = {
+            'completed_items': counts.get(ITEM_DONE, 0),
+            'failed_items': counts.get(ITEM_FAILED, 0)
+        }
+        if not counts.get(ITEM_PENDING) and not counts.get(ITEM_RUNNING):
+            job = session.get(ReportJob, job_id)
+            if job is not None and job.status != JOB_CANCELLED:
+                values['status'] = JOB_COMPLETED
+            values['finished_at'] = datetime.utcnow()
+        session.execute(update(ReportJob).where(ReportJob.id == job_id).values(**values))
+
+    def job_status(self, job_id: int) -> Dict[str, Any]:
+        """任务状态及各状态的任务项数量"""
+        session = self.get_session()
+        try:
+            job = session.get(ReportJob, job_id)
+            if job is None:
+                return {}
+            counts = dict(session.execute(
+                select(ReportJobItem.status, func.count()).where(ReportJobItem.job_id == job_id).group_by(
+                    ReportJobItem.status)
+            ).all())
+            result = job.to_dict()
+            result['item_counts'] = counts
+            finished = counts.get(ITEM_DONE, 0) + counts.get(ITEM_FAILED, 0) + counts.get(ITEM_CANCELLED, 0)
+            result['progress'] = finished / job.total_items if job.total_items else 1.0
+            return result
+        except Exception as e:
+            logger.error(f"查询报告任务状态失败: {e}")
+            return {}
+        finally:
+            session.close()
+
+    def job_items(self, job_id: int, status: Optional[str] = None) -> List[Dict[str, Any]]:
+        """任务项列表"""
+        session = self.get_session()
+        try:
+            query = select(ReportJobItem).where(ReportJobItem.job_id == job_id)
+            if status:
+                query = query.where(ReportJobItem.status == status)
+            return [item.to_dict() for item in session.scalars(query.order_by(ReportJobItem.item_index))]
+        except Exception as e:
+            logger.error(f"查询报告任务项失败: {e}")
+            return []
+        finally:
+            session.close()
+
+    def list_jobs(self, limit: int = 20) -> List[Dict[str, Any]]:
+        """最近的任务"""
+        session = self.get_session()
+        try:
+            jobs = session.scalars(select(ReportJob).order_by(ReportJob.id.desc()).limit(limit))
+            return [job.to_dict() for job in jobs]
+        except Exception as e:
+            logger.error(f"查询报告任务列表失败: {e}")
+            return []
+        finally:
+            session.close()
+
+    def pending_count(self) -> int:
+        """待处理（含租约已过期）的任务项数"""
+        session = self.get_session()
+        try:
+            return session.scalar(select(func.count()).select_from(ReportJobItem).where(or_(
+                ReportJobItem.status == ITEM_PENDING,
+                and_(ReportJobItem.status == ITEM_RUNNING, ReportJobItem.lease_expires < datetime.utcnow())
+            ))) or 0
+        except Exception as e:
+            logger.error(f"统计待处理报告任务项失败: {e}")
+            return 0
+        finally:
+            session.close()
+
+    def resume(self) -> int:
+        """
+        将处理中的任务项重新排队（程序启动时调用，此时没有存活的工作进程，不必等待租约到期）
+
+        Returns:
+            重新排队的任务项数
+        """
+        return self._requeue(ReportJobItem.status == ITEM_RUNNING, '恢复中断的报告任务项')
+
+    def retry_failed(self, job_id: int) -> int:
+        """将任务中失败的任务项重新排队（重新计算尝试次数）"""
+        return self._requeue(and_(ReportJobItem.job_id == job_id, ReportJobItem.status == ITEM_FAILED),
+                             '重试失败的报告任务项', reset_attempts=True)
+
+    def _requeue(self, condition, action: str, reset_attempts: bool = False) -> int:
+        """将满足条件的任务项重新排队"""
+        session = self.get_session(write=True)
+        try:
+            job_ids = set(session.scalars(select(ReportJobItem.job_id).where(condition).distinct()))
+            values = {'status': ITEM_PENDING, 'lease_owner': None, 'lease_expires': None}
+            if reset_attempts:
+                values['attempts'] = 0
+            count = session.execute(update(ReportJobItem).where(condition).values(**values)).rowcount
+            if job_ids:
+                session.execute(update(ReportJob).where(ReportJob.id.in_(job_ids)).values(
+                    status=JOB_RUNNING, finished_at=None))
+                for job_id in job_ids:
+                    self._refresh_job(session, job_id)
+            session.commit()
+            if count:
+                logger.info(f"{action}: {count} 项")
+            return count
+        except Exception as e:
+            session.rollback()
+            logger.error(f"{action}失败: {e}")
+            return 0
+        finally:
+            session.close()
+
+    def cancel(self, job_id: int) -> int:
+        """取消任务中尚未开始的任务项（正在处理的任务项会完成）"""
+        session = self.get_session(write=True)
+        try:
+            count = session.execute(
+                update(ReportJobItem).where(ReportJobItem.job_id == job_id, ReportJobItem.status == ITEM_PENDING)
+                .values(status=ITEM_CANCELLED)
+            ).rowcount
+            session.execute(update(ReportJob).where(ReportJob.id == job_id).values(status=JOB_CANCELLED))
+            self._refresh_job(session, job_id)
+            session.commit()
+            logger.info(f"报告任务 #{job_id} 已取消 {count} 项")
+            return count
+        except Exception as e:
+            session.rollback()
+            logger.error(f"取消报告任务失败: {e}")
+            return 0
+        finally:
+            session.close()
+
+def _configure_sqlite(connection, connection_record):
+    """SQLite连接设置：WAL模式（读写互不阻塞）及写锁等待时间，事务由 _begin_sqlite 开始"""
+    connection.isolation_level = None
+    cursor = connection.cursor()
+    cursor.execute(f"PRAGMA busy_timeout={SQLITE_BUSY_TIMEOUT_MS}")
+    cursor.execute("PRAGMA journal_mode=WAL")
+    cursor.close()
+
+def _begin_sqlite(connection):
+    """
+    写事务以 BEGIN IMMEDIATE 开始：先读后写的事务在开始时就排队等待写锁，
+    避免 WAL 模式下读快照过期导致升级写锁时直接报 database is locked
+    """
+    if connection.get_execution_options().get('sqlite_begin_immediate'):
+        connection.exec_driver_sql("BEGIN IMMEDIATE")
+    else:
+        connection.exec_driver_sql("BEGIN")
+
+def _text(value: Any) -> Optional[str]:
+    """可选文本字段"""
+    return None if value in (None, '') else str(value)
@@ -0,0 +1,213 @@
+"""
+列式数据工具
+Columnar Data Helpers
+
+列式布局下一张表表示为 {列名: numpy数组}，各数组等长：
+- 文本列为定长unicode数组（'<U n'），缺失值为空字符串
+- 日期列为 datetime64[ns]，缺失值为 NaT
+- 数值列为 int64/float64，含缺失值的整数列转为float64，缺失值为 NaN
+"""
+
+from datetime import date
+from typing import Dict, List, Any, Iterator, Union, Optional, Tuple, Callable
+
+import numpy as np
+import pandas as pd
+
+# 超过该长度的文本列保留为object数组，避免定长数组按最长值浪费内存
+MAX_FIXED_WIDTH = 256
+
+Columns = Dict[Any, np.ndarray]
+
+def series_to_array(series: pd.Series) -> np.ndarray:
+    """将一列转换为带类型的numpy数组"""
+    dtype = series.dtype
+
+    if pd.api.types.is_bool_dtype(dtype) or pd.api.types.is_numeric_dtype(dtype):
+        if series.isna().any():
+            return series.to_numpy(dtype='float64', na_value=np.nan)
+        return series.to_numpy()
+
+    if pd.api.types.is_datetime64_any_dtype(dtype):
+        if getattr(dtype, 'tz', None) is not None:
+            series = series.dt.tz_localize(None)
+        return series.to_numpy(dtype='datetime64[ns]')
+
+    # object列：尝试识别纯数值、纯日期列，否则作为文本
+    present = series.dropna()
+    if present.empty:
+        return np.full(len(series), '', dtype='<U1')
+
+    numbers = pd.to_numeric(present, errors='coerce')
+    if numbers.notna().all() and not present.map(lambda v: isinstance(v, str)).any():
+        return series_to_array(pd.to_numeric(series, errors='coerce'))
+
+    if present.map(lambda v: isinstance(v, (date, np.datetime64))).all():
+        dates = pd.to_datetime(series, errors='coerce')
+        if dates.notna().sum() == len(present):
+            return series_to_array(dates)
+
+    text = series.where(series.notna(), '').astype(str)
+    width = int(text.str.len().max() or 1)
+    if width > MAX_FIXED_WIDTH:
+        return text.to_numpy(dtype=object)
+    return text.to_numpy(dtype=f'<U{width}')
+
+def frame_to_columns(df: pd.DataFrame) -> Columns:
+    """将DataFrame转换为列式字典"""
+    return {name: series_to_array(df[name]) for name in df.columns}
+
+def missing_mask(array: np.ndarray) -> np.ndarray:
+    """获取数组的缺失值掩码"""
+    kind = array.dtype.kind
+    if kind == 'U' or kind == 'S':
+        return array == array.dtype.type()
+    if kind == 'f':
+        return np.isnan(array)
+    if kind == 'M':
+        return np.isnat(array)
+    if kind in 'iub':
+        return np.zeros(len(array), dtype=bool)
+    return pd.isna(array) | (array == '')
+
+def to_series(array: np.ndarray) -> pd.Series:
+    """将列式数组转换为Series，缺失值统一为NaN/NaT"""
+    series = pd.Series(array)
+    return series.mask(missing_mask(array))
+
+def columns_to_frame(columns: Columns) -> pd.DataFrame:
+    """将列式字典转换为DataFrame（缺失值还原为NaN/NaT）"""
+    return pd.DataFrame({name: to_series(array) for name, array in columns.items()})
+
+def concat_plan(chunks: List[Optional[np.ndarray]]) -> Tuple[np.dtype, bool]:
+    """
+    确定多段数组拼接后的类型
+
+    Args:
+        chunks: 各段数组，None 表示该段缺少此列（拼接后为缺失值）
+
+    Returns:
+        (拼接后的dtype, 是否需要逐段转换为文本)；类型不一致的列按文本合并，与逐行推断的结果相同
+    """
+    present = [chunk for chunk in chunks if chunk is not None]
+    kinds = {chunk.dtype.kind for chunk in present}
+    has_gap = len(present) < len(chunks)
+
+    if kinds <= set('iub'):
+        # 整数列有缺失的段时转为float64，缺失值为NaN
+        return (np.dtype('float64') if has_gap else np.result_type(*present)), False
+    if kinds <= set('iubf'):
+        return np.dtype('float64'), False
+    if kinds == {'M'}:
+        return np.dtype('datetime64[ns]'), False
+    if kinds == {'U'}:
+        return np.dtype(f'<U{max(chunk.dtype.itemsize // 4 for chunk in present)}'), False
+
+    width = text_width(present)
+    return (np.dtype(object) if width > MAX_FIXED_WIDTH else np.dtype(f'<U{width}')), True
+
+def text_width(chunks: List[Optional[np.ndarray]]) -> int:
+    """各段数组转换为文本后的最大长度"""
+    return max((len(value) for chunk in chunks if chunk is not None for value in _chunk_text(chunk)), default=1) or 1
+
+def fill_chunks(out: np.ndarray, chunks: List[Optional[np.ndarray]], lengths: List[int], as_text: bool):
+    """将各段数组依次复制到预先分配的结果数组中"""
+    missing = _missing_value(out.dtype)
+    start = 0
+    for chunk, length in zip(chunks, lengths):
+        end = start + length
+        if chunk is None:
+            out[start:end] = missing
+        else:
+            out[start:end] = _chunk_text(chunk) if as_text else chunk
+        start = end
+
+def concat_chunks(chunks: List[Optional[np.ndarray]], lengths: List[int]) -> np.ndarray:
+    """拼接一列的多段数组（只分配并复制一次）"""
+    dtype, as_text = concat_plan(chunks)
+    out = np.empty(sum(lengths), dtype=dtype)
+    fill_chunks(out, chunks, lengths, as_text)
+    return out
+
+def _chunk_text(chunk: np.ndarray) -> np.ndarray:
+    """将一段数组转换为文本（object数组），缺失值为空字符串"""
+    if chunk.dtype.kind in 'UO':
+        return np.where(missing_mask(chunk), '', chunk.astype(object))
+    return np.where(missing_mask(chunk), '', pd.Series(chunk).astype(str).to_numpy(dtype=object))
+
+def _missing_value(dtype: np.dtype) -> Any:
+    """某类型数组的缺失值"""
+    if dtype.kind == 'M':
+        return np.datetime64('NaT')
+    if dtype.kind == 'f':
+        return np.nan
+    return ''
+
+class ColumnChunks:
+    """逐段累积的列式数据：追加时只保存各段的引用，全部追加后每列拼接一次"""
+
+    def __init__(self):
+        self.chunks = []
+        self.lengths = []
+
+    def append(self, columns: Columns):
+        """追加一段列式数据"""
+        if columns:
+            self.chunks.append(columns)
+            self.lengths.append(row_count(columns))
+
+    def names(self) -> List[Any]:
+        """各段列名的并集（按首次出现的顺序）"""
+        return list(dict.fromkeys(name for columns in self.chunks for name in columns))
+
+    def column(self, name: Any) -> List[Optional[np.ndarray]]:
+        """某列在各段中的数组（缺少该列的段为None）"""
+        return [columns.get(name) for columns in self.chunks]
+
+    def concat(self, concat_column: Callable[[List[Optional[np.ndarray]], List[int]], np.ndarray] = concat_chunks) -> Columns:
+        """
+        拼接全部数据段
+
+        Args:
+            concat_column: 拼接一列的函数 (各段数组, 各段行数) -> 数组，如 ScratchStore.concat
+        """
+        if len(self.chunks) == 1:
+            return self.chunks[0]
+        return {name: concat_column(self.column(name), self.lengths) for name in self.names()}
+
+def concat_columns(first: Columns, second: Columns) -> Columns:
+    """纵向拼接两份列式数据（列取并集，类型不一致的列按文本合并）"""
+    chunks = ColumnChunks()
+    chunks.append(first)
+    chunks.append(second)
+    return chunks.concat()
+
+def is_columnar(data: Any) -> bool:
+    """判断数据是否为列式布局"""
+    return isinstance(data, dict)
+
+def row_count(data: Union[Columns, List[Any]]) -> int:
+    """获取记录数（兼容记录列表和列式字典）"""
+    if is_columnar(data):
+        return len(next(iter(data.values()))) if data else 0
+    return len(data)
+
+def iter_records(data: Union[Columns, List[Dict[str, Any]]]) -> Iterator[Dict[str, Any]]:
+    """
+    逐条遍历记录（兼容记录列表和列式字典）
+
+    列式数据中的缺失值不会出现在记录中，与记录布局保持一致。
+    """
+    if not is_columnar(data):
+        yield from data
+        return
+
+    names = list(data.keys())
+    masks = [missing_mask(data[name]) for name in names]
+    values = [pd.Series(data[name]).tolist() for name in names]
+    for i in range(row_count(data)):
+        yield {name: column[i] for name, column, mask in zip(names, values, masks) if not mask[i]}
+
+def columns_nbytes(columns: Columns) -> int:
+    """计算列式数据占用的字节数"""
+    return sum(array.nbytes for array in columns.values())
@@ -0,0 +1,251 @@
+"""
+数据验证引擎
+Data Validation Engine
+
+按列对结构化数据执行规则验证，每条规则输出一个逐行布尔掩码（True 表示该行有问题），
+所有检查都是整列的向量化运算，不逐条遍历记录。
+"""
+
+import logging
+from datetime import datetime
+from typing import Dict, Any, Optional
+
+import numpy as np
+import pandas as pd
+
+from .columnar import is_columnar, columns_to_frame
+
+logger = logging.getLogger(__name__)
+
+# VIN校验位：字母对应值（I、O、Q不允许出现）
+_VIN_TRANSLITERATION = {
+    'A': 1, 'B': 2, 'C': 3, 'D': 4, 'E': 5, 'F': 6, 'G': 7, 'H': 8,
+    'J': 1, 'K': 2, 'L': 3, 'M': 4, 'N': 5, 'P': 7, 'R': 9,
+    'S': 2, 'T': 3, 'U': 4, 'V': 5, 'W': 6, 'X': 7, 'Y': 8, 'Z': 9
+}
+_VIN_WEIGHTS = np.array([8, 7, 6, 5, 4, 3, 2, 10, 0, 9, 8, 7, 6, 5, 4, 3, 2], dtype=np.int64)
+_VIN_VALUES = np.zeros(256, dtype=np.int64)
+for _digit in range(10):
+    _VIN_VALUES[ord(str(_digit))] = _digit
+for _char, _value in _VIN_TRANSLITERATION.items():
+    _VIN_VALUES[ord(_char)] = _value
+# 余数 0~9 对应数字字符，余数 10 对应 'X'
+_VIN_CHECK_CHARS = np.array([ord(c) for c in '0123456789X'], dtype=np.uint8)
+
+VIN_PATTERN = r'[A-HJ-NPR-Z0-9]{17}'
+
+# 年月日以 "年/月/日"、"/"、"." 分隔的日期文本，统一为 "YYYY-MM-DD" 后再解析
+_DATE_TEXT_PATTERN = r'^(\d{4})\s*[年/.\-]\s*(\d{1,2})\s*[月/.\-]\s*(\d{1,2})(?:\s*日)?'
+_COMPACT_DATE_PATTERN = r'^(\d{4})(\d{2})(\d{2})$'
+
+# pandas 2.0 起默认按第一个值推断整列的日期格式，混合格式的列需要逐个解析
+_MIXED_DATE_FORMAT = {'format': 'mixed'} if int(pd.__version__.split('.')[0]) >= 2 else {}
+
+class DataValidator:
+    """结构化数据验证引擎"""
+
+    def __init__(self, rules: Optional[Dict[str, Any]] = None):
+        self.rules = {}
+        self.load_default_rules()
+        if rules:
+            self.rules.update(rules)
+
+    def load_default_rules(self):
+        """加载默认验证规则"""
+        current_year = datetime.now().year
+        self.rules = {
+            'vin': {
+                'field': 'VIN',
+                'check_digit': True,
+                # 欧洲等地区VIN不强制校验位，校验位不符默认只作为警告
+                'check_digit_severity': 'warning',
+                'duplicate_severity': 'error'
+            },
+            'ranges': {
+                'displacement': {'min': 0.5, 'max': 10.0, 'label': '排量'},
+                'power': {'min': 10, 'max': 1000, 'label': '功率'},
+                'torque': {'min': 20, 'max': 3000, 'label': '扭矩'},
+                'co2_emission': {'min': 0, 'max': 600, 'label': 'CO2排放'},
+                'fuel_consumption': {'min': 0, 'max': 50, 'label': '油耗'},
+                'year': {'min': 1980, 'max': current_year + 1, 'label': '年份'}
+            },
+            'dates': {
+                'production_date': {'min': '1980-01-01', 'max_days_ahead': 365, 'label': '生产日期'},
+                'test_date': {'min': '1980-01-01', 'max_days_ahead': 0, 'label': '测试日期'}
+            },
+            # 错误信息中最多列出的示例值数量
+            'max_examples': 5
+        }
+
+    def validate(self, structured_data: Dict[str, Any]) -> Dict[str, Any]:
+        """
+        验证结构化数据
+
+        Args:
+            structured_data: ExcelParser输出的 structured_data（记录列表或列式布局均可），也可直接传入DataFrame
+
+        Returns:
+            验证结果，row_masks[数据类型][规则名] 为逐行错误掩码，
+            invalid_rows[数据类型] 为该类型所有错误级规则的合并掩码
+        """
+        result = {
+            'is_valid': True,
+            'errors': [],
+            'warnings': [],
+            'row_masks': {},
+            'invalid_rows': {},
+            'statistics': {}
+        }
+
+        for data_type, data in structured_data.items():
+            frame = self._to_frame(data)
+            masks = {}
+            severities = {}
+
+            self._check_vins(frame, masks, severities)
+            self._check_ranges(frame, masks, severities)
+            self._check_dates(frame, masks, severities)
+
+            invalid = np.zeros(len(frame), dtype=bool)
+            for rule_name, mask in masks.items():
+                count = int(mask.sum())
+                if not count:
+                    continue
+                message = self._format_message(data_type, rule_name, frame, mask, count)
+                if severities[rule_name] == 'error':
+                    result['errors'].append(message)
+                    invalid |= mask
+                else:
+                    result['warnings'].append(message)
+
+            result['row_masks'][data_type] = masks
+            result['invalid_rows'][data_type] = invalid
+            result['statistics'][data_type] = {
+                'total_rows': len(frame),
+                'invalid_rows': int(invalid.sum())
+            }
+
+        result['is_valid'] = not result['errors']
+        return result
+
+    def _to_frame(self, data: Any) -> pd.DataFrame:
+        """将记录列表或列式数据转换为DataFrame"""
+        if isinstance(data, pd.DataFrame):
+            return data
+        if is_columnar(data):
+            return columns_to_frame(data)
+        return pd.DataFrame.from_records(data)
+
+    def _check_vins(self, frame: pd.DataFrame, masks: Dict[str, np.ndarray], severities: Dict[str, str]):
+        """VIN格式、校验位和重复检查"""
+        vin_rules = self.rules['vin']
+        field = vin_rules['field']
+        if field not in frame.columns:
+            return
+
+        present = frame[field].notna().to_numpy()
+        vins = frame[field].astype(str).str.strip().str.upper()
+
+        format_ok = vins.str.fullmatch(VIN_PATTERN).fillna(False).to_numpy(dtype=bool)
+        masks['vin_format'] = present & ~format_ok
+        severities['vin_format'] = 'error'
+
+        if vin_rules.get('check_digit'):
+            check_ok = np.ones(len(frame), dtype=bool)
+            check_ok[format_ok] = vin_check_digit_valid(vins.to_numpy()[format_ok])
+            masks['vin_check_digit'] = ~check_ok
+            severities['vin_check_digit'] = vin_rules.get('check_digit_severity', 'warning')
+
+        duplicated = vins.where(present).duplicated(keep=False).to_numpy() & present
+        masks['vin_duplicate'] = duplicated
+        severities['vin_duplicate'] = vin_rules.get('duplicate_severity', 'error')
+
+    def _check_ranges(self, frame: pd.DataFrame, masks: Dict[str, np.ndarray], severities: Dict[str, str]):
+        """数值字段类型和范围检查"""
+        for field, rule in self.rules['ranges'].items():
+            if field not in frame.columns:
+                continue
+
+            column = frame[field]
+            present = column.notna().to_numpy()
+            values = pd.to_numeric(column, errors='coerce').to_numpy(dtype='float64', na_value=np.nan)
+            numeric = ~np.isnan(values)
+
+            masks[f'{field}_not_numeric'] = present & ~numeric
+            severities[f'{field}_not_numeric'] = 'error'
+
+            out_of_range = np.zeros(len(frame), dtype=bool)
+            with np.errstate(invalid='ignore'):
+                if rule.get('min') is not None:
+                    out_of_range |= numeric & (values < rule['min'])
+                if rule.get('max') is not None:
+                    out_of_range |= numeric & (values > rule['max'])
+            masks[f'{field}_range'] = out_of_range
+            severities[f'{field}_range'] = rule.get('severity', 'error')
+
+    def _check_dates(self, frame: pd.DataFrame, masks: Dict[str, np.ndarray], severities: Dict[str, str]):
+        """日期字段合法性检查"""
+        now = pd.Timestamp.now()
+        for field, rule in self.rules['dates'].items():
+            if field not in frame.columns:
+                continue
+
+            column = frame[field]
+            present = column.notna().to_numpy()
+            dates = _parse_dates(column)
+            parsed = dates.notna().to_numpy()
+
+            masks[f'{field}_invalid'] = present & ~parsed
+            severities[f'{field}_invalid'] = 'error'
+
+            earliest = pd.Timestamp(rule.get('min', '1900-01-01'))
+            latest = now + pd.Timedelta(days=rule.get('max_days_ahead', 0))
+            out_of_range = ((dates < earliest) | (dates > latest)).to_numpy(dtype=bool)
+            masks[f'{field}_range'] = parsed & out_of_range
+            severities[f'{field}_range'] = rule.get('severity', 'error')
+
+    def _format_message(self, data_type: str, rule_name: str, frame: pd.DataFrame,
+                        mask: np.ndarray, count: int) -> str:
+        """生成汇总错误信息（附带少量示例）"""
+        field = self._rule_field(rule_name)
+        examples = []
+        if field in frame.columns:
+            examples = frame[field][mask].head(self.rules.get('max_examples', 5)).astype(str).tolist()
+        return f"{data_type}.{rule_name}: {count} 行不符合规则，示例: {', '.join(examples)}"
+
+    def _rule_field(self, rule_name: str) -> str:
+        """根据规则名获取对应字段"""
+        if rule_name.startswith('vin_'):
+            return self.rules['vin']['field']
+        for field in list(self.rules['ranges']) + list(self.rules['dates']):
+            if rule_name.startswith(f'{field}_'):
+                return field
+        return rule_name
+
+def vin_check_digit_valid(vins: np.ndarray) -> np.ndarray:
+    """
+    批量校验VIN第9位校验位（ISO 3779 / GB 16735）
+
+    Args:
+        vins: 已通过格式检查的17位大写VIN数组
+
+    Returns:
+        每个VIN校验位是否正确的布尔数组
+    """
+    if len(vins) == 0:
+        return np.zeros(0, dtype=bool)
+
+    codes = np.frombuffer(''.join(vins).encode('ascii'), dtype=np.uint8).reshape(-1, 17)
+    remainder = (_VIN_VALUES[codes] @ _VIN_WEIGHTS) % 11
+    return codes[:, 8] == _VIN_CHECK_CHARS[remainder]
+
+def _parse_dates(column: pd.Series) -> pd.Series:
+    """解析日期列（同一列中可混用 2023-01-05、2023/02/06、2023年3月7日、20230408 等写法）"""
+    if pd.api.types.is_datetime64_any_dtype(column):
+        return column
+    # 全为空值的列可能是float类型，转为object后才能使用 .str
+    column = column.astype(object)
+    text = column.where(column.isna(), column.astype(str).str.strip())
+    text = text.str.replace(_DATE_TEXT_PATTERN, r'\1-\2-\3', regex=True)
+    text = text.str.replace(_COMPACT_DATE_PATTERN, r'\1-\2-\3', regex=True)
+    return pd.to_datetime(text, errors='coerce', **_MIXED_DATE_FORMAT)
@@ -3,27 +3,77 @@ Excel文件解析器
 Excel File Parser
 """
 
+import numpy as np
 import pandas as pd
-import openpyxl
-from openpyxl import load_workbook
 import logging
 from typing import Dict, List, Any, Optional, Tuple
+from collections import OrderedDict
 import os
+import copy
+import threading
 import json
-from datetime import datetime
+import hashlib
+from datetime import datetime, date
+
+from .excel_readers import WorkbookReader, DELIMITED_EXTENSIONS, read_preview
+from .columnar import frame_to_columns, series_to_array, to_series, ColumnChunks, is_columnar, row_count
+from .record_joiner import RecordJoiner
+from .rule_set import compile_rules
+from .scratch_store import ScratchStore
+from .data_validator import DataValidator
 
 logger = logging.getLogger(__name__)
 
+# 表头检测扫描的行数
+HEADER_SCAN_ROWS = 10
+
+# 预览结果缓存（GUI文件列表反复预览同一批文件）
+PREVIEW_CACHE_SIZE = 64
+_preview_cache = OrderedDict()
+_preview_cache_lock = threading.Lock()
+
 class ExcelParser:
     """Excel文件解析器"""
 
-    def __init__(self):
-        self.config_rules = {}
+    # 表头置信度低于该值的工作表不做结构化，只标记为低置信度
+    header_confidence_threshold = 0.4
+
+    def __init__(self, engine: Optional[str] = None, layout: str = 'records',
+                 memory_limit: Optional[int] = None, scratch_dir: Optional[str] = None):
+        """
+        Args:
+            engine: 指定读取引擎（calamine/openpyxl/pyxlsb/xlrd/csv），默认按文件类型自动选择
+            layout: 输出布局，'records' 为记录字典列表，'columns' 为 {列名: numpy数组} 的列式数据
+            memory_limit: 列式中间结果的驻留内存上限（字节），超出部分写入内存映射暂存文件，仅列式布局可用
+            scratch_dir: 暂存文件目录，默认使用系统临时目录
+        """
+        if layout not in ('records', 'columns'):
+            raise ValueError(f"不支持的输出布局: {layout}")
+        if memory_limit is not None and layout != 'columns':
+            raise ValueError("内存上限仅支持列式布局（layout='columns'）")
+        self.engine = engine
+        self.layout = layout
+        self.memory_limit = memory_limit
+        self.scratch_dir = scratch_dir
+        self._scratch = None
+        self._scratch_stores = []
+        self.validator = DataValidator()
+        self.rule_set = None
         self.load_default_rules()
 
+    @property
+    def config_rules(self):
+        """当前解析规则（只读，修改请使用 configure_rules/load_config）"""
+        return self.rule_set.rules
+
+    @property
+    def rules_version(self) -> str:
+        """当前规则集版本号，可作为下游缓存的键"""
+        return self.rule_set.version
+
     def load_default_rules(self):
-        """加载默认解析规则"""
-        self.config_rules = {
+        """加载默认解析规则（编译结果在所有解析器实例间共享）"""
+        self.rule_set = compile_rules({
             'vehicle_info': {
                 'sheet_patterns': ['车辆信息', '基本信息', 'Vehicle Info', '基本信息表'],
                 'field_mappings': {
@@ -37,6 +87,7 @@ class ExcelParser:
             'engine_info': {
                 'sheet_patterns': ['发动机信息', 'Engine Info', '发动机参数'],
                 'field_mappings': {
+                    'VIN': ['VIN码', '车辆识别码', 'VIN', '车架号'],
                     'engine_code': ['发动机型号', 'Engine Code', '发动机代码'],
                     'displacement': ['排量', 'Displacement', '排气量'],
                     'power': ['功率', 'Power', '额定功率'],
@@ -47,12 +98,13 @@ class ExcelParser:
             'emission_info': {
                 'sheet_patterns': ['排放信息', 'Emission Info', '排放参数'],
                 'field_mappings': {
+                    'VIN': ['VIN码', '车辆识别码', 'VIN', '车架号'],
                     'emission_standard': ['排放标准', 'Emission Standard', '环保标准'],
                     'co2_emission': ['CO2排放', 'CO2 Emission', '二氧化碳排放'],
                     'fuel_consumption': ['油耗', 'Fuel Consumption', '燃油消耗量']
                 }
             }
-        }
+        })
 
     def parse_file(self, file_path: str) -> Dict[str, Any]:
         """
@@ -70,38 +122,67 @@ class ExcelParser:
             # 获取文件基本信息
             file_info = self._get_file_info(file_path)
 
-            # 读取所有工作表
-            workbook = load_workbook(file_path, read_only=True)
-            sheet_names = workbook.sheetnames
+            # 打开工作簿，所有工作表共用同一个读取句柄
+            reader = WorkbookReader(file_path, self.engine)
+            sheet_names = reader.sheet_names
+            file_info['reader_engine'] = reader.engine
 
             parsed_data = {
                 'file_info': file_info,
                 'sheets': {},
-                'structured_data': {}
+                'structured_data': {},
+                'low_confidence_sheets': []
             }
 
+            # 设置内存上限时，列式中间结果超出上限后写入内存映射暂存文件
+            if self.memory_limit is not None:
+                self._scratch = ScratchStore(self.scratch_dir, self.memory_limit)
+                self._scratch_stores.append(self._scratch)
+
             # 解析每个工作表
             for sheet_name in sheet_names:
                 try:
-                    sheet_data = self._parse_sheet(file_path, sheet_name)
+                    sheet_data = self._parse_sheet(reader, sheet_name)
                     parsed_data['sheets'][sheet_name] = sheet_data
+                    if sheet_data.get('low_confidence'):
+                        parsed_data['low_confidence_sheets'].append(sheet_name)
 
                     # 尝试结构化数据
                     structured_data = self._structure_sheet_data(sheet_name, sheet_data)
-                    if structured_data:
-                        parsed_data['structured_data'].update(structured_data)
+                    self._merge_structured_data(parsed_data['structured_data'], structured_data)
 
                 except Exception as e:
                     logger.error(f"解析工作表 {sheet_name} 时出错: {e}")
                     continue
 
-            workbook.close()
+            reader.close()
+            self._finish_structured_data(parsed_data['structured_data'])
+            if self._scratch is not None:
+                file_info['scratch'] = self._scratch.statistics()
             logger.info(f"Excel文件解析完成: {file_path}")
             return parsed_data
 
         except Exception as e:
             logger.error(f"解析Excel文件失败 {file_path}: {e}")
             raise
+        finally:
+            self._scratch = None
+
+    def release_scratch(self):
+        """删除本解析器创建的暂存文件（之后不应再访问已解析的列式数据）"""
+        for store in self._scratch_stores:
+            store.close()
+        self._scratch_stores = []
+
+    def _to_columns(self, df: pd.DataFrame) -> Dict[str, np.ndarray]:
+        """转换为列式数据，超出内存上限时写入暂存区"""
+        return self._stash(frame_to_columns(df))
+
+    def _stash(self, columns: Dict[str, np.ndarray]) -> Dict[str, np.ndarray]:
+        """将列式数据交给暂存区（未设置内存上限时原样返回）"""
+        if self._scratch is None or not columns:
+            return columns
+        return self._scratch.store_columns(columns)
 
     def _get_file_info(self, file_path: str) -> Dict[str, Any]:
         """获取文件基本信息"""
@@ -111,35 +192,42 @@ class ExcelParser:
             'file_path': file_path,
             'file_size': stat.st_size,
             'modified_time': datetime.fromtimestamp(stat.st_mtime).isoformat(),
-            'file_type': 'excel'
+            'file_type': 'csv' if os.path.splitext(file_path)[1].lower() in DELIMITED_EXTENSIONS else 'excel'
         }
 
-    def _parse_sheet(self, file_path: str, sheet_name: str) -> Dict[str, Any]:
+    def _parse_sheet(self, reader: WorkbookReader, sheet_name: str) -> Dict[str, Any]:
         """解析单个工作表"""
         try:
-            # 使用pandas读取数据
-            df = pd.read_excel(file_path, sheet_name=sheet_name, header=None)
+            # 读取原始网格，表头在内存中切分，避免二次读取
+            df = reader.read_sheet(sheet_name)
 
             # 检测表头位置
-            header_row = self._detect_header_row(df)
+            header_info = self._detect_header(df)
+            confidence = header_info['confidence']
 
-            if header_row is not None:
-                # 重新读取，使用检测到的表头
-                df = pd.read_excel(file_path, sheet_name=sheet_name, header=header_row)
-                return {
-                    'type': 'structured',
-                    'data': df.to_dict('records'),
-                    'columns': df.columns.tolist(),
-                    'shape': df.shape
-                }
-            else:
-                # 无表头，作为原始数据
+            if confidence < self.header_confidence_threshold:
+                # 表头置信度过低，作为原始数据并标记，避免错误结构化
+                logger.warning(f"工作表 {sheet_name} 表头置信度较低: {confidence:.2f}")
                 return {
                     'type': 'raw',
-                    'data': df.values.tolist(),
-                    'shape': df.shape
+                    'data': self._to_columns(df) if self.layout == 'columns' else df.values.tolist(),
+                    'shape': df.shape,
+                    'header_confidence': confidence,
+                    'low_confidence': True
                 }
 
+            df = self._apply_header(df, header_info['header_row'], header_info['header_rows'])
+            return {
+                'type': 'structured',
+                'data': self._to_columns(df) if self.layout == 'columns' else df.to_dict('records'),
+                'columns': df.columns.tolist(),
+                'shape': df.shape,
+                'header_row': header_info['header_row'],
+                'header_rows': header_info['header_rows'],
+                'header_confidence': confidence,
+                'low_confidence': False
+            }
+
         except Exception as e:
             logger.error(f"解析工作表 {sheet_name} 失败: {e}")
             return {
@@ -147,71 +235,160 @@ class ExcelParser:
                 'error': str(e)
             }
 
-    def _detect_header_row(self, df: pd.DataFrame, max_check_rows: int = 10) -> Optional[int]:
-        """检测表头位置"""
-        for row_idx in range(min(max_check_rows, len(df))):
-            row = df.iloc[row_idx]
-            # 检查该行是否包含中文字符或常见的表头词汇
-            if self._is_likely_header(row):
-                return row_idx
-        return 0  # 默认第一行为表头
-
-    def _is_likely_header(self, row: pd.Series) -> bool:
-        """判断是否可能是表头行"""
-        header_keywords = [
-            'VIN', '码', '型号', '类型', '标准', '排量', '功率', '扭矩',
-            '日期', '年份', '品牌', '制造商', 'ID', 'Code', 'Name', 'Type'
-        ]
-
-        non_null_count = row.notna().sum()
-        if non_null_count < len(row) * 0.3:  # 非空值少于30%
-            return False
-
-        for value in row:
-            if pd.notna(value):
-                value_str = str(value)
-                if any(keyword in value_str for keyword in header_keywords):
-                    return True
-        return False
+    def _score_header_rows(self, df: pd.DataFrame, max_check_rows: int = HEADER_SCAN_ROWS) -> pd.DataFrame:
+        """
+        对前若干行进行表头打分（整块向量化计算）
+
+        Returns:
+            每行一条的DataFrame，包含 fill_ratio、text_ratio、keyword_ratio、score
+        """
+        head = df.head(max_check_rows)
+        n_rows, n_cols = head.shape
+        notna = head.notna().to_numpy()
+
+        # 展平后一次性做关键词匹配和数值判断
+        flat = pd.Series(head.to_numpy().ravel(), dtype=object)
+        flat_notna = notna.ravel()
+        text = flat.astype(str).where(flat_notna, '')
+        is_numeric = pd.to_numeric(flat, errors='coerce').notna().to_numpy()
+        is_text = flat_notna & ~is_numeric
+        hits = text.str.contains(self.rule_set.header_pattern, regex=True).to_numpy() & is_text
+
+        non_null = notna.sum(axis=1)
+        denominator = non_null.clip(min=1)
+        scores = pd.DataFrame({
+            'non_null': non_null,
+            'fill_ratio': non_null / max(n_cols, 1),
+            'text_ratio': is_text.reshape(n_rows, n_cols).sum(axis=1) / denominator,
+            'keyword_ratio': hits.reshape(n_rows, n_cols).sum(axis=1) / denominator
+        })
+        scores['score'] = (
+            0.5 * scores['keyword_ratio'] + 0.3 * scores['text_ratio'] + 0.2 * scores['fill_ratio']
+        )
+        # 非空值少于30%的行不可能是完整表头
+        scores.loc[scores['fill_ratio'] < 0.3, 'score'] = 0.0
+        return scores
+
+    def _detect_header(self, df: pd.DataFrame, max_check_rows: int = HEADER_SCAN_ROWS) -> Dict[str, Any]:
+        """
+        检测表头位置，支持两行合并表头
+
+        Returns:
+            {'header_row': 表头起始行, 'header_rows': 表头行数, 'confidence': 置信度(0~1)}
+        """
+        if df.empty:
+            return {'header_row': 0, 'header_rows': 1, 'confidence': 0.0}
+
+        scores = self._score_header_rows(df, max_check_rows)
+        best = int(scores['score'].to_numpy().argmax())
+        confidence = float(scores['score'].iloc[best])
+        header_row, header_rows = best, 1
+
+        # 上一行为合并单元格的分组表头（纯文本、至少两个分组且存在空位）
+        if best > 0:
+            above = scores.iloc[best - 1]
+            if above['non_null'] >= 2 and above['text_ratio'] == 1.0 and above['fill_ratio'] < 1.0:
+                header_row, header_rows = best - 1, 2
+        # 下一行同样是关键词表头，说明当前行为分组行
+        if header_rows == 1 and best + 1 < len(scores):
+            below = scores.iloc[best + 1]
+            if below['text_ratio'] == 1.0 and below['keyword_ratio'] >= 0.5:
+                header_rows = 2
+                confidence = max(confidence, float(below['score']))
+
+        return {'header_row': header_row, 'header_rows': header_rows, 'confidence': round(confidence, 4)}
+
+    def _apply_header(self, df: pd.DataFrame, header_row: int, header_rows: int = 1) -> pd.DataFrame:
+        """按检测结果设置列名并截取数据区"""
+        header = df.iloc[header_row:header_row + header_rows]
+        # 空工作表没有表头行
+        if header.empty:
+            return pd.DataFrame()
+        if header_rows > 1:
+            # 合并单元格只有左上角有值，分组行需要横向填充
+            groups = header.iloc[0].ffill()
+            labels = header.iloc[-1].where(header.iloc[-1].notna(), groups)
+        else:
+            labels = header.iloc[0]
+
+        columns = []
+        seen = {}
+        for i, label in enumerate(labels):
+            name = f"Unnamed: {i}" if pd.isna(label) else label
+            if isinstance(name, str):
+                name = name.strip()
+            # 与pandas一致的重名处理：A, A.1, A.2
+            if name in seen:
+                seen[name] += 1
+                name = f"{name}.{seen[name]}"
+            else:
+                seen[name] = 0
+            columns.append(name)
+
+        data = df.iloc[header_row + header_rows:].dropna(how='all').reset_index(drop=True)
+        data.columns = columns
+        return data.infer_objects()
 
     def _structure_sheet_data(self, sheet_name: str, sheet_data: Dict[str, Any]) -> Dict[str, Any]:
-        """结构化工作表数据"""
+        """结构化工作表数据（一个工作表可同时包含多种数据类型）"""
         if sheet_data['type'] != 'structured':
             return {}
 
         structured = {}
 
-        # 根据配置规则匹配数据类型
-        for data_type, config in self.config_rules.items():
-            if self._sheet_matches_type(sheet_name, config['sheet_patterns']):
-                structured_data = self._extract_structured_data(sheet_data, config)
+        # 根据配置规则匹配数据类型：工作表名匹配，或列名包含该类型的多个字段
+        rule_set = self.rule_set
+        columns = sheet_data.get('columns', [])
+        for data_type in rule_set.data_types:
+            if rule_set.sheet_matches(data_type, sheet_name) or rule_set.columns_match(data_type, columns):
+                structured_data = self._extract_structured_data(sheet_data, rule_set.column_fields(data_type, columns))
                 if structured_data:
                     structured[data_type] = structured_data
-                    break
 
         return structured
 
-    def _sheet_matches_type(self, sheet_name: str, patterns: List[str]) -> bool:
-        """检查工作表是否匹配特定类型"""
-        sheet_name_lower = sheet_name.lower()
-        return any(pattern.lower() in sheet_name_lower for pattern in patterns)
+    def _merge_structured_data(self, target: Dict[str, Any], structured: Dict[str, Any]):
+        """将一个工作表的结构化数据追加到文件结果中（同类型多表拼接，不覆盖）"""
+        for data_type, data in structured.items():
+            if is_columnar(data):
+                # 列式数据先按段累积，全部工作表解析完后每列只拼接一次
+                target.setdefault(data_type, ColumnChunks()).append(self._stash(data))
+            elif data_type not in target:
+                target[data_type] = data
+            else:
+                target[data_type].extend(data)
+
+    def _finish_structured_data(self, target: Dict[str, Any]):
+        """拼接累积的列式数据段"""
+        for data_type, data in target.items():
+            if isinstance(data, ColumnChunks):
+                target[data_type] = data.concat() if self._scratch is None else data.concat(self._scratch.concat)
 
-    def _extract_structured_data(self, sheet_data: Dict[str, Any], config: Dict[str, Any]) -> List[Dict[str, Any]]:
-        """根据配置提取结构化数据"""
+    def _extract_structured_data(self, sheet_data: Dict[str, Any],
+                                 field_columns: Dict[str, List[Any]]) -> List[Dict[str, Any]]:
+        """
+        根据配置提取结构化数据
+
+        Args:
+            sheet_data: 工作表数据
+            field_columns: 规则集预先匹配的 {字段: [工作表中存在的别名列]}
+        """
         data = sheet_data['data']
-        if not data:
+        if not data or not field_columns:
             return []
 
-        field_mappings = config['field_mappings']
+        if self.layout == 'columns':
+            return self._extract_structured_columns(data, field_columns)
+
         structured_records = []
 
         for record in data:
             structured_record = {}
 
-            for target_field, source_fields in field_mappings.items():
+            for target_field, source_fields in field_columns.items():
                 value = None
                 for source_field in source_fields:
-                    if source_field in record and pd.notna(record[source_field]):
+                    if pd.notna(record[source_field]):
                         value = record[source_field]
                         break
 
@@ -223,16 +400,69 @@ class ExcelParser:
 
         return structured_records
 
+    def _extract_structured_columns(self, data: Dict[str, Any], field_columns: Dict[str, List[Any]]) -> Dict[str, Any]:
+        """按列提取结构化数据（别名列按优先级合并，整列计算）"""
+        fields = {}
+        for target_field, source_fields in field_columns.items():
+            merged = None
+            for source_field in source_fields:
+                column = to_series(data[source_field])
+                merged = column if merged is None else merged.combine_first(column)
+            fields[target_field] = merged
+
+        # 只保留非空记录
+        frame = pd.DataFrame(fields).dropna(how='all')
+        if frame.empty:
+            return {}
+        return {name: series_to_array(frame[name]) for name in frame.columns}
+
+    @staticmethod
+    def group_records_by_vin(structured_data: Dict[str, Any]) -> Dict[str, Dict[str, Dict[str, Any]]]:
+        """
+        按VIN归并各数据类型的记录
+
+        Returns:
+            {VIN: {数据类型: 记录}}，没有VIN的记录不参与归并
+        """
+        return RecordJoiner().add(structured_data).join()['records']
+
+    @staticmethod
+    def fingerprint_record(records: Dict[str, Dict[str, Any]]) -> str:
+        """计算一辆车全部记录的内容指纹（与字段顺序、数值类型表示无关）"""
+        def normalize(value):
+            if isinstance(value, np.generic):
+                value = value.item()
+            if isinstance(value, (datetime, date)):
+                return value.isoformat()
+            if isinstance(value, float):
+                # 同一列出现小数后整列变为float，2 与 2.0 视为同一值
+                if value != value:
+                    return None
+                return int(value) if value.is_integer() else repr(value)
+            return value
+
+        canonical = {
+            data_type: {key: normalize(value) for key, value in record.items()}
+            for data_type, record in records.items()
+        }
+        payload = json.dumps(canonical, sort_keys=True, ensure_ascii=False, default=str)
+        return hashlib.sha1(payload.encode('utf-8')).hexdigest()
+
+    def compute_row_fingerprints(self, parsed_data: Dict[str, Any]) -> Dict[str, str]:
+        """计算每个VIN的行指纹，用于与上次导入结果比对"""
+        grouped = self.group_records_by_vin(parsed_data.get('structured_data', {}))
+        return {vin: self.fingerprint_record(records) for vin, records in grouped.items()}
+
     def configure_rules(self, rules_config: Dict[str, Any]):
         """配置解析规则"""
-        self.config_rules.update(rules_config)
-        logger.info("解析规则已更新")
+        self.rule_set = self.rule_set.merged(rules_config)
+        logger.info(f"解析规则已更新，版本: {self.rule_set.version}")
 
     def save_config(self, config_path: str):
         """保存配置到文件"""
         try:
             with open(config_path, 'w', encoding='utf-8') as f:
-                json.dump(self.config_rules, f, ensure_ascii=False, indent=2)
+                json.dump(self.rule_set.to_dict(), f, ensure_ascii=False, indent=2)
             logger.info(f"配置已保存到: {config_path}")
         except Exception as e:
             logger.error(f"保存配置失败: {e}")
@@ -241,36 +471,57 @@ class ExcelParser:
         """从文件加载配置"""
         try:
             with open(config_path, 'r', encoding='utf-8') as f:
-                self.config_rules.update(json.load(f))
+                self.rule_set = self.rule_set.merged(json.load(f))
             logger.info(f"配置已从文件加载: {config_path}")
         except Exception as e:
             logger.error(f"加载配置失败: {e}")
 
-    def preview_file(self, file_path: str, max_rows: int = 10) -> Dict[str, Any]:
-        """预览Excel文件内容"""
+    def preview_file(self, file_path: str, max_rows: int = 10, max_sheets: int = 3) -> Dict[str, Any]:
+        """
+        预览Excel文件内容
+
+        只读取每个工作表的前若干行，结果按文件路径、修改时间和大小缓存，
+        文件未变化时重复预览直接返回缓存。
+        """
         try:
-            workbook = load_workbook(file_path, read_only=True)
-            sheet_names = workbook.sheetnames
+            stat = os.stat(file_path)
+            cache_key = (os.path.abspath(file_path), stat.st_mtime_ns, stat.st_size,
+                         max_rows, max_sheets, self.engine, self.rule_set.version)
+            with _preview_cache_lock:
+                if cache_key in _preview_cache:
+                    _preview_cache.move_to_end(cache_key)
+                    return copy.deepcopy(_preview_cache[cache_key])
+
+            # 多读表头检测窗口的行数，保证标题行之后仍有 max_rows 行数据
+            preview = read_preview(file_path, max_rows + HEADER_SCAN_ROWS, max_sheets, self.engine)
 
             preview_data = {
                 'file_info': self._get_file_info(file_path),
+                'sheet_names': preview['sheet_names'],
                 'sheets': {}
             }
 
-            for sheet_name in sheet_names[:3]:  # 只预览前3个工作表
+            for sheet_name, sheet in preview['sheets'].items():
                 try:
-                    df = pd.read_excel(file_path, sheet_name=sheet_name, nrows=max_rows)
+                    grid = sheet['grid']
+                    header = self._detect_header(grid, HEADER_SCAN_ROWS)
+                    df = self._apply_header(grid, header['header_row'], header['header_rows']).head(max_rows)
                     preview_data['sheets'][sheet_name] = {
                         'columns': df.columns.tolist(),
-                        'data': df.head(max_rows).fillna('').to_dict('records'),
-                        'shape': df.shape
+                        'data': df.astype(object).where(df.notna(), '').to_dict('records'),
+                        'shape': df.shape,
+                        'dimensions': sheet['dimensions'],
+                        'header_confidence': header['confidence']
                     }
                 except Exception as e:
                     preview_data['sheets'][sheet_name] = {
                         'error': str(e)
                     }
 
-            workbook.close()
+            with _preview_cache_lock:
+                _preview_cache[cache_key] = copy.deepcopy(preview_data)
+                while len(_preview_cache) > PREVIEW_CACHE_SIZE:
+                    _preview_cache.popitem(last=False)
             return preview_data
 
         except Exception as e:
@@ -287,22 +538,25 @@ class ExcelParser:
         }
 
         try:
+            structured_data = parsed_data.get('structured_data', {})
+
             # 基本验证
-            if not parsed_data.get('structured_data'):
+            if not structured_data:
                 validation_result['warnings'].append("未找到结构化数据")
 
-            # VIN码验证
-            vehicle_data = parsed_data.get('structured_data', {}).get('vehicle_info', [])
-            for record in vehicle_data:
-                vin = record.get('VIN', '')
-                if vin and len(vin) != 17:
-                    validation_result['errors'].append(f"VIN码长度不正确: {vin}")
+            # 按列执行VIN、数值范围、日期和重复检查
+            rule_result = self.validator.validate(structured_data)
+            validation_result['errors'].extend(rule_result['errors'])
+            validation_result['warnings'].extend(rule_result['warnings'])
+            validation_result['row_masks'] = rule_result['row_masks']
+            validation_result['invalid_rows'] = rule_result['invalid_rows']
 
             # 统计信息
             validation_result['statistics'] = {
                 'total_sheets': len(parsed_data.get('sheets', {})),
-                'structured_types': list(parsed_data.get('structured_data', {}).keys()),
-                'total_records': sum(len(data) for data in parsed_data.get('structured_data', {}).values())
+                'structured_types': list(structured_data.keys()),
+                'total_records': sum(row_count(data) for data in structured_data.values()),
+                'invalid_records': sum(stats['invalid_rows'] for stats in rule_result['statistics'].values())
             }
 
             if validation_result['errors']:
@@ -312,4 +566,4 @@ class ExcelParser:
             validation_result['is_valid'] = False
             validation_result['errors'].append(f"验证过程出错: {e}")
 
-        return validation_result
\ No newline at end of file
+        return validation_result
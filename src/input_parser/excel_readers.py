@@ -0,0 +1,233 @@
+"""
+Excel读取后端
+Excel Reader Backends
+
+按文件类型自动选择最快的可用读取引擎：
+- .xlsx/.xlsm/.xlsb/.xls 优先使用 calamine（Rust实现，速度远快于openpyxl）
+- 未安装calamine时分别回退到 openpyxl / pyxlsb / xlrd
+- .csv/.tsv 导出文件按同样的布局读取，并转换为与Excel一致的单元格类型
+"""
+
+import logging
+import re
+from pathlib import Path
+from typing import Dict, List, Any, Optional
+
+import pandas as pd
+
+logger = logging.getLogger(__name__)
+
+# pandas 2.2 起才支持 engine='calamine'
+CALAMINE_MIN_PANDAS = (2, 2)
+
+# 检测可选的读取引擎
+try:
+    import python_calamine  # noqa: F401
+    CALAMINE_AVAILABLE = tuple(int(part) for part in pd.__version__.split('.')[:2]) >= CALAMINE_MIN_PANDAS
+except ImportError:
+    CALAMINE_AVAILABLE = False
+
+try:
+    import pyxlsb  # noqa: F401
+    PYXLSB_AVAILABLE = True
+except ImportError:
+    PYXLSB_AVAILABLE = False
+
+try:
+    import xlrd  # noqa: F401
+    XLRD_AVAILABLE = True
+except ImportError:
+    XLRD_AVAILABLE = False
+
+# 各扩展名在没有calamine时的回退引擎
+FALLBACK_ENGINES = {
+    '.xlsx': 'openpyxl',
+    '.xlsm': 'openpyxl',
+    '.xlsb': 'pyxlsb',
+    '.xls': 'xlrd'
+}
+
+# 预览时可以流式读取前N行的格式（openpyxl只读模式按需解压工作表XML）
+STREAMING_PREVIEW_EXTENSIONS = {'.xlsx', '.xlsm'}
+
+# 文本导出格式及分隔符
+DELIMITED_EXTENSIONS = {
+    '.csv': ',',
+    '.tsv': '\t',
+    '.tab': '\t'
+}
+
+SUPPORTED_EXTENSIONS = list(FALLBACK_ENGINES) + list(DELIMITED_EXTENSIONS)
+
+# 文本导出常见编码（国内供应商导出多为GBK）
+CSV_ENCODINGS = ['utf-8-sig', 'gbk']
+
+_ISO_DATE_RE = re.compile(r'^\d{4}-\d{1,2}-\d{1,2}([ T]\d{1,2}:\d{2}(:\d{2})?)?$')
+_LEADING_ZERO_RE = re.compile(r'^[+-]?0\d')
+
+def available_engines() -> List[str]:
+    """获取当前环境可用的读取引擎"""
+    engines = ['openpyxl', 'csv']
+    if CALAMINE_AVAILABLE:
+        engines.append('calamine')
+    if PYXLSB_AVAILABLE:
+        engines.append('pyxlsb')
+    if XLRD_AVAILABLE:
+        engines.append('xlrd')
+    return engines
+
+def select_engine(file_path: str) -> str:
+    """根据文件类型选择读取引擎"""
+    suffix = Path(file_path).suffix.lower()
+
+    if suffix in DELIMITED_EXTENSIONS:
+        return 'csv'
+    if suffix not in FALLBACK_ENGINES:
+        raise ValueError(f"不支持的文件类型: {suffix}")
+    if CALAMINE_AVAILABLE:
+        return 'calamine'
+
+    engine = FALLBACK_ENGINES[suffix]
+    if engine == 'pyxlsb' and not PYXLSB_AVAILABLE:
+        raise ImportError("读取.xlsb文件需要安装 python-calamine 或 pyxlsb")
+    if engine == 'xlrd' and not XLRD_AVAILABLE:
+        raise ImportError("读取.xls文件需要安装 python-calamine 或 xlrd")
+    return engine
+
+class WorkbookReader:
+    """
+    工作簿读取器
+
+    整个解析过程只打开一次文件，所有工作表都从同一个句柄读取，
+    返回的DataFrame均为 header=None 的原始单元格网格。
+    """
+
+    def __init__(self, file_path: str, engine: Optional[str] = None):
+        self.file_path = file_path
+        self.engine = engine or select_engine(file_path)
+        self._excel_file = None
+        self._delimited_frame = None
+
+        if self.engine == 'csv':
+            self.sheet_names = [Path(file_path).stem]
+        else:
+            self._excel_file = pd.ExcelFile(file_path, engine=self.engine)
+            self.sheet_names = list(self._excel_file.sheet_names)
+
+    def read_sheet(self, sheet_name: str, nrows: Optional[int] = None) -> pd.DataFrame:
+        """读取工作表的原始网格"""
+        if self.engine == 'csv':
+            if sheet_name not in self.sheet_names:
+                raise ValueError(f"工作表不存在: {sheet_name}")
+            if nrows is not None:
+                return self._read_delimited(nrows)
+            if self._delimited_frame is None:
+                self._delimited_frame = self._read_delimited()
+            return self._delimited_frame
+
+        return self._excel_file.parse(sheet_name, header=None, nrows=nrows)
+
+    def _read_delimited(self, nrows: Optional[int] = None) -> pd.DataFrame:
+        """读取CSV/TSV并转换单元格类型"""
+        sep = DELIMITED_EXTENSIONS[Path(self.file_path).suffix.lower()]
+        last_error = None
+        for encoding in CSV_ENCODINGS:
+            try:
+                df = pd.read_csv(self.file_path, sep=sep, header=None, dtype=str,
+                                 nrows=nrows, encoding=encoding, skip_blank_lines=False)
+                break
+            except UnicodeDecodeError as e:
+                last_error = e
+        else:
+            raise last_error
+
+        return df.apply(_coerce_text_column).astype(object)
+
+    def close(self):
+        """关闭工作簿"""
+        if self._excel_file is not None:
+            self._excel_file.close()
+            self._excel_file = None
+        self._delimited_frame = None
+
+    def __enter__(self):
+        return self
+
+    def __exit__(self, exc_type, exc_val, exc_tb):
+        self.close()
+
+def _coerce_text_column(column: pd.Series) -> pd.Series:
+    """
+    将文本列中的数字、日期转换为与Excel单元格一致的类型
+
+    整数保持为int，带前导零的编码（如 '0123'）保持为文本。
+    """
+    text = column.str.strip()
+    values = column.to_numpy(dtype=object).copy()
+
+    numbers = pd.to_numeric(text, errors='coerce')
+    is_number = numbers.notna() & ~text.str.match(_LEADING_ZERO_RE).fillna(False)
+    if is_number.any():
+        is_int = is_number & (numbers % 1 == 0)
+        mask = is_int.to_numpy()
+        values[mask] = numbers[is_int].astype('int64').tolist()
+        mask = (is_number & ~is_int).to_numpy()
+        values[mask] = numbers[is_number & ~is_int].tolist()
+
+    is_date = (text.str.match(_ISO_DATE_RE).fillna(False) & ~is_number).to_numpy()
+    if is_date.any():
+        dates = pd.to_datetime(text[is_date], errors='coerce')
+        values[is_date] = [d if pd.notna(d) else v for d, v in zip(dates, values[is_date])]
+
+    return pd.Series(values, index=column.index, dtype=object)
+
+def read_sheets(file_path: str, engine: Optional[str] = None) -> Dict[str, Any]:
+    """一次性读取所有工作表的原始网格（便于对比不同引擎的结果）"""
+    with WorkbookReader(file_path, engine) as reader:
+        return {name: reader.read_sheet(name) for name in reader.sheet_names}
+
+def read_preview(file_path: str, max_rows: int, max_sheets: Optional[int] = None,
+                 engine: Optional[str] = None) -> Dict[str, Any]:
+    """
+    有界读取工作簿预览
+
+    只打开一次文件，每个工作表只读取前 max_rows 行；工作表尺寸取自工作簿元数据
+    （.xlsx 的 dimension 标记），不扫描全表，无法获知时为 None。
+
+    Returns:
+        {'sheet_names': 全部工作表名, 'sheets': {工作表名: {'grid': 原始网格, 'dimensions': (行, 列)或None}}}
+    """
+    suffix = Path(file_path).suffix.lower()
+    if engine is None and suffix in STREAMING_PREVIEW_EXTENSIONS:
+        return _read_streaming_preview(file_path, max_rows, max_sheets)
+
+    preview = {'sheet_names': [], 'sheets': {}}
+    with WorkbookReader(file_path, engine) as reader:
+        preview['sheet_names'] = list(reader.sheet_names)
+        for sheet_name in reader.sheet_names[:max_sheets]:
+            preview['sheets'][sheet_name] = {
+                'grid': reader.read_sheet(sheet_name, nrows=max_rows),
+                'dimensions': None
+            }
+    return preview
+
+def _read_streaming_preview(file_path: str, max_rows: int, max_sheets: Optional[int]) -> Dict[str, Any]:
+    """openpyxl只读模式流式读取前N行"""
+    from openpyxl import load_workbook
+
+    workbook = load_workbook(file_path, read_only=True, data_only=True, keep_links=False)
+    try:
+        preview = {'sheet_names': list(workbook.sheetnames), 'sheets': {}}
+        for sheet_name in workbook.sheetnames[:max_sheets]:
+            worksheet = workbook[sheet_name]
+            rows = list(worksheet.iter_rows(max_row=max_rows, values_only=True))
+            dimensions = None
+            if worksheet.max_row and worksheet.max_column:
+                dimensions = (worksheet.max_row, worksheet.max_column)
+            preview['sheets'][sheet_name] = {
+                'grid': pd.DataFrame(rows),
+                'dimensions': dimensions
+            }
+        return preview
+    finally:
+        workbook.close()
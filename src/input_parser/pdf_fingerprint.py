@@ -0,0 +1,87 @@
+"""
+PDF文档指纹
+PDF Document Fingerprint
+
+解析前计算文档指纹，用于跳过重复文档：
+- 内容哈希：各页内容流和图像数据的SHA1，文件名、元数据不同但内容相同的文件哈希相同
+- 文本SimHash：前几页文本的64位SimHash，汉明距离很小的文档视为近似重复（如重新签发、改了个别字段）
+"""
+
+import hashlib
+from typing import Dict, Any, Iterable
+
+import numpy as np
+
+# 参与SimHash的页数（近似重复判断只看文档开头）
+SIMHASH_PAGES = 5
+
+# SimHash分片长度（字符）
+SHINGLE_SIZE = 3
+
+# 汉明距离不超过该值视为近似重复
+NEAR_DUPLICATE_DISTANCE = 3
+
+def text_simhash(text: str) -> str:
+    """计算文本的64位SimHash（16位十六进制），忽略空白字符"""
+    normalized = ''.join(text.split())
+    if not normalized:
+        return '0' * 16
+
+    shingles = {normalized[i:i + SHINGLE_SIZE] for i in range(max(1, len(normalized) - SHINGLE_SIZE + 1))}
+    hashes = np.frombuffer(
+        b''.join(hashlib.blake2b(shingle.encode('utf-8'), digest_size=8).digest() for shingle in shingles),
+        dtype='>u8'
+    )
+    # 每个分片的64位按位投票，多数为1的位置1
+    bits = np.unpackbits(hashes.view(np.uint8).reshape(-1, 8), axis=1)
+    votes = bits.sum(axis=0, dtype=np.int64) * 2 > len(hashes)
+    return np.packbits(votes).tobytes().hex()
+
+def hamming_distance(first: str, second: str) -> int:
+    """两个SimHash的汉明距离"""
+    return bin(int(first, 16) ^ int(second, 16)).count('1')
+
+def compute_fingerprint(reader) -> Dict[str, Any]:
+    """
+    计算文档指纹
+
+    Args:
+        reader: 已打开的 PDFReader
+
+    Returns:
+        {'content_hash': SHA1, 'text_simhash': SimHash, 'page_count': 页数}
+    """
+    pages = min(SIMHASH_PAGES, reader.page_count)
+    text = '\n'.join(reader.page_text(index) for index in range(pages))
+    return {
+        'content_hash': reader.content_hash(),
+        'text_simhash': text_simhash(text),
+        'page_count': reader.page_count
+    }
+
+def find_duplicate(fingerprint: Dict[str, Any], known_documents: Iterable[Dict[str, Any]],
+                   max_distance: int = NEAR_DUPLICATE_DISTANCE) -> Dict[str, Any]:
+    """
+    在已知文档中查找重复
+
+    Args:
+        fingerprint: compute_fingerprint 的结果
+        known_documents: 已知文档指纹，每项至少包含 content_hash、text_simhash
+        max_distance: 近似重复的最大汉明距离
+
+    Returns:
+        {'status': 'new'/'duplicate'/'near_duplicate', 'match': 匹配的已知文档, 'distance': 汉明距离}
+    """
+    best, best_distance = None, None
+    for document in known_documents:
+        if document.get('content_hash') == fingerprint['content_hash']:
+            return {'status': 'duplicate', 'match': document, 'distance': 0}
+        if not document.get('text_simhash') or fingerprint['text_simhash'] == '0' * 16:
+            continue
+        distance = hamming_distance(fingerprint['text_simhash'], document['text_simhash'])
+        if distance <= max_distance and (best_distance is None or distance < best_distance):
+            best, best_distance = document, distance
+
+    if best is not None:
+        return {'status': 'near_duplicate', 'match': best, 'distance': best_distance}
+    return {'status': 'new', 'match': None, 'distance': None}
@@ -0,0 +1,191 @@
+"""
+扫描件OCR
+Scanned PDF OCR
+
+没有文本层的页面（扫描件）按指定DPI栅格化后交给 Tesseract 识别：
+- 识别在有界进程池中批量并行执行，进程池在引擎首次需要时创建，之后各批次、各文件复用
+- 结果按页面图像哈希缓存到磁盘，重复处理同一批扫描件时跳过已识别的页面
+"""
+
+import os
+import weakref
+import hashlib
+import logging
+import functools
+from concurrent.futures import ProcessPoolExecutor
+from concurrent.futures.process import BrokenProcessPool
+from pathlib import Path
+from typing import Dict, List, Any, Optional
+
+logger = logging.getLogger(__name__)
+
+try:
+    import pytesseract
+    from PIL import Image
+    PYTESSERACT_AVAILABLE = True
+except ImportError:
+    PYTESSERACT_AVAILABLE = False
+
+# 默认栅格化分辨率（Tesseract 对 300 DPI 左右的图像识别效果最好）
+DEFAULT_OCR_DPI = 300
+
+# 默认识别语言（简体中文 + 英文）
+DEFAULT_OCR_LANG = 'chi_sim+eng'
+
+# 非空白字符少于该数量的页面视为没有文本层
+MIN_TEXT_CHARS = 10
+
+# 默认缓存目录
+DEFAULT_CACHE_DIR = Path(__file__).parent.parent.parent / 'data' / 'ocr_cache'
+
+@functools.lru_cache(maxsize=None)
+def tesseract_available() -> bool:
+    """检查 pytesseract 及 tesseract 可执行文件是否可用"""
+    if not PYTESSERACT_AVAILABLE:
+        return False
+    try:
+        pytesseract.get_tesseract_version()
+        return True
+    except Exception:
+        return False
+
+def needs_ocr(page: Dict[str, Any]) -> bool:
+    """页面是否缺少文本层"""
+    text = page.get('text') or ''
+    return sum(1 for char in text if not char.isspace()) < MIN_TEXT_CHARS
+
+class OCRCache:
+    """按图像哈希缓存识别结果"""
+
+    def __init__(self, directory: Optional[str] = None):
+        self.directory = Path(directory) if directory else DEFAULT_CACHE_DIR
+
+    def _path(self, key: str) -> Path:
+        return self.directory / key[:2] / f"{key}.txt"
+
+    def get(self, key: str) -> Optional[str]:
+        """读取缓存，不存在返回None"""
+        try:
+            return self._path(key).read_text(encoding='utf-8')
+        except OSError:
+            return None
+
+    def put(self, key: str, text: str):
+        """写入缓存（先写临时文件再替换，避免并发读到半个文件）"""
+        path = self._path(key)
+        try:
+            path.parent.mkdir(parents=True, exist_ok=True)
+            temp_path = path.with_suffix(f".{os.getpid()}.tmp")
+            temp_path.write_text(text, encoding='utf-8')
+            os.replace(temp_path, path)
+        except OSError as e:
+            logger.warning(f"写入OCR缓存失败: {e}")
+
+class OCREngine:
+    """扫描页OCR引擎"""
+
+    def __init__(self, dpi: int = DEFAULT_OCR_DPI, lang: str = DEFAULT_OCR_LANG,
+                 max_workers: Optional[int] = None, cache_dir: Optional[str] = None):
+        """
+        Args:
+            dpi: 栅格化分辨率
+            lang: Tesseract 识别语言
+            max_workers: 识别进程数上限，默认CPU核数
+            cache_dir: 识别结果缓存目录
+        """
+        self.dpi = dpi
+        self.lang = lang
+        self.max_workers = max_workers or os.cpu_count() or 1
+        self.cache = OCRCache(cache_dir)
+        self._executor = None
+        self._finalizer = None
+
+    def _get_executor(self) -> ProcessPoolExecutor:
+        """识别进程池（首次使用时创建，之后复用，避免每批重新启动进程）"""
+        if self._executor is None:
+            self._executor = ProcessPoolExecutor(max_workers=self.max_workers)
+            self._finalizer = weakref.finalize(self, self._executor.shutdown, wait=False)
+        return self._executor
+
+    def close(self):
+        """关闭识别进程池（之后再识别时重新创建）"""
+        if self._finalizer is not None:
+            self._finalizer.detach()
+            self._executor.shutdown()
+        self._executor = None
+        self._finalizer = None
+
+    @property
+    def available(self) -> bool:
+        """OCR是否可用"""
+        return tesseract_available()
+
+    @property
+    def batch_size(self) -> int:
+        """每批识别的页数，限制同时驻留内存的页面图像数量"""
+        return self.max_workers * 2
+
+    def image_key(self, image: 'Image.Image') -> str:
+        """图像哈希（包含识别语言，语言不同的结果分别缓存）"""
+        digest = hashlib.sha1()
+        digest.update(f"{self.lang}|{image.mode}|{image.size}".encode('utf-8'))
+        digest.update(image.tobytes())
+        return digest.hexdigest()
+
+    def process_pages(self, reader, pages: List[Dict[str, Any]]) -> List[Dict[str, Any]]:
+        """
+        识别一批页面中没有文本层的页面
+
+        Args:
+            reader: 已打开的 PDFReader，用于栅格化
+            pages: 按页序排列的页面内容，识别结果写回 text/body_text 并标记 ocr
+        """
+        targets = [page for page in pages if needs_ocr(page)]
+        if not targets:
+            return pages
+
+        images = [reader.rasterize(page['page_number'] - 1, self.dpi).convert('L') for page in targets]
+        for page, text in zip(targets, self.recognize(images)):
+            if text is None:
+                continue
+            page['text'] = text
+            page['body_text'] = text
+            page['ocr'] = True
+        return pages
+
+    def recognize(self, images: List['Image.Image']) -> List[Optional[str]]:
+        """识别一批图像（命中缓存的跳过），识别失败的位置为None"""
+        keys = [self.image_key(image) for image in images]
+        results = [self.cache.get(key) for key in keys]
+        pending = [i for i, text in enumerate(results) if text is None]
+        if not pending:
+            return results
+
+        jobs = [(images[i].mode, images[i].size, images[i].tobytes(), self.lang) for i in pending]
+        try:
+            if self.max_workers <= 1 or len(jobs) <= 1:
+                texts = [_recognize_image(*job) for job in jobs]
+            else:
+                texts = list(self._get_executor().map(_recognize_image, *zip(*jobs)))
+        except Exception as e:
+            logger.error(f"OCR识别失败: {e}")
+            if isinstance(e, BrokenProcessPool):
+                # 工作进程异常退出后进程池不可再用，下次识别时重新创建
+                self.close()
+            return results
+
+        for i, text in zip(pending, texts):
+            results[i] = text
+            if text is not None:
+                self.cache.put(keys[i], text)
+        logger.info(f"OCR识别 {len(pending)} 页，缓存命中 {len(images) - len(pending)} 页")
+        return results
+
+def _recognize_image(mode: str, size: tuple, data: bytes, lang: str) -> Optional[str]:
+    """工作进程：识别单页图像，失败返回None（部分 pytesseract 异常无法传回主进程，会导致进程池失效）"""
+    try:
+        image = Image.frombytes(mode, size, data)
+        return pytesseract.image_to_string(image, lang=lang)
+    except Exception as e:
+        logger.error(f"OCR识别单页失败: {e}")
+        return None
@@ -1,24 +1,87 @@
 """
 PDF文件解析器
 PDF File Parser
+
+逐页读取PDF，从两类版面中提取结构化数据，输出与 ExcelParser 相同的 structured_data：
+- 正文中的键值对，如 "VIN码：LVSHFAEM1EF123456  品牌：奥迪"
+- 表格：首行为字段别名的多列表格按行生成记录；两列表格按 "键 | 值" 处理
+
+页数较多时可按页段分配到多个工作进程提取，结果按页序合并，与单进程一致。
+open_document 返回惰性文档，只解析实际访问到的页面，适合预览和文档分类。
+没有文本层的扫描页在安装了 Tesseract 时自动OCR识别。
+传入已知文档指纹时先做重复检测，完全重复的文档不再解析。
+第一页命中已注册的版面模板时只裁剪模板区域取值，不做整页分析。
 """
 
+import os
+import re
 import logging
-from typing import Dict, List, Any, Optional
-from pathlib import Path
+import itertools
+import threading
+from collections import deque
+from collections.abc import Mapping, Sequence
+from concurrent.futures import ProcessPoolExecutor
+from datetime import datetime
+from typing import Dict, List, Any, Optional, Iterator
+
+from .pdf_readers import PDFReader
+from .pdf_ocr import OCREngine, needs_ocr, DEFAULT_OCR_DPI, DEFAULT_OCR_LANG
+from .pdf_fingerprint import compute_fingerprint, find_duplicate
+from .pdf_templates import TemplateRegistry, LayoutTemplate
+from .rule_set import compile_rules, KEY_FIELDS
 
 logger = logging.getLogger(__name__)
 
+# 少于该页数的文档不启用多进程（进程启动开销大于收益）
+PARALLEL_MIN_PAGES = 16
+
+# 每个工作进程平均分到的页段数，页段越小负载越均衡
+CHUNKS_PER_WORKER = 4
+
+# 每个工作进程同时提交的页段数上限（限制已提取但尚未按页序产出的页面数量）
+MAX_INFLIGHT_CHUNKS_PER_WORKER = 2
+
+# 区域文本开头的字段标签
+_LABEL_PREFIX_RE = re.compile(r'^[^\s\d:：][^\s:：]*\s*[:：]\s*')
+
+# 值之后出现的其他 "标签：" 视为该值结束（标签不以数字开头，避免截断 "12:30" 这类时间）
+_NEXT_LABEL_RE = re.compile(r'\s+(?=[^\s\d][^\s:：]*[:：])')
+
 class PDFParser:
     """PDF文件解析器"""
 
-    def __init__(self):
-        self.config_rules = {}
+    def __init__(self, engine: Optional[str] = None, max_workers: Optional[int] = 1,
+                 ocr: bool = True, ocr_dpi: int = DEFAULT_OCR_DPI, ocr_lang: str = DEFAULT_OCR_LANG,
+                 ocr_workers: Optional[int] = None, ocr_cache_dir: Optional[str] = None,
+                 templates: Optional[TemplateRegistry] = None):
+        """
+        Args:
+            engine: 指定读取引擎（pdfplumber/pypdf2），默认自动选择
+            max_workers: 页面提取的工作进程数，1 为单进程，None 为CPU核数
+            ocr: 是否对没有文本层的页面进行OCR
+            ocr_dpi: OCR栅格化分辨率
+            ocr_lang: Tesseract 识别语言
+            ocr_workers: OCR进程数上限，默认CPU核数
+            ocr_cache_dir: OCR结果缓存目录
+            templates: 版面模板注册表，默认为空（不做模板匹配）
+        """
+        self.engine = engine
+        self.max_workers = max_workers or os.cpu_count() or 1
+        self.ocr_engine = OCREngine(ocr_dpi, ocr_lang, ocr_workers, ocr_cache_dir) if ocr else None
+        self._ocr_warned = False
+        self.templates = templates if templates is not None else TemplateRegistry()
+        self.rule_set = None
+        self._label_patterns = {}
         self.load_default_rules()
 
+    @property
+    def config_rules(self):
+        """当前解析规则（只读，修改请使用 configure_rules）"""
+        return self.rule_set.rules
+
     def load_default_rules(self):
         """加载默认解析规则"""
-        self.config_rules = {
+        self._set_rule_set(compile_rules({
             'vehicle_info': {
                 'patterns': ['VIN码', '车辆识别码', '品牌', '车型'],
                 'field_mappings': {
@@ -27,37 +90,478 @@ class PDFParser:
                     'model': ['车型', '型号', 'Model', '车辆型号']
                 }
             }
-        }
+        }))
+
+    def configure_rules(self, rules_config: Dict[str, Any]):
+        """配置解析规则"""
+        self._set_rule_set(self.rule_set.merged(rules_config))
+        logger.info("PDF解析规则已更新")
+
+    def load_templates(self, config_path: str) -> bool:
+        """加载版面模板配置文件"""
+        return self.templates.load(config_path)
+
+    def _set_rule_set(self, rule_set):
+        """切换规则集并编译键值对标签正则"""
+        self.rule_set = rule_set
+        self._label_patterns = {}
+        for data_type in rule_set.data_types:
+            aliases = sorted(rule_set.alias_fields(data_type), key=lambda alias: (-len(alias), alias))
+            if aliases:
+                # 标签前不能紧跟文字（避免 "发动机型号" 命中 "型号"），后跟半角或全角冒号
+                self._label_patterns[data_type] = re.compile(
+                    r'(?<!\w)(' + '|'.join(re.escape(alias) for alias in aliases) + r')\s*[:：]'
+                )
+
+    def classify_file(self, file_path: str) -> Optional[LayoutTemplate]:
+        """按第一页特征识别文档的版面模板"""
+        with PDFReader(file_path, self.engine) as reader:
+            return self._classify(reader)[0]
+
+    def _classify(self, reader: PDFReader) -> tuple:
+        """识别版面模板，返回 (模板或None, 第一页文本)"""
+        if not reader.page_count:
+            return None, ''
+        first_page_text = reader.page_text(0)
+        width, height = reader.page_size(0)
+        return self.templates.classify(first_page_text, width, height), first_page_text
+
+    def _parse_with_template(self, reader: PDFReader, parsed_data: Dict[str, Any]) -> bool:
+        """按版面模板裁剪区域提取字段，未匹配模板或未取到任何值时返回False（回退到整页解析）"""
+        template, first_page_text = self._classify(reader)
+        if template is None:
+            return False
+
+        structured = {}
+        merged = {}
+        for page_number in template.pages(reader.page_count):
+            index = page_number - 1
+            zones = template.absolute_zones(page_number, *reader.page_size(index))
+            if not zones:
+                continue
+            texts = reader.zone_texts(index, [bbox for _, _, bbox in zones])
+
+            page_records = {}
+            for (data_type, field, _), text in zip(zones, texts):
+                value = self._zone_value(text)
+                if value:
+                    page_records.setdefault(data_type, {})[field] = value
+
+            if template.repeat:
+                for data_type, record in _share_key_fields(page_records).items():
+                    structured.setdefault(data_type, []).append(record)
+            else:
+                for data_type, record in page_records.items():
+                    merged.setdefault(data_type, {}).update(record)
+
+        for data_type, record in _share_key_fields(merged).items():
+            structured[data_type] = [record]
 
-    def parse_file(self, file_path: str) -> Dict[str, Any]:
+        if not structured:
+            logger.warning(f"版面模板 {template.name} 未提取到字段，改为整页解析: {reader.file_path}")
+            return False
+
+        parsed_data['file_info']['layout_template'] = template.name
+        parsed_data['file_info']['ocr_pages'] = 0
+        parsed_data['structured_data'] = structured
+        parsed_data['raw_text'] = first_page_text
+        parsed_data['pages'] = [{'page_number': 1, 'text': first_page_text, 'tables': [], 'ocr': False}]
+        return True
+
+    def _zone_value(self, text: str) -> str:
+        """区域文本取值（区域包含 "标签：" 时去掉标签）"""
+        text = ' '.join(text.split())
+        match = _LABEL_PREFIX_RE.match(text)
+        if match:
+            text = _NEXT_LABEL_RE.split(text[match.end():], 1)[0]
+        return text
+
+    def fingerprint_file(self, file_path: str) -> Dict[str, Any]:
+        """计算文档指纹（不做版面和表格分析）"""
+        with PDFReader(file_path, self.engine) as reader:
+            return compute_fingerprint(reader)
+
+    def parse_file(self, file_path: str,
+                   known_documents: Optional[List[Dict[str, Any]]] = None) -> Dict[str, Any]:
         """
         解析PDF文件
 
         Args:
             file_path: PDF文件路径
+            known_documents: 已入库文档的指纹（见 pdf_fingerprint.find_duplicate），
+                传入时先做重复检测：完全重复的文档跳过解析，近似重复的照常解析并标记
 
         Returns:
-            解析后的数据字典
+            解析后的数据字典，file_info 中包含 fingerprint 和 duplicate 检测结果
         """
         try:
             logger.info(f"开始解析PDF文件: {file_path}")
 
-            # 这里将来可以集成实际的PDF解析库
-            # 目前返回基础结构
+            file_info = self._get_file_info(file_path)
             parsed_data = {
-                'file_info': {
-                    'file_name': Path(file_path).name,
-                    'file_path': file_path,
-                    'file_type': 'pdf'
-                },
+                'file_info': file_info,
                 'structured_data': {},
                 'raw_text': '',
                 'pages': []
             }
 
+            with PDFReader(file_path, self.engine) as reader:
+                file_info['reader_engine'] = reader.engine
+                file_info['page_count'] = reader.page_count
+
+                if known_documents is not None:
+                    file_info['fingerprint'] = compute_fingerprint(reader)
+                    duplicate = find_duplicate(file_info['fingerprint'], known_documents)
+                    file_info['duplicate'] = duplicate
+                    if duplicate['status'] == 'duplicate':
+                        logger.info(f"跳过重复文档: {file_path} 与 {duplicate['match'].get('file_path')} 内容相同")
+                        parsed_data['skipped'] = True
+                        return parsed_data
+                    if duplicate['status'] == 'near_duplicate':
+                        logger.warning(f"疑似重复文档: {file_path} 与 {duplicate['match'].get('file_path')} "
+                                       f"相似（汉明距离 {duplicate['distance']}）")
+
+                if len(self.templates) and reader.can_crop and self._parse_with_template(reader, parsed_data):
+                    logger.info(f"PDF文件按版面模板解析完成: {file_path} ({file_info['layout_template']})")
+                    return parsed_data
+
+                extractor = StructuredExtractor(self)
+                texts = []
+                for page in self._iter_pages(reader):
+                    extractor.add_page(page)
+                    texts.append(page['text'])
+                    parsed_data['pages'].append(_page_view(page))
+
+            parsed_data['raw_text'] = '\n'.join(texts)
+            file_info['ocr_pages'] = sum(1 for page in parsed_data['pages'] if page['ocr'])
+            parsed_data['structured_data'] = extractor.result()
+
             logger.info(f"PDF文件解析完成: {file_path}")
             return parsed_data
 
         except Exception as e:
             logger.error(f"解析PDF文件失败 {file_path}: {e}")
-            raise
\ No newline at end of file
+            raise
+
+    def open_document(self, file_path: str) -> 'PDFDocument':
+        """
+        打开惰性PDF文档（页面首次访问时才解析并缓存）
+
+        返回值可以像 parse_file 的结果一样按键访问，用完后应调用 close() 或使用 with 语句。
+        """
+        return PDFDocument(self, file_path)
+
+    def iter_page_records(self, file_path: str) -> Iterator[Dict[str, Any]]:
+        """
+        逐页解析，每页产出 {'page_number': 页码, 'structured_data': 本页记录}
+
+        不保留已处理页面的文本，适合超长文档；跨页的键值对记录在下一条记录开始或文档结束时产出。
+        """
+        with PDFReader(file_path, self.engine) as reader:
+            extractor = StructuredExtractor(self)
+            for page in self._iter_pages(reader):
+                extractor.add_page(page)
+                yield {'page_number': page['page_number'], 'structured_data': extractor.drain()}
+            remaining = extractor.result()
+            if remaining:
+                yield {'page_number': reader.page_count, 'structured_data': remaining}
+
+    def _iter_pages(self, reader: PDFReader) -> Iterator[Dict[str, Any]]:
+        """按页序产出页面内容，扫描页按批OCR"""
+        pages = self._extract_pages(reader)
+        if self.ocr_engine is None:
+            yield from pages
+            return
+
+        batch = []
+        for page in pages:
+            batch.append(page)
+            if len(batch) >= self.ocr_engine.batch_size:
+                yield from self._ocr_pages(reader, batch)
+                batch = []
+        yield from self._ocr_pages(reader, batch)
+
+    def _ocr_pages(self, reader: PDFReader, pages: List[Dict[str, Any]]) -> List[Dict[str, Any]]:
+        """识别一批页面中的扫描页（OCR不可用时原样返回）"""
+        if self.ocr_engine is None or not any(needs_ocr(page) for page in pages):
+            return pages
+        if not self.ocr_engine.available or not reader.can_rasterize:
+            if not self._ocr_warned:
+                logger.warning(f"PDF包含没有文本层的页面，但OCR不可用（需要 Tesseract 及 pdfplumber）: {reader.file_path}")
+                self._ocr_warned = True
+            return pages
+        try:
+            return self.ocr_engine.process_pages(reader, pages)
+        except Exception as e:
+            logger.error(f"OCR处理失败 {reader.file_path}: {e}")
+            return pages
+
+    def _extract_pages(self, reader: PDFReader) -> Iterator[Dict[str, Any]]:
+        """
+        按页序产出页面内容，页数较多时将页段分配到多个工作进程并行提取
+
+        并行时同时提交的页段数有上限（MAX_INFLIGHT_CHUNKS_PER_WORKER × 进程数），
+        结果按页序产出：前面的页段未完成时后面已完成的页段暂存，已提交的页段继续在其他进程中提取，
+        最多暂存上限数量的页段，不会一次提交全部页段。
+        """
+        page_count = reader.page_count
+        workers = min(self.max_workers, page_count)
+        if workers <= 1 or page_count < PARALLEL_MIN_PAGES:
+            yield from reader.iter_pages()
+            return
+
+        size = max(1, -(-page_count // (workers * CHUNKS_PER_WORKER)))
+        ranges = iter([(start, min(start + size, page_count)) for start in range(0, page_count, size)])
+        max_inflight = workers * MAX_INFLIGHT_CHUNKS_PER_WORKER
+        logger.info(f"并行提取PDF页面: {page_count} 页, {workers} 个进程, 每段 {size} 页")
+
+        with ProcessPoolExecutor(max_workers=workers) as executor:
+            inflight = deque()
+            for page_range in itertools.islice(ranges, max_inflight):
+                inflight.append(executor.submit(_read_page_range, reader.file_path, reader.engine, page_range))
+            while inflight:
+                pages = inflight.popleft().result()
+                # 队首页段完成后补充一个页段，保持进程忙碌
+                page_range = next(ranges, None)
+                if page_range is not None:
+                    inflight.append(executor.submit(_read_page_range, reader.file_path, reader.engine, page_range))
+                yield from pages
+
+    def extract_key_values(self, data_type: str, text: str) -> List[tuple]:
+        """
+        提取文本中的键值对
+
+        Returns:
+            按出现顺序的 [(字段, 值)]
+        """
+        pattern = self._label_patterns.get(data_type)
+        if pattern is None:
+            return []
+        alias_fields = self.rule_set.alias_fields(data_type)
+
+        pairs = []
+        for line in text.splitlines():
+            matches = list(pattern.finditer(line))
+            for i, match in enumerate(matches):
+                end = matches[i + 1].start() if i + 1 < len(matches) else len(line)
+                value = _NEXT_LABEL_RE.split(line[match.end():end].strip(), 1)[0]
+                if value:
+                    pairs.append((alias_fields[match.group(1)], value))
+        return pairs
+
+    def extract_table_records(self, data_type: str, table: List[List[str]]) -> List[Dict[str, Any]]:
+        """从表格中提取记录（表头行按字段别名匹配）"""
+        if len(table) < 2:
+            return []
+
+        header = table[0]
+        field_columns = self.rule_set.column_fields(data_type, header)
+        if sum(1 for field in field_columns if field not in KEY_FIELDS) < 1 or len(field_columns) < 2:
+            return []
+
+        positions = {field: [header.index(alias) for alias in aliases] for field, aliases in field_columns.items()}
+        records = []
+        for row in table[1:]:
+            record = {}
+            for field, indexes in positions.items():
+                for index in indexes:
+                    if index < len(row) and row[index]:
+                        record[field] = row[index]
+                        break
+            if record:
+                records.append(record)
+        return records
+
+    def _get_file_info(self, file_path: str) -> Dict[str, Any]:
+        """获取文件基本信息"""
+        stat = os.stat(file_path)
+        return {
+            'file_name': os.path.basename(file_path),
+            'file_path': file_path,
+            'file_size': stat.st_size,
+            'modified_time': datetime.fromtimestamp(stat.st_mtime).isoformat(),
+            'file_type': 'pdf'
+        }
+
+class PDFDocument(Mapping):
+    """惰性PDF文档，兼容 parse_file 返回的字典键（file_info/structured_data/raw_text/pages）"""
+
+    _keys = ('file_info', 'structured_data', 'raw_text', 'pages')
+
+    def __init__(self, parser: PDFParser, file_path: str):
+        self.parser = parser
+        self.file_path = file_path
+        self.file_info = parser._get_file_info(file_path)
+        self._reader = PDFReader(file_path, parser.engine)
+        self.file_info['reader_engine'] = self._reader.engine
+        self.file_info['page_count'] = self._reader.page_count
+        self._lock = threading.RLock()
+        self._cache = {}
+        self._text_parts = []
+        self._raw_text = None
+        self._structured_data = None
+        self.pages = LazyPages(self)
+
+    @property
+    def page_count(self) -> int:
+        """总页数"""
+        return self.file_info['page_count']
+
+    @property
+    def parsed_pages(self) -> int:
+        """已解析的页数"""
+        return len(self._cache)
+
+    def page(self, index: int) -> Dict[str, Any]:
+        """获取单页（index从0开始），首次访问时解析"""
+        with self._lock:
+            page = self._cache.get(index)
+            if page is None:
+                page = self.parser._ocr_pages(self._reader, [self._reader.read_page(index)])[0]
+                self._cache[index] = page
+            return page
+
+    def text(self, max_pages: Optional[int] = None) -> str:
+        """前 max_pages 页的文本（按页递增拼接，已拼接的部分不重复处理）"""
+        stop = self.page_count if max_pages is None else min(max_pages, self.page_count)
+        with self._lock:
+            for index in range(len(self._text_parts), stop):
+                self._text_parts.append(self.page(index)['text'])
+            return '\n'.join(self._text_parts[:stop])
+
+    @property
+    def raw_text(self) -> str:
+        """全文文本"""
+        with self._lock:
+            if self._raw_text is None:
+                self._raw_text = self.text()
+            return self._raw_text
+
+    @property
+    def structured_data(self) -> Dict[str, Any]:
+        """全文结构化数据（首次访问时解析全部页面）"""
+        with self._lock:
+            if self._structured_data is None:
+                if not self._cache:
+                    # 尚未访问任何页面时走并行提取
+                    for page in self.parser._iter_pages(self._reader):
+                        self._cache[page['page_number'] - 1] = page
+                extractor = StructuredExtractor(self.parser)
+                for index in range(self.page_count):
+                    extractor.add_page(self.page(index))
+                self._structured_data = extractor.result()
+            return self._structured_data
+
+    def __getitem__(self, key: str) -> Any:
+        if key not in self._keys:
+            raise KeyError(key)
+        return getattr(self, key)
+
+    def __iter__(self):
+        return iter(self._keys)
+
+    def __len__(self):
+        return len(self._keys)
+
+    def close(self):
+        """关闭文档（已缓存的页面仍可访问）"""
+        self._reader.close()
+
+    def __enter__(self):
+        return self
+
+    def __exit__(self, exc_type, exc_val, exc_tb):
+        self.close()
+
+    def __repr__(self):
+        return f"PDFDocument({self.file_info['file_name']!r}, pages={self.page_count}, parsed={self.parsed_pages})"
+
+class LazyPages(Sequence):
+    """按需解析的页面列表，元素与 parse_file 的 pages 一致"""
+
+    def __init__(self, document: PDFDocument):
+        self._document = document
+
+    def __len__(self):
+        return self._document.page_count
+
+    def __getitem__(self, index):
+        if isinstance(index, slice):
+            return [self[i] for i in range(*index.indices(len(self)))]
+        if index < 0:
+            index += len(self)
+        if not 0 <= index < len(self):
+            raise IndexError(index)
+        return _page_view(self._document.page(index))
+
+class StructuredExtractor:
+    """跨页累积结构化记录"""
+
+    def __init__(self, parser: PDFParser):
+        self.parser = parser
+        self._records = {}
+        self._current = {}
+
+    def add_page(self, page: Dict[str, Any]):
+        """处理一页：表格按行生成记录，正文键值对按字段重复出现切分为多条记录"""
+        body_text = page.get('body_text', page.get('text', ''))
+        for data_type in self.parser.rule_set.data_types:
+            for table in page.get('tables', []):
+                records = self.parser.extract_table_records(data_type, table)
+                if records:
+                    self._records.setdefault(data_type, []).extend(records)
+                elif _is_key_value_table(table):
+                    self._add_pairs(data_type, self.parser.extract_key_values(
+                        data_type, '\n'.join(f"{row[0]}：{row[1]}" for row in table)
+                    ))
+            self._add_pairs(data_type, self.parser.extract_key_values(data_type, body_text))
+
+    def _add_pairs(self, data_type: str, pairs: List[tuple]):
+        """累积键值对，同一字段再次出现视为下一条记录开始"""
+        current = self._current.setdefault(data_type, {})
+        for field, value in pairs:
+            if field in current:
+                self._records.setdefault(data_type, []).append(current)
+                current = self._current[data_type] = {}
+            current[field] = value
+
+    def drain(self) -> Dict[str, List[Dict[str, Any]]]:
+        """取出已完成的记录（正在累积的记录保留）"""
+        drained = {data_type: records for data_type, records in self._records.items() if records}
+        self._records = {}
+        return drained
+
+    def result(self) -> Dict[str, List[Dict[str, Any]]]:
+        """结束累积，返回全部剩余记录"""
+        for data_type, current in self._current.items():
+            if current:
+                self._records.setdefault(data_type, []).append(current)
+        self._current = {}
+        return self.drain()
+
+def _share_key_fields(records: Dict[str, Dict[str, Any]]) -> Dict[str, Dict[str, Any]]:
+    """同一文档/页面中各数据类型的记录互相补全关联键（如发动机区域不含VIN）"""
+    for field in KEY_FIELDS:
+        value = next((record[field] for record in records.values() if record.get(field)), None)
+        if value is not None:
+            for record in records.values():
+                record.setdefault(field, value)
+    return records
+
+def _page_view(page: Dict[str, Any]) -> Dict[str, Any]:
+    """对外输出的页面内容"""
+    return {
+        'page_number': page['page_number'],
+        'text': page['text'],
+        'tables': page['tables'],
+        'ocr': page.get('ocr', False)
+    }
+
+def _read_page_range(file_path: str, engine: str, page_range: tuple) -> List[Dict[str, Any]]:
+    """工作进程：读取一个页段"""
+    with PDFReader(file_path, engine) as reader:
+        return list(reader.iter_pages(*page_range))
+
+def _is_key_value_table(table: List[List[str]]) -> bool:
+    """两列表格视为 "键 | 值" 布局"""
+    return all(len(row) == 2 for row in table)
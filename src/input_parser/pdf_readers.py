@@ -0,0 +1,231 @@
+"""
+PDF读取后端
+PDF Reader Backends
+
+逐页读取PDF的文本和表格，读完一页即释放该页的对象缓存，内存占用与页数无关：
+- 优先使用 pdfplumber（可提取表格，并能分离表格区域外的正文）
+- 未安装pdfplumber时回退到 PyPDF2（仅文本）
+"""
+
+import hashlib
+import logging
+from typing import Dict, List, Any, Optional, Iterator
+
+logger = logging.getLogger(__name__)
+
+# 检测可选的读取引擎
+try:
+    import pdfplumber
+    from pdfminer.pdftypes import resolve1
+    PDFPLUMBER_AVAILABLE = True
+except ImportError:
+    PDFPLUMBER_AVAILABLE = False
+
+try:
+    import PyPDF2
+    PYPDF2_AVAILABLE = True
+except ImportError:
+    PYPDF2_AVAILABLE = False
+
+def available_engines() -> List[str]:
+    """获取当前环境可用的PDF读取引擎"""
+    engines = []
+    if PDFPLUMBER_AVAILABLE:
+        engines.append('pdfplumber')
+    if PYPDF2_AVAILABLE:
+        engines.append('pypdf2')
+    return engines
+
+def select_engine() -> str:
+    """选择PDF读取引擎"""
+    engines = available_engines()
+    if not engines:
+        raise ImportError("读取PDF文件需要安装 pdfplumber 或 PyPDF2")
+    return engines[0]
+
+class PDFReader:
+    """PDF文档读取器（逐页流式读取）"""
+
+    def __init__(self, file_path: str, engine: Optional[str] = None):
+        """
+        Args:
+            file_path: PDF文件路径
+            engine: 指定读取引擎（pdfplumber/pypdf2），默认自动选择
+        """
+        self.file_path = file_path
+        self.engine = engine or select_engine()
+        if self.engine not in available_engines():
+            raise ImportError(f"PDF读取引擎不可用: {self.engine}")
+
+        if self.engine == 'pdfplumber':
+            self._document = pdfplumber.open(file_path)
+            self._pages = self._document.pages
+        else:
+            self._document = open(file_path, 'rb')
+            self._pages = PyPDF2.PdfReader(self._document).pages
+
+    @property
+    def page_count(self) -> int:
+        """总页数"""
+        return len(self._pages)
+
+    def read_page(self, index: int) -> Dict[str, Any]:
+        """
+        读取单页（index从0开始）
+
+        Returns:
+            {
+                'page_number': 页码(从1开始),
+                'text': 整页文本,
+                'body_text': 表格区域以外的正文（用于键值对提取，避免与表格重复），
+                'tables': [[行单元格]]
+            }
+        """
+        page = self._pages[index]
+        if self.engine == 'pdfplumber':
+            try:
+                text = page.extract_text() or ''
+                tables = page.find_tables()
+                if tables:
+                    bboxes = [table.bbox for table in tables]
+                    body = page.filter(lambda obj: not _inside_any(obj, bboxes))
+                    body_text = body.extract_text() or ''
+                else:
+                    body_text = text
+                rows = [_clean_rows(table.extract()) for table in tables]
+            finally:
+                # 释放该页解析出的字符/线条对象
+                page.close()
+        else:
+            text = page.extract_text() or ''
+            body_text = text
+            rows = []
+
+        return {
+            'page_number': index + 1,
+            'text': text,
+            'body_text': body_text,
+            'tables': [table for table in rows if table]
+        }
+
+    def page_text(self, index: int) -> str:
+        """只提取单页文本（不做表格分析，用于指纹、分类等预处理）"""
+        page = self._pages[index]
+        if self.engine != 'pdfplumber':
+            return page.extract_text() or ''
+        try:
+            return page.extract_text() or ''
+        finally:
+            page.close()
+
+    def page_size(self, index: int) -> tuple:
+        """页面宽高（点）"""
+        page = self._pages[index]
+        if self.engine == 'pdfplumber':
+            return float(page.width), float(page.height)
+        box = page.mediabox
+        return float(box.width), float(box.height)
+
+    @property
+    def can_crop(self) -> bool:
+        """是否支持按区域裁剪提取文本（版面模板需要）"""
+        return self.engine == 'pdfplumber'
+
+    def zone_texts(self, index: int, bboxes: List[tuple]) -> List[str]:
+        """
+        裁剪单页的多个区域并提取文本（按字符中心点归属区域，压线的字符不会被截掉）
+
+        Args:
+            bboxes: [(x0, top, x1, bottom)]，绝对坐标
+        """
+        if not self.can_crop:
+            raise ValueError(f"PDF读取引擎不支持区域裁剪: {self.engine}")
+        page = self._pages[index]
+        try:
+            return [page.filter(lambda obj, bbox=bbox: _inside_any(obj, [bbox])).extract_text() or ''
+                    for bbox in bboxes]
+        finally:
+            page.close()
+
+    def content_hash(self) -> str:
+        """
+        文档内容哈希（SHA1）
+
+        对每页的内容流及引用的图像/表单对象原始数据求哈希，不解析版面，
+        与文件名、元数据（创建时间、生成工具）无关。
+        """
+        digest = hashlib.sha1()
+        for index in range(self.page_count):
+            digest.update(f"page:{index}".encode('ascii'))
+            for data in self._page_streams(index):
+                digest.update(data)
+        return digest.hexdigest()
+
+    def _page_streams(self, index: int) -> Iterator[bytes]:
+        """单页的内容流及XObject数据（均为解码后的数据，各读取引擎结果一致）"""
+        if self.engine == 'pdfplumber':
+            page_obj = self._pages[index].page_obj
+            for stream in page_obj.contents:
+                yield resolve1(stream).get_data()
+            xobjects = resolve1((page_obj.resources or {}).get('XObject')) or {}
+            for name in sorted(xobjects):
+                yield resolve1(xobjects[name]).get_data() or b''
+        else:
+            page = self._pages[index]
+            contents = page.get_contents()
+            if contents is not None:
+                yield contents.get_data()
+            resources = page.get('/Resources')
+            xobjects = resources.get_object().get('/XObject') if resources else None
+            if xobjects:
+                xobjects = xobjects.get_object()
+                for name in sorted(xobjects):
+                    yield xobjects[name].get_object().get_data() or b''
+
+    @property
+    def can_rasterize(self) -> bool:
+        """是否支持页面栅格化（OCR需要）"""
+        return self.engine == 'pdfplumber'
+
+    def rasterize(self, index: int, dpi: int):
+        """将单页渲染为 PIL 图像"""
+        if not self.can_rasterize:
+            raise ValueError(f"PDF读取引擎不支持页面栅格化: {self.engine}")
+        page = self._pages[index]
+        try:
+            return page.to_image(resolution=dpi).original
+        finally:
+            page.close()
+
+    def iter_pages(self, start: int = 0, stop: Optional[int] = None) -> Iterator[Dict[str, Any]]:
+        """按页流式读取 [start, stop) 范围的页面"""
+        stop = self.page_count if stop is None else min(stop, self.page_count)
+        for index in range(start, stop):
+            yield self.read_page(index)
+
+    def close(self):
+        """关闭文档"""
+        self._document.close()
+
+    def __enter__(self):
+        return self
+
+    def __exit__(self, exc_type, exc_val, exc_tb):
+        self.close()
+
+def _inside_any(obj: Dict[str, Any], bboxes: List[tuple]) -> bool:
+    """页面对象的中心点是否落在任一表格区域内"""
+    if 'x0' not in obj or 'top' not in obj:
+        return False
+    x = (obj['x0'] + obj['x1']) / 2
+    y = (obj['top'] + obj['bottom']) / 2
+    return any(x0 <= x <= x1 and top <= y <= bottom for x0, top, x1, bottom in bboxes)
+
+def _clean_rows(rows: List[List[Optional[str]]]) -> List[List[str]]:
+    """规范化表格单元格（合并单元格内换行、None转空串），去掉全空行"""
+    cleaned = []
+    for row in rows:
+        cells = [' '.join(str(cell).split()) if cell is not None else '' for cell in row]
+        if any(cells):
+            cleaned.append(cells)
+    return cleaned
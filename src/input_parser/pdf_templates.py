@@ -0,0 +1,174 @@
+"""
+PDF版面模板
+PDF Layout Templates
+
+固定版式的证书（同一签发机构版面不变）用模板描述字段所在区域，解析时只裁剪这些区域取文本，
+不做整页版面和表格分析。模板配置示例：
+
+    {
+        'name': 'issuer_a_certificate',
+        'markers': ['机动车型式认证证书', 'XX认证中心'],
+        'page_size': [595, 842],
+        'repeat': False,
+        'zones': [
+            {'field': 'VIN', 'data_type': 'vehicle_info', 'page': 1, 'bbox': [0.12, 0.08, 0.60, 0.11]},
+            {'field': 'engine_code', 'data_type': 'engine_info', 'page': 1, 'bbox': [0.12, 0.20, 0.60, 0.23]}
+        ]
+    }
+
+bbox 为相对页面宽高的比例 [x0, top, x1, bottom]；repeat 为 True 时每页按第1页的区域各生成一条记录。
+分类只看第一页：页面尺寸一致且命中足够多的标志文字的模板胜出。
+"""
+
+import json
+import logging
+import threading
+from typing import Dict, List, Any, Optional
+
+logger = logging.getLogger(__name__)
+
+# 命中标志文字的比例达到该值才认为匹配
+DEFAULT_MIN_MARKER_RATIO = 0.6
+
+# 页面尺寸比较的容差（点）
+PAGE_SIZE_TOLERANCE = 5
+
+class LayoutTemplate:
+    """已编译的版面模板"""
+
+    def __init__(self, config: Dict[str, Any]):
+        if not config.get('name'):
+            raise ValueError("版面模板缺少名称")
+        if not config.get('zones'):
+            raise ValueError(f"版面模板没有定义字段区域: {config['name']}")
+
+        self.config = json.loads(json.dumps(config, ensure_ascii=False))
+        self.name = config['name']
+        # 标志文字去掉空白后比较，与PDF文本提取时的断行、空格无关
+        self.markers = tuple(''.join(str(marker).split()) for marker in config.get('markers', ()) if marker)
+        self.page_size = tuple(config['page_size']) if config.get('page_size') else None
+        self.repeat = bool(config.get('repeat', False))
+        self.min_marker_ratio = config.get('min_marker_ratio', DEFAULT_MIN_MARKER_RATIO)
+
+        # 按页分组的区域 {页码: [(数据类型, 字段, bbox)]}
+        self.zones_by_page = {}
+        for zone in config['zones']:
+            bbox = tuple(float(value) for value in zone['bbox'])
+            if len(bbox) != 4 or not (0 <= bbox[0] < bbox[2] <= 1 and 0 <= bbox[1] < bbox[3] <= 1):
+                raise ValueError(f"版面模板 {self.name} 的区域坐标无效: {zone}")
+            page = int(zone.get('page', 1))
+            self.zones_by_page.setdefault(page, []).append(
+                (zone.get('data_type', 'vehicle_info'), zone['field'], bbox)
+            )
+
+    def matches_size(self, width: float, height: float) -> bool:
+        """页面尺寸是否与模板一致（未指定尺寸的模板不限制）"""
+        if self.page_size is None:
+            return True
+        return (abs(self.page_size[0] - width) <= PAGE_SIZE_TOLERANCE
+                and abs(self.page_size[1] - height) <= PAGE_SIZE_TOLERANCE)
+
+    def absolute_zones(self, page_number: int, width: float, height: float) -> List[tuple]:
+        """获取某页的区域（换算为绝对坐标）"""
+        zones = self.zones_by_page.get(1 if self.repeat else page_number, [])
+        return [
+            (data_type, field, (x0 * width, top * height, x1 * width, bottom * height))
+            for data_type, field, (x0, top, x1, bottom) in zones
+        ]
+
+    def pages(self, page_count: int) -> List[int]:
+        """需要读取的页码"""
+        if self.repeat:
+            return list(range(1, page_count + 1))
+        return sorted(page for page in self.zones_by_page if page <= page_count)
+
+    def __repr__(self):
+        return f"LayoutTemplate({self.name!r}, markers={len(self.markers)}, pages={sorted(self.zones_by_page)})"
+
+class TemplateRegistry:
+    """版面模板注册表及第一页分类器"""
+
+    def __init__(self, templates: Optional[List[Dict[str, Any]]] = None):
+        self._templates = {}
+        self._markers = None
+        self._lock = threading.Lock()
+        for template in templates or []:
+            self.register(template)
+
+    def __len__(self):
+        return len(self._templates)
+
+    def __contains__(self, name: str) -> bool:
+        return name in self._templates
+
+    @property
+    def templates(self) -> List[LayoutTemplate]:
+        """全部模板"""
+        return list(self._templates.values())
+
+    def register(self, config: Dict[str, Any]) -> LayoutTemplate:
+        """注册（或替换同名）模板"""
+        template = LayoutTemplate(config)
+        with self._lock:
+            self._templates[template.name] = template
+            self._markers = None
+        return template
+
+    def unregister(self, name: str):
+        """删除模板"""
+        with self._lock:
+            self._templates.pop(name, None)
+            self._markers = None
+
+    def load(self, config_path: str) -> bool:
+        """从JSON文件加载模板（文件内容为模板列表）"""
+        try:
+            with open(config_path, 'r', encoding='utf-8') as f:
+                for config in json.load(f):
+                    self.register(config)
+            logger.info(f"版面模板已加载: {config_path}")
+            return True
+        except Exception as e:
+            logger.error(f"加载版面模板失败: {e}")
+            return False
+
+    def save(self, config_path: str) -> bool:
+        """保存模板到JSON文件"""
+        try:
+            with open(config_path, 'w', encoding='utf-8') as f:
+                json.dump([template.config for template in self.templates], f, ensure_ascii=False, indent=2)
+            logger.info(f"版面模板已保存: {config_path}")
+            return True
+        except Exception as e:
+            logger.error(f"保存版面模板失败: {e}")
+            return False
+
+    def classify(self, first_page_text: str, width: float, height: float) -> Optional[LayoutTemplate]:
+        """
+        按第一页特征选择模板
+
+        所有模板的标志文字去重后只在第一页文本中各查找一次得到命中集合，
+        再按 命中比例 > 标志数量 的顺序选出尺寸一致的最佳模板。
+        """
+        with self._lock:
+            if self._markers is None:
+                self._markers = frozenset(m for t in self._templates.values() for m in t.markers)
+            markers = self._markers
+            templates = list(self._templates.values())
+
+        if not markers:
+            return None
+
+        text = ''.join(first_page_text.split())
+        hits = {marker for marker in markers if marker in text}
+        best, best_score = None, None
+        for template in templates:
+            if not template.markers or not template.matches_size(width, height):
+                continue
+            ratio = sum(1 for marker in template.markers if marker in hits) / len(template.markers)
+            if ratio < template.min_marker_ratio:
+                continue
+            score = (ratio, len(template.markers))
+            if best_score is None or score > best_score:
+                best, best_score = template, score
+        return best
@@ -0,0 +1,140 @@
+"""
+跨表VIN关联引擎
+Cross-Sheet VIN Join Engine
+
+将多个工作表、多个文件的结构化数据按关联键（默认VIN）建立哈希索引，
+一次线性扫描合并为完整车辆记录，并报告无法关联的孤立行和字段冲突。
+"""
+
+import logging
+from typing import Dict, Any, Optional
+
+import pandas as pd
+
+from .columnar import iter_records
+
+logger = logging.getLogger(__name__)
+
+class RecordJoiner:
+    """结构化数据关联引擎"""
+
+    def __init__(self, key_field: str = 'VIN', primary_type: str = 'vehicle_info',
+                 max_reported: int = 100):
+        """
+        Args:
+            key_field: 关联键字段
+            primary_type: 主数据类型，其他类型的键在主类型中不存在时视为孤立行
+            max_reported: 孤立行、冲突明细最多保留的条数（计数不受限制）
+        """
+        self.key_field = key_field
+        self.primary_type = primary_type
+        self.max_reported = max_reported
+        self._index = {}
+        self._missing_key = {}
+        self._conflicts = []
+        self._conflict_count = 0
+        self._sources = {}
+
+    def add(self, structured_data: Dict[str, Any], source: Optional[str] = None) -> 'RecordJoiner':
+        """
+        加入一份结构化数据（记录列表或列式布局均可）
+
+        Args:
+            structured_data: {数据类型: 数据}
+            source: 来源标识（如文件名），用于冲突报告
+        """
+        for data_type, data in structured_data.items():
+            missing = self._missing_key.setdefault(data_type, [])
+            for record in iter_records(data):
+                key = self._normalize_key(record.get(self.key_field))
+                if key is None:
+                    missing.append(record)
+                    continue
+
+                entry = self._index.setdefault(key, {})
+                if data_type not in entry:
+                    entry[data_type] = dict(record, **{self.key_field: key})
+                    self._sources[(key, data_type)] = source
+                else:
+                    self._merge(key, data_type, entry[data_type], record, source)
+        return self
+
+    def add_parsed(self, parsed_data: Dict[str, Any]) -> 'RecordJoiner':
+        """加入一个文件的解析结果"""
+        source = parsed_data.get('file_info', {}).get('file_name')
+        return self.add(parsed_data.get('structured_data', {}), source)
+
+    def join(self) -> Dict[str, Any]:
+        """
+        获取关联结果
+
+        Returns:
+            {
+                'records': {键: {数据类型: 合并后的记录}},
+                'orphans': {'missing_key': {数据类型: [记录]}, 'unmatched': {数据类型: [键]}},
+                'conflicts': [冲突明细],
+                'statistics': 统计信息
+            }
+        """
+        unmatched = {}
+        for key, entry in self._index.items():
+            if self.primary_type in entry:
+                continue
+            for data_type in entry:
+                unmatched.setdefault(data_type, []).append(key)
+
+        statistics = {
+            'joined_keys': len(self._index),
+            'complete_records': sum(1 for entry in self._index.values() if self.primary_type in entry),
+            'missing_key_rows': sum(len(rows) for rows in self._missing_key.values()),
+            'unmatched_rows': sum(len(keys) for keys in unmatched.values()),
+            'conflicts': self._conflict_count
+        }
+        if statistics['missing_key_rows'] or statistics['unmatched_rows']:
+            logger.warning(f"存在无法关联的记录: 缺少{self.key_field} {statistics['missing_key_rows']} 行，"
+                           f"无{self.primary_type} {statistics['unmatched_rows']} 行")
+
+        return {
+            'records': self._index,
+            'orphans': {
+                'missing_key': {t: rows[:self.max_reported] for t, rows in self._missing_key.items() if rows},
+                'unmatched': {t: keys[:self.max_reported] for t, keys in unmatched.items()}
+            },
+            'conflicts': self._conflicts,
+            'statistics': statistics
+        }
+
+    def _merge(self, key: str, data_type: str, target: Dict[str, Any],
+               record: Dict[str, Any], source: Optional[str]):
+        """同一键、同一类型的多条记录合并：缺失字段补全，冲突字段保留先出现的值"""
+        for field, value in record.items():
+            if field == self.key_field:
+                continue
+            if field not in target:
+                target[field] = value
+            elif target[field] != value:
+                self._conflict_count += 1
+                if len(self._conflicts) < self.max_reported:
+                    self._conflicts.append({
+                        'key': key,
+                        'data_type': data_type,
+                        'field': field,
+                        'kept': target[field],
+                        'kept_source': self._sources.get((key, data_type)),
+                        'discarded': value,
+                        'discarded_source': source
+                    })
+
+    def _normalize_key(self, value: Any) -> Optional[str]:
+        """规范化关联键（去空白、转大写），空值返回None"""
+        if value is None or (not isinstance(value, str) and pd.isna(value)):
+            return None
+        key = str(value).strip().upper()
+        return key or None
+
+def join_records(*structured_data: Dict[str, Any], key_field: str = 'VIN') -> Dict[str, Any]:
+    """关联多份结构化数据"""
+    joiner = RecordJoiner(key_field=key_field)
+    for data in structured_data:
+        joiner.add(data)
+    return joiner.join()
@@ -0,0 +1,146 @@
+"""
+解析规则集
+Compiled Parsing Rule Set
+
+配置规则（dict）编译为不可变的规则集：工作表名模式、字段别名、表头关键词
+都预先转小写并编译为正则/索引。规则集按内容哈希得到版本号，相同内容的规则
+在进程内只编译一次，所有 ExcelParser 实例共享。
+"""
+
+import re
+import json
+import hashlib
+import threading
+from types import MappingProxyType
+from typing import Dict, List, Any, Iterable, Mapping
+
+# 通用表头关键词，与字段别名一起参与表头打分
+DEFAULT_HEADER_KEYWORDS = [
+    'VIN', '码', '型号', '类型', '标准', '排量', '功率', '扭矩',
+    '日期', '年份', '品牌', '制造商', 'ID', 'Code', 'Name', 'Type'
+]
+
+# 列名匹配时不计入的关联键字段
+KEY_FIELDS = {'VIN'}
+
+_cache = {}
+_cache_lock = threading.Lock()
+
+def rules_version(rules: Mapping[str, Any]) -> str:
+    """按规则内容计算版本号（与键顺序无关）"""
+    payload = json.dumps(_thaw(rules), sort_keys=True, ensure_ascii=False)
+    return hashlib.sha1(payload.encode('utf-8')).hexdigest()[:12]
+
+def compile_rules(rules: Mapping[str, Any]) -> 'CompiledRuleSet':
+    """编译规则（同一内容的规则返回缓存的同一个规则集）"""
+    version = rules_version(rules)
+    with _cache_lock:
+        rule_set = _cache.get(version)
+        if rule_set is None:
+            rule_set = CompiledRuleSet(rules, version)
+            _cache[version] = rule_set
+        return rule_set
+
+class CompiledRuleSet:
+    """不可变的已编译解析规则集"""
+
+    def __init__(self, rules: Mapping[str, Any], version: str):
+        self.version = version
+        self.rules = _freeze(_thaw(rules))
+        self.data_types = tuple(self.rules.keys())
+
+        # 每种数据类型的工作表名正则（小写，任一模式为子串即匹配）
+        self._sheet_patterns = {}
+        # 每种数据类型的 {别名: 字段}，用于列名匹配
+        self._alias_fields = {}
+        keywords = set(DEFAULT_HEADER_KEYWORDS)
+
+        for data_type, config in self.rules.items():
+            patterns = [p.lower() for p in config.get('sheet_patterns', ()) if p]
+            self._sheet_patterns[data_type] = (
+                re.compile('|'.join(re.escape(p) for p in _longest_first(patterns))) if patterns else None
+            )
+            alias_fields = {}
+            for field, aliases in config.get('field_mappings', {}).items():
+                for alias in aliases:
+                    if alias:
+                        alias_fields.setdefault(alias, field)
+                        keywords.add(str(alias))
+            self._alias_fields[data_type] = MappingProxyType(alias_fields)
+
+        self.header_pattern = re.compile('|'.join(re.escape(k) for k in _longest_first(keywords)))
+        self._sheet_type_cache = {}
+
+    def sheet_types(self, sheet_name: str) -> List[str]:
+        """按工作表名匹配数据类型（结果按工作表名缓存）"""
+        cached = self._sheet_type_cache.get(sheet_name)
+        if cached is None:
+            name = sheet_name.lower()
+            cached = tuple(
+                data_type for data_type, pattern in self._sheet_patterns.items()
+                if pattern is not None and pattern.search(name)
+            )
+            self._sheet_type_cache[sheet_name] = cached
+        return list(cached)
+
+    def sheet_matches(self, data_type: str, sheet_name: str) -> bool:
+        """工作表名是否匹配指定数据类型"""
+        return data_type in self.sheet_types(sheet_name)
+
+    def alias_fields(self, data_type: str) -> Mapping[str, str]:
+        """获取数据类型的 {别名: 字段} 映射（同一别名对应多个字段时取先出现的）"""
+        return self._alias_fields[data_type]
+
+    def column_fields(self, data_type: str, columns: Iterable[Any]) -> Dict[str, List[Any]]:
+        """
+        获取列名对应的字段
+
+        Returns:
+            {字段: [匹配的列名(按别名优先级)]}
+        """
+        alias_fields = self._alias_fields[data_type]
+        present = set(columns)
+        matched = {}
+        for field, aliases in self.rules[data_type].get('field_mappings', {}).items():
+            hits = [alias for alias in aliases if alias in present and alias_fields.get(alias) == field]
+            if hits:
+                matched[field] = hits
+        return matched
+
+    def columns_match(self, data_type: str, columns: Iterable[Any], min_fields: int = 2) -> bool:
+        """列名是否包含该类型至少 min_fields 个非关联键字段"""
+        fields = self.column_fields(data_type, columns)
+        return sum(1 for field in fields if field not in KEY_FIELDS) >= min_fields
+
+    def to_dict(self) -> Dict[str, Any]:
+        """导出为可修改、可JSON序列化的普通字典"""
+        return _thaw(self.rules)
+
+    def merged(self, rules_config: Mapping[str, Any]) -> 'CompiledRuleSet':
+        """按数据类型合并新规则，返回新的规则集"""
+        rules = self.to_dict()
+        rules.update(_thaw(rules_config))
+        return compile_rules(rules)
+
+    def __repr__(self):
+        return f"CompiledRuleSet(version={self.version!r}, data_types={self.data_types!r})"
+
+def _longest_first(items: Iterable[str]) -> List[str]:
+    """长模式优先，保证正则交替时整体命中"""
+    return sorted(set(items), key=lambda item: (-len(item), item))
+
+def _freeze(value: Any) -> Any:
+    """递归转换为只读结构"""
+    if isinstance(value, Mapping):
+        return MappingProxyType({key: _freeze(item) for key, item in value.items()})
+    if isinstance(value, (list, tuple)):
+        return tuple(_freeze(item) for item in value)
+    return value
+
+def _thaw(value: Any) -> Any:
+    """递归转换为普通的 dict/list"""
+    if isinstance(value, Mapping):
+        return {key: _thaw(item) for key, item in value.items()}
+    if isinstance(value, (list, tuple)):
+        return [_thaw(item) for item in value]
+    return value
@@ -0,0 +1,160 @@
+"""
+内存映射暂存区
+Memory-Mapped Scratch Storage
+
+解析超大工作簿时，列式中间结果在驻留内存超过上限后写入暂存目录的 .npy 文件，
+再以只读内存映射方式加载，由操作系统按需换入换出，进程常驻内存保持在预算之内。
+"""
+
+import os
+import atexit
+import shutil
+import logging
+import tempfile
+import threading
+import weakref
+from pathlib import Path
+from typing import Dict, List, Any, Optional
+
+import numpy as np
+
+from .columnar import concat_plan, fill_chunks, text_width
+
+logger = logging.getLogger(__name__)
+
+_open_directories = set()
+_directories_lock = threading.Lock()
+
+class ScratchStore:
+    """列式数据暂存区"""
+
+    def __init__(self, directory: Optional[str] = None, memory_limit: Optional[int] = None):
+        """
+        Args:
+            directory: 暂存文件的父目录，默认使用系统临时目录
+            memory_limit: 驻留内存上限（字节），超过后新数组写入内存映射文件；None 表示全部写入文件
+        """
+        if directory is not None:
+            Path(directory).mkdir(parents=True, exist_ok=True)
+        self.directory = Path(tempfile.mkdtemp(prefix='car_parse_', dir=directory))
+        self.memory_limit = memory_limit
+        self.resident_bytes = 0
+        self.spilled_bytes = 0
+        self._counter = 0
+        self._lock = threading.Lock()
+
+        with _directories_lock:
+            _open_directories.add(str(self.directory))
+        self._finalizer = weakref.finalize(self, _remove_directory, str(self.directory))
+
+    def store(self, array: np.ndarray) -> np.ndarray:
+        """保存数组：未超出内存上限时原样返回，否则返回内存映射的只读数组"""
+        with self._lock:
+            if self.memory_limit is not None and self.resident_bytes + array.nbytes <= self.memory_limit:
+                self.resident_bytes += array.nbytes
+                return array
+            self._counter += 1
+            path = self.directory / f"{self._counter:06d}.npy"
+
+        if array.dtype.kind == 'O':
+            # object数组无法内存映射，转为定长文本
+            array = array.astype(str)
+
+        np.save(path, array, allow_pickle=False)
+        mapped = np.load(path, mmap_mode='r')
+        try:
+            # POSIX下映射建立后即可删除文件，映射释放时磁盘空间自动回收
+            os.unlink(path)
+        except OSError:
+            pass
+
+        with self._lock:
+            self.spilled_bytes += array.nbytes
+        return mapped
+
+    def concat(self, chunks: List[Optional[np.ndarray]], lengths: List[int]) -> np.ndarray:
+        """
+        拼接一列的多段数组（ColumnChunks.concat 的拼接函数）
+
+        结果未超出内存上限时分配在内存中，否则直接写入新的暂存文件，
+        各段逐段复制，不经过DataFrame；拼接后驻留内存的各段不再计入驻留内存。
+        """
+        dtype, as_text = concat_plan(chunks)
+        length = sum(lengths)
+        if dtype.kind == 'O':
+            # object数组无法内存映射，转为定长文本
+            spill_dtype = np.dtype(f'<U{text_width(chunks)}')
+        else:
+            spill_dtype = dtype
+        nbytes = length * dtype.itemsize
+
+        with self._lock:
+            resident = self.memory_limit is not None and self.resident_bytes + nbytes <= self.memory_limit
+            if resident:
+                self.resident_bytes += nbytes
+            else:
+                self._counter += 1
+                path = self.directory / f"{self._counter:06d}.npy"
+
+        if resident:
+            out = np.empty(length, dtype=dtype)
+            fill_chunks(out, chunks, lengths, as_text)
+        else:
+            target = np.lib.format.open_memmap(path, mode='w+', dtype=spill_dtype, shape=(length,))
+            fill_chunks(target, chunks, lengths, as_text)
+            target.flush()
+            del target
+            out = np.load(path, mmap_mode='r')
+            try:
+                os.unlink(path)
+            except OSError:
+                pass
+            with self._lock:
+                self.spilled_bytes += out.nbytes
+
+        for chunk in chunks:
+            self.release(chunk)
+        return out
+
+    def release(self, array: Optional[np.ndarray]):
+        """不再使用的数组：驻留内存的数组不再计入驻留内存"""
+        if array is None or isinstance(array, np.memmap):
+            return
+        with self._lock:
+            self.resident_bytes = max(0, self.resident_bytes - array.nbytes)
+
+    def store_columns(self, columns: Dict[Any, np.ndarray]) -> Dict[Any, np.ndarray]:
+        """保存列式数据"""
+        return {name: self.store(array) for name, array in columns.items()}
+
+    def statistics(self) -> Dict[str, Any]:
+        """暂存统计"""
+        return {
+            'directory': str(self.directory),
+            'memory_limit': self.memory_limit,
+            'resident_bytes': self.resident_bytes,
+            'spilled_bytes': self.spilled_bytes
+        }
+
+    def close(self):
+        """删除暂存目录（Windows下仍被映射的文件会在进程退出时清理）"""
+        self._finalizer()
+
+    def __enter__(self):
+        return self
+
+    def __exit__(self, exc_type, exc_val, exc_tb):
+        self.close()
+
+def _remove_directory(directory: str):
+    """删除暂存目录"""
+    shutil.rmtree(directory, ignore_errors=True)
+    if not os.path.exists(directory):
+        with _directories_lock:
+            _open_directories.discard(directory)
+
+@atexit.register
+def _cleanup_directories():
+    """进程退出时清理残留的暂存目录"""
+    for directory in list(_open_directories):
+        shutil.rmtree(directory, ignore_errors=True)
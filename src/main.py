@@ -6,6 +6,7 @@ Car Data Processing Tool - Main Application
 
 import sys
 import os
+import re
 import tkinter as tk
 from tkinter import ttk, messagebox
 import logging
@@ -18,6 +19,7 @@ from src.input_parser.pdf_parser import PDFParser
 from src.input_parser.excel_parser import ExcelParser
 from src.database.query_engine import QueryEngine
 from src.output_generator.report_generator import ReportGenerator
+from src.output_generator.report_workers import ReportWorkerPool
 
 # 配置日志
 import os
@@ -38,6 +40,22 @@ logging.basicConfig(
 
 logger = logging.getLogger(__name__)
 
+# 界面模板名称对应的报告模板
+REPORT_TEMPLATES = {
+    '车辆排放检测报告': 'vehicle_emission_report',
+    '车辆基本信息报告': 'vehicle_basic_info'
+}
+
+# 界面输出格式对应的报告格式
+REPORT_FORMATS = {
+    'PDF': 'pdf',
+    'Word': 'docx',
+    'Excel': 'excel'
+}
+
+# 报告任务进度刷新间隔（毫秒）
+JOB_POLL_INTERVAL_MS = 500
+
 class CarDataProcessorApp:
     """汽车数据处理工具主应用类"""
 
@@ -66,6 +84,9 @@ class CarDataProcessorApp:
             self.excel_parser = ExcelParser()
             self.query_engine = QueryEngine()
             self.report_generator = ReportGenerator()
+            self.report_workers = ReportWorkerPool(field_mappings=self.report_generator.field_mappings)
+            # 继续上次退出前未完成的报告任务
+            self.report_workers.resume()
             logger.info("所有组件初始化成功")
         except Exception as e:
             logger.error(f"组件初始化失败: {e}")
@@ -256,7 +277,7 @@ class CarDataProcessorApp:
         from tkinter import filedialog
         files = filedialog.askopenfilenames(
             title="选择Excel文件",
-            filetypes=[("Excel文件", "*.xlsx *.xls"), ("所有文件", "*.*")]
+            filetypes=[("Excel文件", "*.xlsx *.xlsm *.xlsb *.xls *.csv *.tsv"), ("所有文件", "*.*")]
         )
         for file in files:
             self.file_listbox.insert(tk.END, file)
@@ -314,47 +335,60 @@ class CarDataProcessorApp:
             messagebox.showerror("错误", f"查询过程中出现错误: {e}")
 
     def generate_report(self):
-        """生成报告"""
+        """提交报告任务（后台工作进程生成，界面不等待）"""
         template = self.template_var.get()
-        vin = self.output_vin_entry.get().strip()
+        vins = [vin for vin in re.split(r'[\s,，;；]+', self.output_vin_entry.get()) if vin]
         output_format = self.output_format_var.get()
 
-        if not vin:
+        if not vins:
             messagebox.showwarning("警告", "请输入车辆VIN码")
             return
 
-        try:
-            # 这里添加实际的报告生成逻辑
-            self.status_bar.config(text="正在生成报告...")
-            self.root.update()
-
-            # 模拟生成过程
-            import time
-            time.sleep(1)
+        template_name = REPORT_TEMPLATES.get(template)
+        if template_name is None:
+            messagebox.showwarning("警告", f"模板暂不支持批量生成: {template}")
+            return
 
-            # 选择保存位置
+        try:
             from tkinter import filedialog
-            file_extensions = {
-                'PDF': '.pdf',
-                'Word': '.docx',
-                'Excel': '.xlsx'
-            }
-
-            filename = filedialog.asksaveasfilename(
-                title="保存报告",
-                defaultextension=file_extensions[output_format],
-                filetypes=[(f"{output_format}文件", f"*{file_extensions[output_format]}")]
-            )
-
-            if filename:
-                self.status_bar.config(text=f"报告已生成: {filename}")
-                messagebox.showinfo("成功", f"报告已生成并保存到:\n{filename}")
-            else:
+            output_dir = filedialog.askdirectory(title="选择报告保存目录")
+            if not output_dir:
                 self.status_bar.config(text="报告生成已取消")
+                return
+
+            job_id = self.report_workers.submit(template_name, output_dir, vins=vins,
+                                                output_format=REPORT_FORMATS[output_format])
+            if job_id is None:
+                messagebox.showerror("错误", "报告任务提交失败")
+                return
+
+            self.status_bar.config(text=f"报告任务 #{job_id} 已提交，共 {len(vins)} 份")
+            self.root.after(JOB_POLL_INTERVAL_MS, self.poll_report_job, job_id)
 
         except Exception as e:
             messagebox.showerror("错误", f"报告生成过程中出现错误: {e}")
 
+    def poll_report_job(self, job_id: int):
+        """定时查询报告任务进度并显示在状态栏"""
+        status = self.report_workers.status(job_id)
+        if not status:
+            return
+
+        done = status['completed_items'] + status['failed_items']
+        if status['status'] in ('completed', 'cancelled'):
+            self.status_bar.config(
+                text=f"报告任务 #{job_id} 完成: 成功 {status['completed_items']} 份, 失败 {status['failed_items']} 份")
+            if status['failed_items']:
+                messagebox.showwarning("警告", f"报告任务 #{job_id} 有 {status['failed_items']} 份报告生成失败")
+            return
+
+        # 工作进程异常退出后，租约到期的任务项由重新启动的工作进程继续
+        if not self.report_workers.is_running() and self.report_workers.queue.pending_count():
+            self.report_workers.start()
+
+        self.status_bar.config(text=f"报告任务 #{job_id} 进行中: {done}/{status['total_items']}")
+        self.root.after(JOB_POLL_INTERVAL_MS, self.poll_report_job, job_id)
+
     def test_database_connection(self):
         """测试数据库连接"""
         try:
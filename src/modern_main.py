@@ -655,7 +655,7 @@ class ModernCarDataProcessor(QMainWindow):
             self,
             "选择Excel文件",
             "",
-            "Excel文件 (*.xlsx *.xls);;所有文件 (*.*)"
+            "Excel文件 (*.xlsx *.xlsm *.xlsb *.xls *.csv *.tsv);;所有文件 (*.*)"
         )
 
         for file_path in files:
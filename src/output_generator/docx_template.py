@@ -0,0 +1,174 @@
+"""
+Word模板编译缓存
+Compiled DOCX Templates
+
+模板只解析一次：
+- 合并被Word拆分到多个run中的占位符（如 "[VIN" + "码]"），保留第一个run的格式
+- 将正文、页眉、页脚的XML序列化后按占位符切分为 文本片段/占位符 交替的列表
+生成报告时只需拼接片段并写入新的docx压缩包，不再解析XML、遍历段落和表格。
+"""
+
+import os
+import re
+import zipfile
+import logging
+import threading
+from xml.sax.saxutils import escape
+from typing import Dict, List, Any
+
+logger = logging.getLogger(__name__)
+
+try:
+    from lxml import etree
+    LXML_AVAILABLE = True
+except ImportError:
+    LXML_AVAILABLE = False
+
+W_NS = 'http://schemas.openxmlformats.org/wordprocessingml/2006/main'
+W_P = f'{{{W_NS}}}p'
+W_T = f'{{{W_NS}}}t'
+XML_SPACE = '{http://www.w3.org/XML/1998/namespace}space'
+
+# 包含占位符的文档部件
+TEMPLATE_PART_RE = re.compile(r'^word/(document|header\d*|footer\d*)\.xml$')
+
+# 占位符格式：[字段名]
+PLACEHOLDER_RE = re.compile(r'\[[^\[\]\r\n]{1,50}\]')
+
+# 编译时标记占位符位置的私用区字符（不会出现在正常文档中）
+_SLOT_START, _SLOT_END = '\ue000', '\ue001'
+_SLOT_RE = re.compile(f'{_SLOT_START}(\\d+){_SLOT_END}')
+
+_cache = {}
+_cache_lock = threading.Lock()
+
+def compile_docx_template(template_path: str) -> 'CompiledDocxTemplate':
+    """编译模板（按路径、修改时间、大小缓存，模板文件变更后自动重新编译）"""
+    stat = os.stat(template_path)
+    key = (os.path.abspath(template_path), stat.st_mtime_ns, stat.st_size)
+    with _cache_lock:
+        template = _cache.get(key)
+    if template is None:
+        template = CompiledDocxTemplate(template_path)
+        with _cache_lock:
+            # 同一路径只保留最新版本
+            for old_key in [k for k in _cache if k[0] == key[0]]:
+                del _cache[old_key]
+            _cache[key] = template
+    return template
+
+class CompiledDocxTemplate:
+    """已编译的Word模板"""
+
+    def __init__(self, template_path: str):
+        if not LXML_AVAILABLE:
+            raise ImportError("编译Word模板需要安装 lxml")
+
+        self.template_path = template_path
+        # 压缩包各条目：(条目信息, 原始内容 或 None表示模板部件)
+        self._entries = []
+        # 模板部件：{条目名: [文本片段, 占位符, 文本片段, ...]}，奇数位置为占位符
+        self._parts = {}
+
+        with zipfile.ZipFile(template_path) as archive:
+            for info in archive.infolist():
+                data = archive.read(info.filename)
+                if TEMPLATE_PART_RE.match(info.filename):
+                    fragments = self._compile_part(data)
+                    if len(fragments) > 1:
+                        self._parts[info.filename] = fragments
+                        self._entries.append((info, None))
+                        continue
+                self._entries.append((info, data))
+
+        logger.info(f"Word模板已编译: {template_path} ({len(self.placeholders)} 个占位符)")
+
+    @property
+    def placeholders(self) -> List[str]:
+        """模板中出现的占位符（按出现顺序，去重）"""
+        seen = {}
+        for fragments in self._parts.values():
+            for placeholder in fragments[1::2]:
+                seen.setdefault(placeholder, None)
+        return list(seen)
+
+    def render(self, values: Dict[str, Any], output_path: str):
+        """
+        填充占位符并写出docx
+
+        Args:
+            values: {占位符: 值}，模板中存在但未提供的占位符保持原样
+        """
+        with zipfile.ZipFile(output_path, 'w', zipfile.ZIP_DEFLATED) as archive:
+            for info, data in self._entries:
+                entry = zipfile.ZipInfo(info.filename, date_time=info.date_time)
+                entry.compress_type = zipfile.ZIP_DEFLATED
+                entry.external_attr = info.external_attr
+                if data is None:
+                    data = self._render_part(self._parts[info.filename], values)
+                archive.writestr(entry, data)
+
+    def _render_part(self, fragments: List[str], values: Dict[str, Any]) -> bytes:
+        """拼接一个部件的片段"""
+        rendered = fragments[:]
+        for i in range(1, len(rendered), 2):
+            placeholder = rendered[i]
+            value = values.get(placeholder, placeholder)
+            rendered[i] = escape('' if value is None else str(value))
+        return ''.join(rendered).encode('utf-8')
+
+    def _compile_part(self, data: bytes) -> List[str]:
+        """编译一个XML部件为片段列表"""
+        root = etree.fromstring(data)
+        slots = []
+        for paragraph in root.iter(W_P):
+            texts = [node for node in paragraph.iter(W_T) if _owning_paragraph(node) is paragraph]
+            if texts:
+                self._mark_paragraph(texts, slots)
+
+        if not slots:
+            return [data.decode('utf-8')]
+
+        xml = etree.tostring(root, xml_declaration=True, encoding='UTF-8', standalone=True).decode('utf-8')
+        parts = _SLOT_RE.split(xml)
+        # split 后奇数位置为占位符编号
+        for i in range(1, len(parts), 2):
+            parts[i] = slots[int(parts[i])]
+        return parts
+
+    def _mark_paragraph(self, texts: List[Any], slots: List[str]):
+        """合并段落中跨run的占位符，并替换为位置标记"""
+        full = ''.join(node.text or '' for node in texts)
+        matches = list(PLACEHOLDER_RE.finditer(full))
+        if not matches:
+            return
+
+        # 每个字符所在的文本节点及偏移
+        positions = []
+        for index, node in enumerate(texts):
+            positions.extend((index, offset) for offset in range(len(node.text or '')))
+
+        # 从后往前处理，前面占位符的偏移不受影响
+        for match in reversed(matches):
+            first, start = positions[match.start()]
+            last, end = positions[match.end() - 1]
+            marker = f"{_SLOT_START}{len(slots)}{_SLOT_END}"
+            slots.append(match.group())
+
+            if first == last:
+                node = texts[first]
+                node.text = node.text[:start] + marker + node.text[end + 1:]
+            else:
+                texts[first].text = texts[first].text[:start] + marker
+                for index in range(first + 1, last):
+                    texts[index].text = ''
+                texts[last].text = texts[last].text[end + 1:]
+            # 值可能带首尾空格，需要保留
+            texts[first].set(XML_SPACE, 'preserve')
+
+def _owning_paragraph(node):
+    """文本节点所属的最近段落（嵌套段落如文本框中的文字归属内层段落）"""
+    parent = node.getparent()
+    while parent is not None and parent.tag != W_P:
+        parent = parent.getparent()
+    return parent
@@ -0,0 +1,129 @@
+"""
+流式Excel报告写入
+Streaming Excel Report Writer
+
+车队级报告一个工作簿包含数万辆车，使用 openpyxl 只写模式逐行写出，内存占用与记录数无关：
+- rows 模式：一个工作表，每辆车一行（超过Excel行数上限时自动续写到新工作表）
+- sheets 模式：每份报告一个工作表，内容为 项目/值 两列
+"""
+
+import re
+import logging
+from typing import List, Any, Iterable, Optional
+
+logger = logging.getLogger(__name__)
+
+try:
+    from openpyxl import Workbook
+    from openpyxl.cell import WriteOnlyCell
+    from openpyxl.styles import Font
+    OPENPYXL_AVAILABLE = True
+except ImportError:
+    OPENPYXL_AVAILABLE = False
+
+# 支持的写入模式
+EXCEL_LAYOUTS = ('rows', 'sheets')
+
+# Excel 单个工作表的最大行数
+MAX_SHEET_ROWS = 1048576
+
+# 工作表名称最大长度及不允许的字符
+MAX_SHEET_TITLE = 31
+_INVALID_TITLE_RE = re.compile(r'[\[\]:*?/\\]')
+
+class ExcelReportWriter:
+    """只写模式的Excel报告工作簿"""
+
+    def __init__(self, output_path: str, columns: List[str], layout: str = 'rows',
+                 sheet_title: str = '检测报告', max_rows: int = MAX_SHEET_ROWS):
+        """
+        Args:
+            output_path: 输出文件
+            columns: 字段名（rows 模式为表头，sheets 模式为每个工作表的项目列）
+            layout: rows（每辆车一行）或 sheets（每份报告一个工作表）
+            sheet_title: rows 模式的工作表名称
+            max_rows: rows 模式单个工作表的最大行数（含表头）
+        """
+        if not OPENPYXL_AVAILABLE:
+            raise ImportError("流式写入Excel需要安装 openpyxl")
+        if layout not in EXCEL_LAYOUTS:
+            raise ValueError(f"不支持的Excel写入模式: {layout}")
+
+        self.output_path = output_path
+        self.columns = list(columns)
+        self.layout = layout
+        self.sheet_title = sheet_title
+        self.max_rows = max_rows
+        self.record_count = 0
+
+        self._workbook = Workbook(write_only=True)
+        self._sheet = None
+        self._sheet_rows = 0
+        self._titles = set()
+        self._header_font = Font(bold=True)
+
+    @property
+    def sheet_count(self) -> int:
+        """已创建的工作表数量"""
+        return len(self._titles)
+
+    def write(self, values: List[Any], title: Optional[str] = None):
+        """
+        写入一份报告
+
+        Args:
+            values: 与 columns 顺序一致的值
+            title: sheets 模式的工作表名称（rows 模式忽略）
+        """
+        if self.layout == 'rows':
+            if self._sheet is None or self._sheet_rows >= self.max_rows:
+                if self._sheet is not None:
+                    self._sheet.close()
+                self._sheet = self._create_sheet(self.sheet_title)
+                self._sheet.append(self._header(self._sheet, self.columns))
+                self._sheet_rows = 1
+            self._sheet.append(values)
+            self._sheet_rows += 1
+        else:
+            sheet = self._create_sheet(title or f"报告{self.record_count + 1}")
+            sheet.append(self._header(sheet, ['项目', '值']))
+            for column, value in zip(self.columns, values):
+                sheet.append([column, value])
+            # 写完立即关闭：只写工作表在关闭前一直占用一个打开的临时文件，数万个工作表会耗尽文件句柄
+            sheet.close()
+        self.record_count += 1
+
+    def write_all(self, rows: Iterable[tuple]) -> int:
+        """写入 (values, title) 序列，返回写入数量"""
+        for values, title in rows:
+            self.write(values, title)
+        return self.record_count
+
+    def save(self):
+        """保存工作簿（只写模式只能保存一次）"""
+        if self._sheet is None and not self._titles:
+            # 没有记录时也输出带表头的空表
+            self._sheet = self._create_sheet(self.sheet_title)
+            self._sheet.append(self._header(self._sheet, self.columns if self.layout == 'rows' else ['项目', '值']))
+        self._workbook.save(self.output_path)
+        logger.info(f"Excel报告已写入: {self.output_path} ({self.record_count} 份, {self.sheet_count} 个工作表)")
+
+    def _create_sheet(self, title: str):
+        """创建工作表，名称去掉非法字符、截断并保证唯一"""
+        base = _INVALID_TITLE_RE.sub('_', str(title)).strip("'")[:MAX_SHEET_TITLE] or 'Sheet'
+        candidate, number = base, 1
+        while candidate.lower() in self._titles:
+            number += 1
+            suffix = f"_{number}"
+            candidate = base[:MAX_SHEET_TITLE - len(suffix)] + suffix
+        self._titles.add(candidate.lower())
+        return self._workbook.create_sheet(candidate)
+
+    def _header(self, sheet, names: List[str]) -> List[Any]:
+        """加粗的表头行"""
+        cells = []
+        for name in names:
+            cell = WriteOnlyCell(sheet, value=name)
+            cell.font = self._header_font
+            cells.append(cell)
+        return cells
@@ -0,0 +1,213 @@
+"""
+PDF渲染上下文
+PDF Render Context
+
+字体注册、段落样式和表格样式在进程内只创建一次，每份报告只构建自身的内容：
+- 注册 reportlab 内置的中文CID字体 STSong-Light（无需字体文件），标题和表格中的中文正常显示
+- 标题样式、表格样式预先计算，批量生成时复用
+- 批量报告可合并为一个PDF（目录 + 书签），报告内容逐份生成并写入版面，不会一次构建全部报告
+"""
+
+import logging
+import functools
+from typing import Dict, List, Any, Iterable
+
+logger = logging.getLogger(__name__)
+
+try:
+    from reportlab.lib import colors
+    from reportlab.lib.pagesizes import A4
+    from reportlab.lib.units import inch
+    from reportlab.lib.styles import getSampleStyleSheet, ParagraphStyle
+    from reportlab.pdfbase import pdfmetrics
+    from reportlab.pdfbase.cidfonts import UnicodeCIDFont
+    from reportlab.platypus import SimpleDocTemplate, Paragraph, Spacer, Table, TableStyle, PageBreak, Flowable
+    REPORTLAB_AVAILABLE = True
+except ImportError:
+    REPORTLAB_AVAILABLE = False
+
+# 中文字体（reportlab 内置的CID字体，Adobe 简体中文字符集）
+CJK_FONT = 'STSong-Light'
+
+# 中文字体注册失败时使用的字体
+FALLBACK_FONT = 'Helvetica'
+
+# 报告标题
+REPORT_TITLE = '车辆检测报告'
+
+# 合并报告的目录标题及目录行高
+TOC_TITLE = '目录'
+TOC_LEADING = 16
+
+@functools.lru_cache(maxsize=None)
+def register_cjk_font() -> str:
+    """注册中文字体（每个进程一次），返回可用的字体名称"""
+    try:
+        pdfmetrics.registerFont(UnicodeCIDFont(CJK_FONT))
+        return CJK_FONT
+    except Exception as e:
+        logger.warning(f"注册中文字体失败，使用 {FALLBACK_FONT}: {e}")
+        return FALLBACK_FONT
+
+@functools.lru_cache(maxsize=None)
+def get_render_context() -> 'PDFRenderContext':
+    """进程内共享的渲染上下文"""
+    return PDFRenderContext()
+
+class PDFRenderContext:
+    """预先创建的字体、样式和表格模板"""
+
+    def __init__(self):
+        if not REPORTLAB_AVAILABLE:
+            raise ImportError("生成PDF需要安装 reportlab")
+
+        self.font = register_cjk_font()
+        self.pagesize = A4
+        self.col_widths = [3 * inch, 4 * inch]
+        self.toc_font_size = 10
+
+        styles = getSampleStyleSheet()
+        self.title_style = ParagraphStyle(
+            'ReportTitle',
+            parent=styles['Heading1'],
+            fontName=self.font,
+            fontSize=16,
+            spaceAfter=30,
+            alignment=1  # 居中
+        )
+        self.body_style = ParagraphStyle(
+            'ReportBody',
+            parent=styles['Normal'],
+            fontName=self.font,
+            fontSize=10,
+            leading=14
+        )
+        self.table_style = TableStyle([
+            ('BACKGROUND', (0, 0), (-1, 0), colors.grey),
+            ('TEXTCOLOR', (0, 0), (-1, 0), colors.whitesmoke),
+            ('ALIGN', (0, 0), (-1, -1), 'LEFT'),
+            ('FONTNAME', (0, 0), (-1, -1), self.font),
+            ('FONTSIZE', (0, 0), (-1, 0), 12),
+            ('BOTTOMPADDING', (0, 0), (-1, 0), 12),
+            ('BACKGROUND', (0, 1), (-1, -1), colors.beige),
+            ('GRID', (0, 0), (-1, -1), 1, colors.black)
+        ])
+
+    def table_rows(self, data: Dict[str, Any]) -> List[List[Any]]:
+        """报告数据中的占位符转换为 [字段名, 值] 行"""
+        return [
+            [placeholder[1:-1], value]
+            for placeholder, value in data.items()
+            if placeholder.startswith('[') and placeholder.endswith(']')
+        ]
+
+    def report_story(self, data: Dict[str, Any], title: str = REPORT_TITLE) -> List[Any]:
+        """一份报告的内容（标题 + 信息表格）"""
+        story = [Paragraph(title, self.title_style), Spacer(1, 20)]
+        rows = self.table_rows(data)
+        if rows:
+            table = Table(rows, colWidths=self.col_widths)
+            table.setStyle(self.table_style)
+            story.append(table)
+        return story
+
+    def build(self, data: Dict[str, Any], output_path: str):
+        """生成单份报告PDF"""
+        doc = SimpleDocTemplate(output_path, pagesize=self.pagesize)
+        doc.build(self.report_story(data))
+
+    def build_bundle(self, titles: List[str], reports: Iterable[Dict[str, Any]], output_path: str) -> int:
+        """
+        将多份报告合并为一个PDF：开头为目录，每份报告从新的一页开始，并添加书签
+
+        目录需要预先知道各报告的标题；页码在报告排版到对应页时才确定，
+        目录中的页码以PDF表单(XObject)的形式先引用、后定义，因此只需排版一遍。
+
+        Args:
+            titles: 各报告的标题（目录和书签中显示）
+            reports: 与 titles 顺序一致的报告数据，逐份取用（可以是生成器）
+            output_path: 输出文件
+
+        Returns:
+            总页数
+        """
+        doc = SimpleDocTemplate(output_path, pagesize=self.pagesize)
+
+        def stories():
+            # 目录行已排版后不能再被生成器引用，因此不保存到局部变量
+            yield [_BundleAnchor('toc', TOC_TITLE), Paragraph(TOC_TITLE, self.title_style)] + [
+                _TOCEntry(index, title, self.font, self.toc_font_size) for index, title in enumerate(titles)
+            ]
+            for index, (title, data) in enumerate(zip(titles, reports)):
+                yield [PageBreak(), _BundleAnchor(f'report_{index}', title, index, self.font, self.toc_font_size)]
+                yield self.report_story(data)
+
+        doc.build(_StreamingStory(stories()))
+        return doc.page
+
+class _StreamingStory(list):
+    """按需从生成器补充内容的排版队列：已排版的内容随即被移出，不会同时驻留全部报告"""
+
+    def __init__(self, chunks: Iterable[List[Any]]):
+        super().__init__()
+        self._chunks = iter(chunks)
+
+    def __len__(self):
+        while not super().__len__():
+            chunk = next(self._chunks, None)
+            if chunk is None:
+                break
+            self.extend(chunk)
+        return super().__len__()
+
+class _BundleAnchor(Flowable):
+    """不占空间的标记：在所在页添加书签，并定义目录中引用的页码表单"""
+
+    def __init__(self, key: str, title: str, index: int = None, font: str = None, font_size: int = 10):
+        super().__init__()
+        self.key = key
+        self.title = title
+        self.index = index
+        self.font = font
+        self.font_size = font_size
+
+    def wrap(self, available_width, available_height):
+        return 0, 0
+
+    def draw(self):
+        canvas = self.canv
+        canvas.bookmarkPage(self.key)
+        canvas.addOutlineEntry(self.title, self.key, level=0)
+        if self.index is not None:
+            canvas.beginForm(_page_form_name(self.index), lowerx=-60, lowery=-4, upperx=0, uppery=self.font_size + 4)
+            canvas.setFont(self.font, self.font_size)
+            canvas.drawRightString(0, 0, str(canvas.getPageNumber()))
+            canvas.endForm()
+
+class _TOCEntry(Flowable):
+    """目录中的一行：标题 + 页码（页码表单在报告排版时才定义），点击跳转到报告"""
+
+    def __init__(self, index: int, title: str, font: str, font_size: int):
+        super().__init__()
+        self.index = index
+        self.title = title
+        self.font = font
+        self.font_size = font_size
+
+    def wrap(self, available_width, available_height):
+        self.width = available_width
+        return available_width, TOC_LEADING
+
+    def draw(self):
+        canvas = self.canv
+        canvas.setFont(self.font, self.font_size)
+        canvas.drawString(0, 4, f"{self.index + 1}. {self.title}")
+        canvas.saveState()
+        canvas.translate(self.width, 4)
+        canvas.doForm(_page_form_name(self.index))
+        canvas.restoreState()
+        canvas.linkRect('', f'report_{self.index}', (0, 0, self.width, TOC_LEADING), relative=1)
+
+def _page_form_name(index: int) -> str:
+    """目录页码表单名称"""
+    return f'toc_page_{index}'
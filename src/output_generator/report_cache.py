@@ -0,0 +1,80 @@
+"""
+报告输出缓存
+Report Output Cache
+
+按内容寻址缓存已生成的报告文件，月度重跑时数据未变化的车辆不再重新渲染：
+- 缓存键为 模板名称、模板版本、输出格式 与准备后的报告数据（不含生成日期/时间）的SHA256
+- 报告文件以 <缓存键>.<扩展名> 存放在缓存目录，命中时硬链接到输出路径（跨文件系统时复制）
+- 硬链接与缓存文件共用同一份数据，不要原地修改输出的报告文件
+"""
+
+import os
+import json
+import shutil
+import hashlib
+import logging
+from pathlib import Path
+from typing import Dict, Any, Optional
+
+logger = logging.getLogger(__name__)
+
+# 默认缓存目录
+DEFAULT_CACHE_DIR = Path(__file__).parent.parent.parent / 'data' / 'report_cache'
+
+# 不参与缓存键的字段（每次生成都会变化，但不影响报告内容是否需要更新）
+VOLATILE_FIELDS = frozenset({'[生成日期]', '[生成时间]'})
+
+class ReportCache:
+    """内容寻址的报告文件缓存"""
+
+    def __init__(self, directory: Optional[str] = None):
+        self.directory = Path(directory) if directory else DEFAULT_CACHE_DIR
+
+    def key(self, template_name: str, template_version: str, output_format: str,
+            prepared: Dict[str, Any]) -> str:
+        """计算缓存键"""
+        content = {placeholder: value for placeholder, value in prepared.items() if placeholder not in VOLATILE_FIELDS}
+        payload = json.dumps([template_name, template_version, output_format.lower(), content],
+                             ensure_ascii=False, sort_keys=True, default=str)
+        return hashlib.sha256(payload.encode('utf-8')).hexdigest()
+
+    def path(self, key: str, extension: str) -> Path:
+        """缓存文件路径"""
+        return self.directory / key[:2] / f"{key}.{extension}"
+
+    def fetch(self, key: str, extension: str, output_path: str) -> bool:
+        """缓存命中时将缓存文件链接到输出路径，未命中返回False"""
+        cached = self.path(key, extension)
+        if not cached.exists():
+            return False
+        try:
+            _link_or_copy(cached, Path(output_path))
+            return True
+        except OSError as e:
+            logger.warning(f"复用缓存报告失败: {e}")
+            return False
+
+    def store(self, key: str, extension: str, output_path: str) -> Optional[str]:
+        """将新生成的报告加入缓存，返回缓存文件路径"""
+        cached = self.path(key, extension)
+        try:
+            cached.parent.mkdir(parents=True, exist_ok=True)
+            # 先链接到临时文件再替换，多个进程同时写入同一缓存键时不会得到不完整的文件
+            temp_path = cached.with_name(f"{cached.name}.{os.getpid()}.tmp")
+            _link_or_copy(Path(output_path), temp_path)
+            os.replace(temp_path, cached)
+            return str(cached)
+        except OSError as e:
+            logger.warning(f"写入报告缓存失败: {e}")
+            return None
+
+def _link_or_copy(source: Path, target: Path):
+    """硬链接文件，跨文件系统等无法链接时复制"""
+    if source.resolve() == target.resolve():
+        return
+    if target.exists():
+        target.unlink()
+    try:
+        os.link(source, target)
+    except OSError:
+        shutil.copy2(source, target)
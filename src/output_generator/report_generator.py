@@ -4,27 +4,26 @@ Report Generator
 """
 
 import os
+import re
+import hashlib
 import logging
-from typing import Dict, List, Any, Optional
+import functools
+from typing import Dict, List, Any, Optional, Callable, Iterable
 from datetime import datetime
+from concurrent.futures import ProcessPoolExecutor, as_completed
 import json
 from pathlib import Path
 
 # 尝试导入不同的报告生成库
 try:
     from docx import Document
-    from docx.shared import Inches
     DOCX_AVAILABLE = True
 except ImportError:
     DOCX_AVAILABLE = False
 
+# PDF版面由 pdf_render 生成，这里只检测 reportlab 是否可用
 try:
-    from reportlab.pdfgen import canvas
-    from reportlab.lib.pagesizes import letter, A4
-    from reportlab.lib.units import inch
-    from reportlab.platypus import SimpleDocTemplate, Paragraph, Spacer, Table, TableStyle
-    from reportlab.lib.styles import getSampleStyleSheet, ParagraphStyle
-    from reportlab.lib import colors
+    import reportlab
     PDF_AVAILABLE = True
 except ImportError:
     PDF_AVAILABLE = False
@@ -35,17 +34,79 @@ try:
 except ImportError:
     EXCEL_AVAILABLE = False
 
+from .docx_template import compile_docx_template
+from .pdf_render import get_render_context
+from .excel_writer import ExcelReportWriter, OPENPYXL_AVAILABLE
+from .report_cache import ReportCache
+
 logger = logging.getLogger(__name__)
 
+# 输出格式对应的文件扩展名
+FORMAT_EXTENSIONS = {
+    'pdf': 'pdf',
+    'docx': 'docx',
+    'excel': 'xlsx'
+}
+
+# 文件名中不允许出现的字符
+_UNSAFE_FILENAME_RE = re.compile(r'[\\/:*?"<>|\s]+')
+
+# 报告版式版本（修改PDF/Excel等代码生成的版式时递增，使已缓存的报告失效）
+RENDER_VERSION = 1
+
+# 日期字段格式
+DATE_FORMAT = '%Y年%m月%d日'
+TIME_FORMAT = '%H:%M:%S'
+
+@functools.lru_cache(maxsize=1024)
+def compile_field_path(field_path: str) -> Callable[[Any], Any]:
+    """编译字段路径（如 "vehicle.vin"）为取值函数，路径不存在时返回None"""
+    keys = tuple(field_path.split('.'))
+    if len(keys) == 1:
+        key = keys[0]
+        return lambda data: data.get(key) if isinstance(data, dict) else None
+
+    def accessor(data):
+        for key in keys:
+            if not isinstance(data, dict) or key not in data:
+                return None
+            data = data[key]
+        return data
+    return accessor
+
+@functools.lru_cache(maxsize=4096)
+def _format_datetime(value: datetime) -> str:
+    """日期格式化（同一批报告中的日期大量重复，缓存格式化结果）"""
+    return value.strftime(DATE_FORMAT)
+
+# 按值类型的格式化函数（未列出的类型使用 str）
+_VALUE_FORMATTERS = {
+    type(None): lambda value: "",
+    str: str,
+    int: str,
+    float: str,
+    datetime: _format_datetime
+}
+
 class ReportGenerator:
     """报告生成器"""
 
-    def __init__(self, template_dir: str = None):
+    def __init__(self, template_dir: str = None, cache_dir: str = None):
+        """
+        Args:
+            template_dir: 模板目录
+            cache_dir: 报告输出缓存目录，指定后内容未变化的报告直接复用已生成的文件
+        """
         if template_dir is None:
             template_dir = Path(__file__).parent.parent.parent / 'templates'
         self.template_dir = Path(template_dir)
         self.template_dir.mkdir(exist_ok=True)
+        self.cache = ReportCache(cache_dir) if cache_dir else None
         self.field_mappings = {}
+        # 已编译的字段映射 {映射内容: [(占位符, 取值函数)]}
+        self._compiled_fields = {}
+        # 最近一次生成时间对应的元数据字段
+        self._generation_stamp = (None, {})
         self.load_default_mappings()
 
     def load_default_mappings(self):
@@ -84,7 +145,8 @@ class ReportGenerator:
                        data: Dict[str, Any],
                        template_name: str,
                        output_path: str,
-                       output_format: str = 'pdf') -> bool:
+                       output_format: str = 'pdf',
+                       generated_at: Optional[datetime] = None) -> bool:
         """
         生成报告
 
@@ -93,10 +155,16 @@ class ReportGenerator:
             template_name: 模板名称
             output_path: 输出路径
             output_format: 输出格式 (pdf, docx, excel)
+            generated_at: 报告中的生成时间，默认为当前时间
 
         Returns:
             是否生成成功
         """
+        return self._generate(data, template_name, output_path, output_format, generated_at)[0]
+
+    def _generate(self, data: Dict[str, Any], template_name: str, output_path: str,
+                  output_format: str = 'pdf', generated_at: Optional[datetime] = None) -> tuple:
+        """生成报告，返回 (是否成功, 报告清单项)，未启用缓存时清单项为None"""
         try:
             logger.info(f"开始生成报告: {template_name} -> {output_path}")
 
@@ -104,75 +172,131 @@ class ReportGenerator:
             template_config = self.field_mappings.get(template_name)
             if not template_config:
                 logger.error(f"未找到模板配置: {template_name}")
-                return False
+                return False, None
 
             # 准备数据
-            prepared_data = self._prepare_data(data, template_config)
-
-            # 根据格式生成报告
+            prepared_data = self._prepare_data(data, template_config, generated_at)
+
+            # 内容未变化的报告直接复用缓存的文件
+            entry = None
+            if self.cache is not None:
+                entry = self._manifest_entry(data, template_name, template_config, output_format,
+                                             prepared_data, output_path)
+                if self.cache.fetch(entry['cache_key'], entry['extension'], output_path):
+                    entry['reused'] = True
+                    entry['stored_file'] = str(self.cache.path(entry['cache_key'], entry['extension']))
+                    logger.info(f"报告内容未变化，复用已生成的文件: {output_path}")
+                    return True, entry
+
+            # 先渲染到临时文件再替换输出路径：输出路径可能仍硬链接着上次复用的缓存文件，
+            # 直接写入会截断共用的文件，改写缓存中其他数据的报告
+            render_path = _render_path(output_path)
             if output_format.lower() == 'pdf':
-                success = self._generate_pdf_report(prepared_data, template_config, output_path)
+                success = self._generate_pdf_report(prepared_data, template_config, render_path)
             elif output_format.lower() == 'docx':
-                success = self._generate_docx_report(prepared_data, template_config, output_path)
+                success = self._generate_docx_report(prepared_data, template_config, render_path)
             elif output_format.lower() == 'excel':
-                success = self._generate_excel_report(prepared_data, template_config, output_path)
+                success = self._generate_excel_report(prepared_data, template_config, render_path)
             else:
                 logger.error(f"不支持的输出格式: {output_format}")
-                return False
+                return False, None
+
+            if success:
+                os.replace(render_path, output_path)
+            elif os.path.exists(render_path):
+                os.remove(render_path)
 
             if success:
+                if entry is not None:
+                    entry['stored_file'] = self.cache.store(entry['cache_key'], entry['extension'], output_path)
                 logger.info(f"报告生成成功: {output_path}")
-                return True
+                return True, entry
             else:
                 logger.error("报告生成失败")
-                return False
+                return False, None
 
         except Exception as e:
             logger.error(f"生成报告时出错: {e}")
-            return False
+            return False, None
 
-    def _prepare_data(self, data: Dict[str, Any], template_config: Dict[str, Any]) -> Dict[str, Any]:
-        """准备报告数据"""
-        prepared = {}
-        fields = template_config['fields']
+    def _template_version(self, template_config: Dict[str, Any], output_format: str) -> str:
+        """模板版本：字段映射、代码版式版本及Word模板文件的修改时间和大小"""
+        digest = hashlib.sha1(f"{RENDER_VERSION}|".encode('utf-8'))
+        digest.update(json.dumps(template_config['fields'], ensure_ascii=False, sort_keys=True).encode('utf-8'))
+        if output_format.lower() == 'docx':
+            template_file = self.template_dir / template_config['template_file']
+            if template_file.exists():
+                stat = template_file.stat()
+                digest.update(f"|{stat.st_mtime_ns}|{stat.st_size}".encode('utf-8'))
+        return digest.hexdigest()
+
+    def _manifest_entry(self, data: Dict[str, Any], template_name: str, template_config: Dict[str, Any],
+                        output_format: str, prepared_data: Dict[str, Any], output_path: str) -> Dict[str, Any]:
+        """报告清单项（缓存键及输出文件等）"""
+        template_version = self._template_version(template_config, output_format)
+        vin = self._get_nested_value(data, 'vin')
+        return {
+            'cache_key': self.cache.key(template_name, template_version, output_format, prepared_data),
+            'extension': FORMAT_EXTENSIONS.get(output_format.lower(), output_format.lower()),
+            'vin': str(vin) if vin not in (None, '') else None,
+            'template_name': template_name,
+            'template_version': template_version,
+            'output_format': output_format.lower(),
+            'report_file': output_path,
+            'stored_file': None,
+            'reused': False
+        }
 
-        for placeholder, field_name in fields.items():
-            # 支持嵌套字段访问，如 "vehicle.vin"
-            value = self._get_nested_value(data, field_name)
+    def _prepare_data(self, data: Dict[str, Any], template_config: Dict[str, Any],
+                      generated_at: Optional[datetime] = None) -> Dict[str, Any]:
+        """
+        准备报告数据
 
-            # 格式化值
-            formatted_value = self._format_value(value)
-            prepared[placeholder] = formatted_value
+        Args:
+            generated_at: 生成时间，批量生成时整批使用同一时间，默认为当前时间
+        """
+        format_value = self._format_value
+        # 支持嵌套字段访问，如 "vehicle.vin"
+        prepared = {
+            placeholder: format_value(accessor(data))
+            for placeholder, accessor in self._compile_fields(template_config)
+        }
 
         # 添加元数据
-        prepared['[生成日期]'] = datetime.now().strftime('%Y年%m月%d日')
-        prepared['[生成时间]'] = datetime.now().strftime('%H:%M:%S')
+        prepared.update(self._generation_fields(generated_at or datetime.now()))
 
         return prepared
 
+    def _compile_fields(self, template_config: Dict[str, Any]) -> List[tuple]:
+        """模板字段映射编译为 (占位符, 取值函数) 列表，映射内容不变时复用"""
+        key = tuple(template_config['fields'].items())
+        compiled = self._compiled_fields.get(key)
+        if compiled is None:
+            compiled = [(placeholder, compile_field_path(path)) for placeholder, path in key]
+            self._compiled_fields[key] = compiled
+        return compiled
+
+    def _generation_fields(self, generated_at: datetime) -> Dict[str, str]:
+        """生成日期/时间字段（同一生成时间只格式化一次）"""
+        stamp, fields = self._generation_stamp
+        if stamp != generated_at:
+            fields = {
+                '[生成日期]': generated_at.strftime(DATE_FORMAT),
+                '[生成时间]': generated_at.strftime(TIME_FORMAT)
+            }
+            self._generation_stamp = (generated_at, fields)
+        return fields
+
     def _get_nested_value(self, data: Dict[str, Any], field_path: str) -> Any:
         """获取嵌套字段值"""
-        keys = field_path.split('.')
-        value = data
-
-        for key in keys:
-            if isinstance(value, dict) and key in value:
-                value = value[key]
-            else:
-                return None
-
-        return value
+        return compile_field_path(field_path)(data)
 
     def _format_value(self, value: Any) -> str:
         """格式化值"""
-        if value is None:
-            return ""
-        elif isinstance(value, datetime):
-            return value.strftime('%Y年%m月%d日')
-        elif isinstance(value, (int, float)):
-            return str(value)
-        else:
-            return str(value)
+        formatter = _VALUE_FORMATTERS.get(type(value))
+        if formatter is None:
+            formatter = _format_datetime if isinstance(value, datetime) else str
+        return formatter(value)
 
     def _generate_pdf_report(self, data: Dict[str, Any], template_config: Dict[str, Any], output_path: str) -> bool:
         """生成PDF报告"""
@@ -181,43 +305,8 @@ class ReportGenerator:
             return False
 
         try:
-            doc = SimpleDocTemplate(output_path, pagesize=A4)
-            styles = getSampleStyleSheet()
-            story = []
-
-            # 标题
-            title_style = ParagraphStyle(
-                'CustomTitle',
-                parent=styles['Heading1'],
-                fontSize=16,
-                spaceAfter=30,
-                alignment=1  # 居中
-            )
-            story.append(Paragraph("车辆检测报告", title_style))
-            story.append(Spacer(1, 20))
-
-            # 信息表格
-            table_data = []
-            for placeholder, value in data.items():
-                if placeholder.startswith('[') and placeholder.endswith(']'):
-                    field_name = placeholder[1:-1]  # 去掉方括号
-                    table_data.append([field_name, value])
-
-            if table_data:
-                table = Table(table_data, colWidths=[3*inch, 4*inch])
-                table.setStyle(TableStyle([
-                    ('BACKGROUND', (0, 0), (-1, 0), colors.grey),
-                    ('TEXTCOLOR', (0, 0), (-1, 0), colors.whitesmoke),
-                    ('ALIGN', (0, 0), (-1, -1), 'LEFT'),
-                    ('FONTNAME', (0, 0), (-1, 0), 'Helvetica-Bold'),
-                    ('FONTSIZE', (0, 0), (-1, 0), 12),
-                    ('BOTTOMPADDING', (0, 0), (-1, 0), 12),
-                    ('BACKGROUND', (0, 1), (-1, -1), colors.beige),
-                    ('GRID', (0, 0), (-1, -1), 1, colors.black)
-                ]))
-                story.append(table)
-
-            doc.build(story)
+            # 字体和样式在渲染上下文中只创建一次
+            get_render_context().build(data, output_path)
             return True
 
         except Exception as e:
@@ -234,14 +323,13 @@ class ReportGenerator:
             template_file = self.template_dir / template_config['template_file']
 
             if template_file.exists():
-                # 使用模板
-                doc = Document(str(template_file))
-                self._replace_placeholders(doc, data)
-            else:
-                # 创建新文档
-                doc = Document()
-                self._create_docx_content(doc, data)
+                # 使用编译缓存的模板，只填充占位符位置，保留原有格式
+                compile_docx_template(str(template_file)).render(data, output_path)
+                return True
 
+            # 创建新文档
+            doc = Document()
+            self._create_docx_content(doc, data)
             doc.save(output_path)
             return True
 
@@ -249,21 +337,6 @@ class ReportGenerator:
             logger.error(f"生成Word报告失败: {e}")
             return False
 
-    def _replace_placeholders(self, doc, data: Dict[str, Any]):
-        """替换文档中的占位符"""
-        for paragraph in doc.paragraphs:
-            for placeholder, value in data.items():
-                if placeholder in paragraph.text:
-                    paragraph.text = paragraph.text.replace(placeholder, str(value))
-
-        # 处理表格中的占位符
-        for table in doc.tables:
-            for row in table.rows:
-                for cell in row.cells:
-                    for placeholder, value in data.items():
-                        if placeholder in cell.text:
-                            cell.text = cell.text.replace(placeholder, str(value))
-
     def _create_docx_content(self, doc, data: Dict[str, Any]):
         """创建Word文档内容"""
         # 添加标题
@@ -303,6 +376,101 @@ class ReportGenerator:
             logger.error(f"生成Excel报告失败: {e}")
             return False
 
+    def bundle_pdf_report(self,
+                          data_list: List[Dict[str, Any]],
+                          template_name: str,
+                          output_path: str,
+                          title_field: str = 'vin') -> Dict[str, Any]:
+        """
+        将一批报告合并为一个PDF（开头为目录，每辆车从新的一页开始，每份报告一个书签）
+
+        Args:
+            data_list: 报告数据列表
+            template_name: 模板名称
+            output_path: 输出文件
+            title_field: 目录和书签中显示的字段（如VIN）
+
+        Returns:
+            {'success': 是否成功, 'report_count': 报告数, 'page_count': 总页数, 'output_file': 输出文件}
+        """
+        result = {'success': False, 'report_count': len(data_list), 'page_count': 0, 'output_file': output_path}
+
+        if not PDF_AVAILABLE:
+            logger.error("PDF生成库未安装")
+            return result
+
+        template_config = self.field_mappings.get(template_name)
+        if not template_config:
+            logger.error(f"未找到模板配置: {template_name}")
+            return result
+
+        try:
+            titles = []
+            for i, data in enumerate(data_list):
+                value = self._get_nested_value(data, title_field) if title_field else None
+                titles.append(str(value) if value not in (None, '') else f"报告 {i + 1}")
+
+            # 报告数据在排版到该份报告时才准备，已排版的报告不再驻留内存；整批使用同一生成时间
+            generated_at = datetime.now()
+            reports = (self._prepare_data(data, template_config, generated_at) for data in data_list)
+            result['page_count'] = get_render_context().build_bundle(titles, reports, output_path)
+            result['success'] = True
+            logger.info(f"合并PDF报告生成成功: {output_path} ({len(data_list)} 份, {result['page_count']} 页)")
+
+        except Exception as e:
+            logger.error(f"生成合并PDF报告失败: {e}")
+
+        return result
+
+    def stream_excel_report(self,
+                            records: Iterable[Dict[str, Any]],
+                            template_name: str,
+                            output_path: str,
+                            layout: str = 'rows',
+                            name_field: str = 'vin') -> Dict[str, Any]:
+        """
+        将多条记录流式写入一个Excel工作簿（不构建DataFrame，内存占用与记录数无关）
+
+        Args:
+            records: 报告数据迭代器（可以是生成器）
+            template_name: 模板名称，决定输出的字段及顺序
+            output_path: 输出文件
+            layout: rows（一个工作表，每辆车一行）或 sheets（每份报告一个工作表）
+            name_field: sheets 模式用作工作表名称的字段
+
+        Returns:
+            {'success': 是否成功, 'record_count': 写入记录数, 'sheet_count': 工作表数, 'output_file': 输出文件}
+        """
+        result = {'success': False, 'record_count': 0, 'sheet_count': 0, 'output_file': output_path}
+
+        if not OPENPYXL_AVAILABLE:
+            logger.error("Excel生成库未安装")
+            return result
+
+        template_config = self.field_mappings.get(template_name)
+        if not template_config:
+            logger.error(f"未找到模板配置: {template_name}")
+            return result
+
+        try:
+            placeholders = list(template_config['fields'])
+            writer = ExcelReportWriter(output_path, [placeholder[1:-1] for placeholder in placeholders], layout)
+            generated_at = datetime.now()
+
+            for data in records:
+                prepared = self._prepare_data(data, template_config, generated_at)
+                title = self._get_nested_value(data, name_field) if layout == 'sheets' and name_field else None
+                writer.write([prepared[placeholder] for placeholder in placeholders],
+                             str(title) if title not in (None, '') else None)
+
+            writer.save()
+            result.update(success=True, record_count=writer.record_count, sheet_count=writer.sheet_count)
+
+        except Exception as e:
+            logger.error(f"流式生成Excel报告失败: {e}")
+
+        return result
+
     def create_template(self, template_name: str, template_type: str, fields: Dict[str, str]) -> bool:
         """创建新模板"""
         try:
@@ -369,38 +537,119 @@ class ReportGenerator:
                               data_list: List[Dict[str, Any]],
                               template_name: str,
                               output_dir: str,
-                              output_format: str = 'pdf') -> Dict[str, Any]:
-        """批量生成报告"""
+                              output_format: str = 'pdf',
+                              max_workers: int = 1,
+                              progress_callback: Optional[Callable[[int, int, int, Optional[str]], None]] = None,
+                              name_field: str = 'vin') -> Dict[str, Any]:
+        """
+        批量生成报告
+
+        Args:
+            data_list: 报告数据列表
+            template_name: 模板名称
+            output_dir: 输出目录
+            output_format: 输出格式 (pdf, docx, excel)
+            max_workers: 工作进程数，1 为在当前进程中依次生成，None 为CPU核数
+            progress_callback: 每完成一份报告回调 (已完成数, 总数, 数据项序号(从0开始), 输出文件或None)
+            name_field: 用于文件名的字段（如VIN），文件名为 report_<序号>_<字段值>.<扩展名>
+
+        Returns:
+            统计结果，output_files/failed_files 按 data_list 顺序排列；
+            启用缓存时 reused_count 为复用的报告数，manifest 为各报告的清单项
+        """
         results = {
             'success_count': 0,
             'failed_count': 0,
+            'reused_count': 0,
             'failed_files': [],
-            'output_files': []
+            'output_files': [],
+            'manifest': []
         }
 
         output_path = Path(output_dir)
-        output_path.mkdir(exist_ok=True)
-
-        for i, data in enumerate(data_list):
-            try:
-                # 生成文件名
-                timestamp = datetime.now().strftime('%Y%m%d_%H%M%S')
-                filename = f"report_{i+1}_{timestamp}.{output_format}"
-                file_path = output_path / filename
-
-                # 生成报告
-                success = self.generate_report(data, template_name, str(file_path), output_format)
-
-                if success:
-                    results['success_count'] += 1
-                    results['output_files'].append(str(file_path))
-                else:
-                    results['failed_count'] += 1
-                    results['failed_files'].append(f"数据项 {i+1}")
-
-            except Exception as e:
-                logger.error(f"批量生成报告时出错 (数据项 {i+1}): {e}")
+        output_path.mkdir(parents=True, exist_ok=True)
+
+        total = len(data_list)
+        # 整批报告使用同一生成时间
+        generated_at = datetime.now()
+        jobs = [
+            (data, template_name, str(output_path / self._report_filename(i, total, data, output_format, name_field)),
+             output_format, generated_at)
+            for i, data in enumerate(data_list)
+        ]
+        outcomes = [None] * total
+
+        def record(index: int, outcome: tuple, done: int):
+            outcomes[index] = outcome
+            if progress_callback is not None:
+                try:
+                    progress_callback(done, total, index, jobs[index][2] if outcome[0] else None)
+                except Exception as e:
+                    logger.warning(f"进度回调出错: {e}")
+
+        workers = min(max_workers or os.cpu_count() or 1, total)
+        if workers <= 1:
+            for i, job in enumerate(jobs):
+                record(i, self._generate_job(job), i + 1)
+        else:
+            logger.info(f"并行生成报告: {total} 份, {workers} 个进程")
+            with ProcessPoolExecutor(max_workers=workers, initializer=_init_worker,
+                                     initargs=(str(self.template_dir), self.field_mappings,
+                                               str(self.cache.directory) if self.cache else None)) as executor:
+                futures = {executor.submit(_generate_in_worker, job): i for i, job in enumerate(jobs)}
+                for done, future in enumerate(as_completed(futures), 1):
+                    try:
+                        outcome = future.result()
+                    except Exception as e:
+                        outcome = (False, str(e), None)
+                    record(futures[future], outcome, done)
+
+        for i, (success, error, entry) in enumerate(outcomes):
+            if success:
+                results['success_count'] += 1
+                results['output_files'].append(jobs[i][2])
+                if entry is not None:
+                    results['manifest'].append(entry)
+                    results['reused_count'] += entry['reused']
+            else:
                 results['failed_count'] += 1
-                results['failed_files'].append(f"数据项 {i+1}: {str(e)}")
+                results['failed_files'].append(f"数据项 {i+1}: {error}" if error else f"数据项 {i+1}")
+
+        return results
 
-        return results
\ No newline at end of file
+    def _generate_job(self, job: tuple) -> tuple:
+        """生成一份报告，返回 (是否成功, 错误信息, 报告清单项)"""
+        data, template_name, file_path, output_format, generated_at = job
+        try:
+            success, entry = self._generate(data, template_name, file_path, output_format, generated_at)
+            return success, None, entry
+        except Exception as e:
+            logger.error(f"批量生成报告时出错 ({file_path}): {e}")
+            return False, str(e), None
+
+    def _report_filename(self, index: int, total: int, data: Dict[str, Any],
+                         output_format: str, name_field: str) -> str:
+        """确定性的报告文件名：序号补零保证排序，附带字段值便于识别"""
+        extension = FORMAT_EXTENSIONS.get(output_format.lower(), output_format.lower())
+        number = str(index + 1).zfill(max(4, len(str(total))))
+        value = self._get_nested_value(data, name_field) if name_field else None
+        label = _UNSAFE_FILENAME_RE.sub('_', str(value)).strip('._') if value not in (None, '') else ''
+        return f"report_{number}_{label}.{extension}" if label else f"report_{number}.{extension}"
+
+def _render_path(output_path: str) -> str:
+    """渲染用的临时文件（与输出文件同目录、同扩展名，按扩展名选择写入方式的库仍然适用）"""
+    path = Path(output_path)
+    return str(path.with_name(f".{path.stem}.{os.getpid()}.tmp{path.suffix}"))
+
+# 工作进程内的报告生成器（每个进程初始化一次）
+_worker_generator = None
+
+def _init_worker(template_dir: str, field_mappings: Dict[str, Any], cache_dir: Optional[str] = None):
+    """工作进程初始化：使用与主进程相同的模板目录、字段映射和报告缓存"""
+    global _worker_generator
+    _worker_generator = ReportGenerator(template_dir, cache_dir)
+    _worker_generator.field_mappings = field_mappings
+
+def _generate_in_worker(job: tuple) -> tuple:
+    """工作进程：生成一份报告"""
+    return _worker_generator._generate_job(job)
@@ -0,0 +1,211 @@
+"""
+查询-报告流水线
+Query to Report Pipeline
+
+按VIN列表或查询条件分批从数据库读取车辆信息，展开为报告模板使用的字段后生成报告：
+- 后台线程预取后续批次，数据库读取与报告渲染重叠进行
+- search_by_vin 的嵌套结果自动展开（vin、engine_code、emission_standard 等位于顶层）
+"""
+
+import queue
+import logging
+import threading
+from datetime import datetime
+from pathlib import Path
+from typing import Dict, List, Any, Optional, Callable, Iterator, Iterable
+
+logger = logging.getLogger(__name__)
+
+# 默认预取的批次数（队列中最多缓存的批次）
+DEFAULT_PREFETCH_BATCHES = 2
+
+# 展开时不提升到顶层的字段（各表都有，提升后含义不明确）
+_SECTION_PRIVATE_FIELDS = frozenset({'id', 'vehicle_id', 'created_at', 'updated_at'})
+
+# 展开到顶层的信息段，按优先级排列（同名字段以先出现的为准）
+_FLATTEN_SECTIONS = ('vehicle', 'engine', 'transmission', 'emission')
+
+# 预取线程结束标记
+_DONE = object()
+
+def flatten_vehicle_data(result: Dict[str, Any]) -> Dict[str, Any]:
+    """
+    将 search_by_vin 的嵌套结果展开为报告数据
+
+    车辆、发动机、变速箱、排放信息的字段提升到顶层（如 vin、engine_code、co2_emission），
+    原有信息段保留，仍可用 "engine.power" 这样的路径访问；
+    动态参数转换为 {参数名称: 参数值}，可用 "parameters.参数名称" 访问。
+    """
+    if not result:
+        return {}
+
+    flat = {}
+    for section in _FLATTEN_SECTIONS:
+        for key, value in (result.get(section) or {}).items():
+            if key not in _SECTION_PRIVATE_FIELDS and key not in flat:
+                flat[key] = value
+
+    for section in _FLATTEN_SECTIONS:
+        flat[section] = result.get(section)
+    flat['parameters'] = {
+        parameter['parameter_name']: parameter['parameter_value']
+        for parameter in result.get('parameters') or []
+    }
+    return flat
+
+def prefetch(batches: Iterable[Any], depth: int = DEFAULT_PREFETCH_BATCHES) -> Iterator[Any]:
+    """
+    在后台线程中提前读取后续批次
+
+    Args:
+        batches: 批次迭代器（如 QueryEngine.iter_vehicle_batches）
+        depth: 最多提前读取的批次数
+
+    Yields:
+        与 batches 相同顺序的批次；读取出错时在消费端重新抛出
+    """
+    buffer = queue.Queue(maxsize=max(1, depth))
+    stop = threading.Event()
+
+    def put(item) -> bool:
+        while not stop.is_set():
+            try:
+                buffer.put(item, timeout=0.1)
+                return True
+            except queue.Full:
+                continue
+        return False
+
+    def produce():
+        try:
+            for batch in batches:
+                if not put(batch):
+                    return
+        except Exception as e:
+            put(e)
+            return
+        put(_DONE)
+
+    worker = threading.Thread(target=produce, name='report-prefetch', daemon=True)
+    worker.start()
+    try:
+        while True:
+            item = buffer.get()
+            if item is _DONE:
+                return
+            if isinstance(item, Exception):
+                raise item
+            yield item
+    finally:
+        # 消费端提前结束时通知预取线程停止
+        stop.set()
+        worker.join()
+
+class ReportPipeline:
+    """数据库查询到报告生成的流水线"""
+
+    def __init__(self, query_engine, report_generator,
+                 batch_size: int = 100, prefetch_batches: int = DEFAULT_PREFETCH_BATCHES):
+        """
+        Args:
+            query_engine: QueryEngine 实例
+            report_generator: ReportGenerator 实例
+            batch_size: 每批从数据库读取的车辆数
+            prefetch_batches: 后台预取的批次数，0 为不预取（在当前线程中依次读取）
+        """
+        self.query_engine = query_engine
+        self.report_generator = report_generator
+        self.batch_size = batch_size
+        self.prefetch_batches = prefetch_batches
+
+    def iter_records(self, vins: Optional[List[str]] = None,
+                     filters: Optional[Dict[str, Any]] = None) -> Iterator[Dict[str, Any]]:
+        """
+        逐条产出展开后的报告数据（VIN不存在时为空字典）
+
+        可直接传给 ReportGenerator.stream_excel_report 等接受记录迭代器的方法。
+        """
+        batches = self.query_engine.iter_vehicle_batches(vins=vins, filters=filters, batch_size=self.batch_size)
+        if self.prefetch_batches > 0:
+            batches = prefetch(batches, self.prefetch_batches)
+        for batch in batches:
+            for result in batch:
+                yield flatten_vehicle_data(result)
+
+    def generate(self,
+                 template_name: str,
+                 output_dir: str,
+                 vins: Optional[List[str]] = None,
+                 filters: Optional[Dict[str, Any]] = None,
+                 output_format: str = 'pdf',
+                 progress_callback: Optional[Callable[[int, int, int, Optional[str]], None]] = None,
+                 name_field: str = 'vin') -> Dict[str, Any]:
+        """
+        按VIN列表或查询条件生成报告
+
+        Args:
+            template_name: 模板名称
+            output_dir: 输出目录
+            vins: VIN码列表
+            filters: 未指定 vins 时的车辆查询条件（如 {'make': '奥迪'}），均未指定时为全部车辆
+            output_format: 输出格式 (pdf, docx, excel)
+            progress_callback: 每完成一份报告回调 (已完成数, 总数, 序号(从0开始), 输出文件或None)
+            name_field: 用于文件名的字段，与 batch_generate_reports 相同
+
+        Returns:
+            统计结果，与 batch_generate_reports 相同，另含 missing_vins（数据库中不存在的VIN）；
+            报告生成器启用缓存时，报告清单同时记录到数据库
+        """
+        results = {
+            'success_count': 0,
+            'failed_count': 0,
+            'reused_count': 0,
+            'failed_files': [],
+            'output_files': [],
+            'manifest': [],
+            'missing_vins': []
+        }
+
+        output_path = Path(output_dir)
+        output_path.mkdir(parents=True, exist_ok=True)
+        generator = self.report_generator
+        total = len(vins) if vins is not None else self.query_engine.count_vehicles(filters)
+        generated_at = datetime.now()
+
+        try:
+            for index, data in enumerate(self.iter_records(vins=vins, filters=filters)):
+                file_path = None
+                if not data:
+                    results['missing_vins'].append(vins[index])
+                    results['failed_count'] += 1
+                    results['failed_files'].append(f"数据项 {index + 1}: 未找到VIN {vins[index]}")
+                else:
+                    file_path = str(output_path / generator._report_filename(index, total, data,
+                                                                             output_format, name_field))
+                    success, entry = generator._generate(data, template_name, file_path, output_format, generated_at)
+                    if success:
+                        results['success_count'] += 1
+                        results['output_files'].append(file_path)
+                        if entry is not None:
+                            results['manifest'].append(entry)
+                            results['reused_count'] += entry['reused']
+                    else:
+                        results['failed_count'] += 1
+                        results['failed_files'].append(f"数据项 {index + 1}")
+                        file_path = None
+
+                if progress_callback is not None:
+                    try:
+                        progress_callback(index + 1, total, index, file_path)
+                    except Exception as e:
+                        logger.warning(f"进度回调出错: {e}")
+
+        except Exception as e:
+            logger.error(f"查询-报告流水线出错: {e}")
+            results['error'] = str(e)
+
+        if results['manifest']:
+            self.query_engine.record_generated_reports(results['manifest'])
+
+        logger.info(f"流水线生成报告完成: 成功 {results['success_count']} 份, 失败 {results['failed_count']} 份")
+        return results
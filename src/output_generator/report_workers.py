@@ -0,0 +1,212 @@
+"""
+报告工作进程
+Report Worker Processes
+
+从报告任务队列（ReportJobQueue）认领任务项并在独立进程中生成报告：
+- 提交任务只写入数据库，界面线程不等待报告生成；进度通过 status() 查询
+- 每个工作进程各自认领任务项，进程数可按CPU核数设置
+- 工作进程崩溃时其任务项的租约到期后由其他进程重新认领，程序重启后调用 resume() 继续未完成的任务
+"""
+
+import os
+import time
+import logging
+import multiprocessing
+from datetime import timezone
+from typing import Dict, List, Any, Optional
+
+from ..database.query_engine import QueryEngine
+from ..database.report_queue import ReportJobQueue, DEFAULT_LEASE_SECONDS, DEFAULT_MAX_ATTEMPTS
+from .report_generator import ReportGenerator
+from .report_pipeline import flatten_vehicle_data
+
+logger = logging.getLogger(__name__)
+
+# 每个工作进程一次认领的任务项数
+DEFAULT_CLAIM_SIZE = 2
+
+# 没有待处理任务项时的轮询间隔（秒）
+DEFAULT_POLL_INTERVAL = 1.0
+
+class ReportWorkerPool:
+    """报告生成工作进程池"""
+
+    def __init__(self,
+                 database_url: Optional[str] = None,
+                 workers: Optional[int] = None,
+                 template_dir: Optional[str] = None,
+                 cache_dir: Optional[str] = None,
+                 field_mappings: Optional[Dict[str, Any]] = None,
+                 claim_size: int = DEFAULT_CLAIM_SIZE,
+                 lease_seconds: int = DEFAULT_LEASE_SECONDS,
+                 poll_interval: float = DEFAULT_POLL_INTERVAL,
+                 exit_when_idle: bool = True):
+        """
+        Args:
+            database_url: 任务队列（及车辆数据）所在数据库，默认为项目数据库
+            workers: 工作进程数，默认为CPU核数
+            template_dir: 模板目录
+            cache_dir: 报告输出缓存目录
+            field_mappings: 字段映射，默认使用报告生成器的默认映射
+            claim_size: 每次认领的任务项数
+            lease_seconds: 认领租约时长，应大于生成 claim_size 份报告所需的时间
+            poll_interval: 没有任务项时的轮询间隔
+            exit_when_idle: 没有待处理任务项时工作进程退出（提交新任务时自动重新启动）
+        """
+        self.queue = ReportJobQueue(database_url)
+        self.workers = max(1, workers or os.cpu_count() or 1)
+        self.template_dir = str(template_dir) if template_dir else None
+        self.cache_dir = str(cache_dir) if cache_dir else None
+        self.field_mappings = field_mappings
+        self.claim_size = claim_size
+        self.lease_seconds = lease_seconds
+        self.poll_interval = poll_interval
+        self.exit_when_idle = exit_when_idle
+        # spawn 启动的进程不继承界面进程的窗口、线程和数据库连接
+        self._context = multiprocessing.get_context('spawn')
+        self._stop = self._context.Event()
+        # [(工作进程, 退出标记)]，退出标记置位表示该进程已无任务可认领、即将退出
+        self._processes = []
+        self._started = 0
+
+    def submit(self,
+               template_name: str,
+               output_dir: str,
+               vins: Optional[List[str]] = None,
+               records: Optional[List[Dict[str, Any]]] = None,
+               output_format: str = 'pdf',
+               name_field: str = 'vin',
+               max_attempts: int = DEFAULT_MAX_ATTEMPTS) -> Optional[int]:
+        """
+        提交报告任务并确保工作进程在运行，立即返回任务ID
+
+        Args:
+            vins: VIN码列表，工作进程按VIN从数据库读取车辆信息
+            records: 报告数据列表（与 vins 二选一）
+        """
+        job_id = self.queue.submit(template_name, output_format, output_dir, vins=vins, records=records,
+                                   name_field=name_field, max_attempts=max_attempts)
+        if job_id is not None:
+            self.start()
+        return job_id
+
+    def resume(self) -> int:
+        """继续上次未完成的任务（程序启动时调用），返回待处理的任务项数"""
+        self.queue.resume()
+        pending = self.queue.pending_count()
+        if pending:
+            logger.info(f"继续未完成的报告任务: {pending} 项")
+            self.start()
+        return pending
+
+    def start(self) -> int:
+        """
+        启动工作进程（补足已退出或即将退出的进程），返回运行中的进程数
+
+        工作进程先置位退出标记、再确认队列中没有待处理任务项才退出；这里在任务项写入后
+        检查退出标记，已置位的进程不计入，因此新提交的任务项总有进程认领。
+        """
+        self._processes = [(process, exiting) for process, exiting in self._processes if process.is_alive()]
+        self._stop.clear()
+        active = sum(1 for _, exiting in self._processes if not exiting.is_set())
+        while active < self.workers:
+            self._started += 1
+            exiting = self._context.Event()
+            process = self._context.Process(
+                target=_worker_main,
+                args=(self.queue.database_url, self.template_dir, self.cache_dir, self.field_mappings,
+                      self.claim_size, self.lease_seconds, self.poll_interval, self.exit_when_idle,
+                      self._stop, exiting),
+                name=f'report-worker-{self._started}',
+                daemon=True
+            )
+            process.start()
+            self._processes.append((process, exiting))
+            active += 1
+        return active
+
+    def stop(self, timeout: Optional[float] = None):
+        """通知工作进程在当前任务项完成后退出（未完成的任务项留在队列中）"""
+        self._stop.set()
+        self.wait(timeout)
+
+    def wait(self, timeout: Optional[float] = None) -> bool:
+        """等待工作进程退出，返回是否全部退出"""
+        deadline = None if timeout is None else time.monotonic() + timeout
+        for process, _ in self._processes:
+            process.join(None if deadline is None else max(0.0, deadline - time.monotonic()))
+        return not self.is_running()
+
+    def is_running(self) -> bool:
+        """是否有工作进程在运行"""
+        return any(process.is_alive() for process, _ in self._processes)
+
+    def status(self, job_id: int) -> Dict[str, Any]:
+        """任务进度（读取数据库，不等待工作进程）"""
+        return self.queue.job_status(job_id)
+
+def _worker_main(database_url: str, template_dir: Optional[str], cache_dir: Optional[str],
+                 field_mappings: Optional[Dict[str, Any]], claim_size: int, lease_seconds: int,
+                 poll_interval: float, exit_when_idle: bool, stop_event, exiting_event):
+    """工作进程：循环认领任务项并生成报告（单次认领或处理出错不影响后续任务项）"""
+    worker_id = f"{multiprocessing.current_process().name}@{os.getpid()}"
+    queue = ReportJobQueue(database_url)
+    generator = ReportGenerator(template_dir, cache_dir)
+    if field_mappings is not None:
+        generator.field_mappings = field_mappings
+    query_engine = QueryEngine(database_url)
+
+    try:
+        while not stop_event.is_set():
+            try:
+                items = queue.claim(worker_id, claim_size, lease_seconds)
+                if not items:
+                    if exit_when_idle:
+                        # 先置位退出标记再确认队列为空，与 ReportWorkerPool.start() 的检查配合不会遗漏新任务项
+                        exiting_event.set()
+                        if not queue.pending_count():
+                            break
+                        exiting_event.clear()
+                        continue
+                    stop_event.wait(poll_interval)
+                    continue
+
+                for item in items:
+                    _process_item(queue, generator, query_engine, item)
+            except Exception as e:
+                logger.error(f"报告工作进程出错 ({worker_id}): {e}")
+                stop_event.wait(poll_interval)
+    finally:
+        queue.engine.dispose()
+        query_engine.engine.dispose()
+
+def _process_item(queue: ReportJobQueue, generator: ReportGenerator, query_engine: QueryEngine, item: Dict[str, Any]):
+    """生成一个任务项的报告并记录结果"""
+    try:
+        data = item['data']
+        if data is None:
+            data = flatten_vehicle_data(query_engine.search_by_vin(item['vin']))
+            if not data:
+                queue.fail(item, f"未找到VIN {item['vin']}", retry=False)
+                return
+
+        file_name = generator._report_filename(item['item_index'], item['total'], data,
+                                               item['output_format'], item['name_field'])
+        file_path = os.path.join(item['output_dir'], file_name)
+        os.makedirs(item['output_dir'], exist_ok=True)
+
+        # 同一任务的报告使用提交时间作为生成时间，重试或恢复后与其余报告一致
+        generated_at = item['submitted_at'].replace(tzinfo=timezone.utc).astimezone().replace(tzinfo=None)
+        success, entry = generator._generate(data, item['template_name'], file_path,
+                                             item['output_format'], generated_at)
+        if not success:
+            queue.fail(item, '报告生成失败')
+            return
+
+        queue.complete(item, file_path)
+        if entry is not None:
+            query_engine.record_generated_reports([entry])
+
+    except Exception as e:
+        logger.error(f"处理报告任务项出错 (#{item['id']}): {e}")
+        queue.fail(item, str(e))
@@ -109,6 +109,384 @@ def test_report_generator():
         logger.error(f"报告生成器测试失败: {e}")
         return False
 
+def test_batch_reports():
+    """测试并行批量生成报告"""
+    try:
+        logger.info("测试批量报告生成...")
+
+        import tempfile
+        from src.output_generator.report_generator import ReportGenerator
+
+        data_list = [{'vin': f"LVSHFAEM1EF{i:06d}", 'make': '奥迪', 'model': 'A4L'} for i in range(4)]
+        progress = []
+
+        with tempfile.TemporaryDirectory() as tmp:
+            results = ReportGenerator().batch_generate_reports(
+                data_list, 'vehicle_basic_info', tmp, 'excel', max_workers=2,
+                progress_callback=lambda done, total, index, path: progress.append(done)
+            )
+            names = [Path(path).name for path in results['output_files']]
+
+        if results['success_count'] != 4 or names[0] != 'report_0001_LVSHFAEM1EF000000.xlsx':
+            logger.error(f"✗ 批量生成结果错误: {results}")
+            return False
+        if sorted(progress) != [1, 2, 3, 4]:
+            logger.error(f"✗ 进度回调错误: {progress}")
+            return False
+
+        logger.info(f"✓ 批量生成正确: {names}")
+        return True
+
+    except Exception as e:
+        logger.error(f"批量报告生成测试失败: {e}")
+        return False
+
+def test_docx_template():
+    """测试Word模板编译：跨run占位符合并并保留格式"""
+    try:
+        logger.info("测试Word模板编译...")
+
+        import tempfile
+        from docx import Document
+        from src.output_generator.report_generator import ReportGenerator
+
+        with tempfile.TemporaryDirectory() as tmp:
+            template = Document()
+            paragraph = template.add_paragraph('车辆: ')
+            paragraph.add_run('[VIN').bold = True
+            paragraph.add_run('码] 品牌 [品牌]')
+            template.add_table(rows=1, cols=1).cell(0, 0).text = '[车型]'
+            template.save(Path(tmp) / 'vehicle_basic_template.docx')
+
+            output = Path(tmp) / 'report.docx'
+            generator = ReportGenerator(tmp)
+            generator.generate_report({'vin': 'LVSHFAEM1EF123456', 'make': 'A&B', 'model': 'A4L'},
+                                      'vehicle_basic_info', str(output), 'docx')
+            report = Document(str(output))
+            runs = [(run.text, run.bold) for run in report.paragraphs[0].runs]
+            cell = report.tables[0].cell(0, 0).text
+
+        if runs[1] != ('LVSHFAEM1EF123456', True) or '品牌 A&B' not in runs[2][0]:
+            logger.error(f"✗ 占位符替换错误: {runs}")
+            return False
+        if cell != 'A4L':
+            logger.error(f"✗ 表格占位符替换错误: {cell}")
+            return False
+
+        logger.info("✓ Word模板编译正确")
+        return True
+
+    except Exception as e:
+        logger.error(f"Word模板编译测试失败: {e}")
+        return False
+
+def test_streaming_excel_report():
+    """测试流式Excel报告：每车一行 / 每份报告一个工作表"""
+    try:
+        logger.info("测试流式Excel报告...")
+
+        import tempfile
+        from openpyxl import load_workbook
+        from src.output_generator.report_generator import ReportGenerator
+
+        generator = ReportGenerator()
+        records = lambda: ({'vin': f'LVSHFAEM1EF{i:06d}', 'make': '奥迪', 'model': 'A4L'} for i in range(3))
+
+        with tempfile.TemporaryDirectory() as tmp:
+            rows_file = str(Path(tmp) / 'fleet_rows.xlsx')
+            sheets_file = str(Path(tmp) / 'fleet_sheets.xlsx')
+            rows_result = generator.stream_excel_report(records(), 'vehicle_basic_info', rows_file, 'rows')
+            sheets_result = generator.stream_excel_report(records(), 'vehicle_basic_info', sheets_file, 'sheets')
+
+            rows = list(load_workbook(rows_file, read_only=True).active.values)
+            workbook = load_workbook(sheets_file, read_only=True)
+            sheet_names = workbook.sheetnames
+            first_sheet = list(workbook[sheet_names[0]].values)
+            workbook.close()
+
+        if not rows_result['success'] or len(rows) != 4 or rows[1][:3] != ('LVSHFAEM1EF000000', '奥迪', 'A4L'):
+            logger.error(f"✗ 每车一行模式错误: {rows_result}, {rows[:2]}")
+            return False
+        if sheets_result['sheet_count'] != 3 or sheet_names[0] != 'LVSHFAEM1EF000000' \
+                or ('VIN码', 'LVSHFAEM1EF000000') not in first_sheet:
+            logger.error(f"✗ 每份报告一个工作表模式错误: {sheets_result}, {sheet_names}")
+            return False
+
+        logger.info("✓ 流式Excel报告正确")
+        return True
+
+    except Exception as e:
+        logger.error(f"流式Excel报告测试失败: {e}")
+        return False
+
+def test_pdf_cjk_text():
+    """测试PDF报告中的中文可正常提取（使用中文字体而非方块或乱码）"""
+    try:
+        logger.info("测试PDF中文渲染...")
+
+        import tempfile
+        import pdfplumber
+        from src.output_generator.pdf_render import get_render_context, CJK_FONT
+
+        context = get_render_context()
+        with tempfile.TemporaryDirectory() as tmp:
+            output = str(Path(tmp) / 'cjk.pdf')
+            context.build({'[品牌]': '奥迪', '[车型]': 'A4L', '[排放标准]': '国VI'}, output)
+            with pdfplumber.open(output) as pdf:
+                text = pdf.pages[0].extract_text()
+
+        if context.font != CJK_FONT:
+            logger.error(f"✗ 未使用中文字体: {context.font}")
+            return False
+        if text.splitlines() != ['车辆检测报告', '品牌 奥迪', '车型 A4L', '排放标准 国VI']:
+            logger.error(f"✗ 提取的中文内容错误: {text!r}")
+            return False
+
+        logger.info("✓ PDF中文渲染正确")
+        return True
+
+    except Exception as e:
+        logger.error(f"PDF中文渲染测试失败: {e}")
+        return False
+
+def test_pdf_bundle():
+    """测试合并PDF报告：目录 + 每车一页 + 书签"""
+    try:
+        logger.info("测试合并PDF报告...")
+
+        import tempfile
+        import PyPDF2
+        import pdfplumber
+        from src.output_generator.report_generator import ReportGenerator
+
+        generator = ReportGenerator()
+        data_list = [{'vin': f'LVSHFAEM1EF{i:06d}', 'make': '奥迪', 'model': 'A4L'} for i in range(3)]
+
+        with tempfile.TemporaryDirectory() as tmp:
+            output = str(Path(tmp) / 'bundle.pdf')
+            result = generator.bundle_pdf_report(data_list, 'vehicle_basic_info', output)
+
+            reader = PyPDF2.PdfReader(output)
+            outline = [(item.title, reader.get_destination_page_number(item)) for item in reader.outline]
+            with pdfplumber.open(output) as pdf:
+                toc_text = pdf.pages[0].extract_text()
+                last_page = pdf.pages[-1].extract_text()
+
+        if not result['success'] or result['page_count'] != 4 or len(reader.pages) != 4:
+            logger.error(f"✗ 合并PDF页数错误: {result}")
+            return False
+        if outline[1:] != [('LVSHFAEM1EF000000', 1), ('LVSHFAEM1EF000001', 2), ('LVSHFAEM1EF000002', 3)]:
+            logger.error(f"✗ 书签错误: {outline}")
+            return False
+        if '1. LVSHFAEM1EF000000 2' not in toc_text or 'LVSHFAEM1EF000002' not in last_page:
+            logger.error(f"✗ 目录或报告内容错误: {toc_text}")
+            return False
+
+        logger.info("✓ 合并PDF报告正确")
+        return True
+
+    except Exception as e:
+        logger.error(f"合并PDF报告测试失败: {e}")
+        return False
+
+def test_report_pipeline():
+    """测试查询-报告流水线：分批预取并展开嵌套查询结果"""
+    try:
+        logger.info("测试查询-报告流水线...")
+
+        import tempfile
+        from src.database.models import Vehicle, Engine, Emission
+        from src.database.query_engine import QueryEngine
+        from src.output_generator.report_generator import ReportGenerator
+        from src.output_generator.report_pipeline import ReportPipeline
+
+        with tempfile.TemporaryDirectory() as tmp:
+            query_engine = QueryEngine(f"sqlite:///{Path(tmp) / 'test.db'}")
+            session = query_engine.get_session()
+            for i in range(5):
+                vehicle = Vehicle(vin=f'LVSHFAEM1EF{i:06d}', make='奥迪' if i % 2 else '大众', model='A4L')
+                vehicle.engine = Engine(engine_code='EA888', displacement=2.0)
+                vehicle.emission = Emission(emission_standard='国VI')
+                session.add(vehicle)
+            session.commit()
+            session.close()
+
+            pipeline = ReportPipeline(query_engine, ReportGenerator(), batch_size=2)
+            records = list(pipeline.iter_records(filters={'make': '大众'}))
+            result = pipeline.generate('vehicle_emission_report', str(Path(tmp) / 'reports'),
+                                       vins=['LVSHFAEM1EF000001', 'UNKNOWN'], output_format='excel')
+            query_engine.engine.dispose()
+
+        if [record['vin'] for record in records] != ['LVSHFAEM1EF000000', 'LVSHFAEM1EF000002', 'LVSHFAEM1EF000004']:
+            logger.error(f"✗ 按条件分批查询错误: {records}")
+            return False
+        if records[0]['engine_code'] != 'EA888' or records[0]['emission_standard'] != '国VI':
+            logger.error(f"✗ 查询结果未展开: {records[0]}")
+            return False
+        if result['success_count'] != 1 or result['missing_vins'] != ['UNKNOWN']:
+            logger.error(f"✗ 流水线生成结果错误: {result}")
+            return False
+
+        logger.info("✓ 查询-报告流水线正确")
+        return True
+
+    except Exception as e:
+        logger.error(f"查询-报告流水线测试失败: {e}")
+        return False
+
+def test_prepare_data():
+    """测试预编译字段映射：嵌套路径、日期格式化、整批共享生成时间"""
+    try:
+        logger.info("测试报告数据准备...")
+
+        from datetime import datetime
+        from src.output_generator.report_generator import ReportGenerator
+
+        generator = ReportGenerator()
+        config = {'fields': {'[VIN码]': 'vin', '[功率]': 'engine.power', '[测试日期]': 'test_date', '[缺失]': 'a.b'}}
+        generated_at = datetime(2024, 5, 6, 7, 8, 9)
+        prepared = generator._prepare_data(
+            {'vin': 'LVSHFAEM1EF123456', 'engine': {'power': 140.0}, 'test_date': datetime(2024, 1, 15), 'a': 1},
+            config, generated_at
+        )
+        expected = {'[VIN码]': 'LVSHFAEM1EF123456', '[功率]': '140.0', '[测试日期]': '2024年01月15日', '[缺失]': '',
+                    '[生成日期]': '2024年05月06日', '[生成时间]': '07:08:09'}
+        if prepared != expected:
+            logger.error(f"✗ 报告数据准备错误: {prepared}")
+            return False
+
+        config['fields']['[车型]'] = 'model'
+        if generator._prepare_data({'model': 'A4L'}, config, generated_at).get('[车型]') != 'A4L':
+            logger.error("✗ 字段映射修改后未重新编译")
+            return False
+
+        logger.info("✓ 报告数据准备正确")
+        return True
+
+    except Exception as e:
+        logger.error(f"报告数据准备测试失败: {e}")
+        return False
+
+def test_report_cache():
+    """测试报告输出缓存：内容未变化的报告复用已生成的文件"""
+    try:
+        logger.info("测试报告输出缓存...")
+
+        import tempfile
+        from src.output_generator.report_generator import ReportGenerator
+
+        data_list = [{'vin': f'LVSHFAEM1EF{i:06d}', 'make': '奥迪', 'model': 'A4L'} for i in range(3)]
+
+        with tempfile.TemporaryDirectory() as tmp:
+            generator = ReportGenerator(cache_dir=str(Path(tmp) / 'cache'))
+            first = generator.batch_generate_reports(data_list, 'vehicle_basic_info', str(Path(tmp) / 'm1'), 'excel')
+            data_list[1] = dict(data_list[1], model='A6L')
+            second = generator.batch_generate_reports(data_list, 'vehicle_basic_info', str(Path(tmp) / 'm2'), 'excel')
+            reused_file = Path(second['output_files'][0])
+            same_inode = reused_file.stat().st_ino == Path(first['output_files'][0]).stat().st_ino
+
+            # 同一路径先后生成内容不同的报告：输出文件仍链接着缓存文件时，新报告不能写入缓存
+            overwritten = []
+            for output_format in ('excel', 'pdf'):
+                output_path = str(Path(tmp) / f"same.{'xlsx' if output_format == 'excel' else 'pdf'}")
+                _, entry_a = generator._generate({'vin': 'X1', 'make': 'A'}, 'vehicle_basic_info', output_path, output_format)
+                _, entry_a = generator._generate({'vin': 'X1', 'make': 'A'}, 'vehicle_basic_info', output_path, output_format)
+                cached_a = Path(entry_a['stored_file'])
+                content_a = cached_a.read_bytes()
+                _, entry_b = generator._generate({'vin': 'X1', 'make': 'B'}, 'vehicle_basic_info', output_path, output_format)
+                if not entry_a['reused'] or entry_b['reused'] or cached_a.read_bytes() != content_a:
+                    overwritten.append(output_format)
+
+        if first['reused_count'] != 0 or len(first['manifest']) != 3:
+            logger.error(f"✗ 首次生成不应复用: {first['reused_count']}")
+            return False
+        if second['reused_count'] != 2 or [entry['reused'] for entry in second['manifest']] != [True, False, True]:
+            logger.error(f"✗ 复用判断错误: {[entry['reused'] for entry in second['manifest']]}")
+            return False
+        if overwritten:
+            logger.error(f"✗ 生成新报告时改写了缓存文件: {overwritten}")
+            return False
+        if not same_inode:
+            logger.warning("⚠ 复用的报告不是硬链接（可能跨文件系统）")
+
+        logger.info("✓ 报告输出缓存正确")
+        return True
+
+    except Exception as e:
+        logger.error(f"报告输出缓存测试失败: {e}")
+        return False
+
+def test_report_job_queue():
+    """测试报告任务队列：重试、中断恢复和工作进程"""
+    try:
+        logger.info("测试报告任务队列...")
+
+        import tempfile
+        import threading
+        from unittest import mock
+        from src.database.report_queue import ReportJobQueue
+        from src.output_generator.report_workers import ReportWorkerPool, _worker_main
+
+        records = [{'vin': f'LVSHFAEM1EF{i:06d}', 'make': '奥迪', 'model': 'A4L'} for i in range(4)]
+
+        with tempfile.TemporaryDirectory() as tmp:
+            pool = ReportWorkerPool(f"sqlite:///{Path(tmp) / 'jobs.db'}", workers=1)
+            queue = pool.queue
+            job_id = queue.submit('vehicle_basic_info', 'excel', str(Path(tmp) / 'out'), records=records)
+
+            first = queue.claim('worker-a', limit=2)
+            second = queue.claim('worker-b', limit=5)
+            overlap = {item['id'] for item in first} & {item['id'] for item in second}
+            queue.fail(first[0], '模拟失败')
+            # 模拟程序崩溃：认领的任务项未完成，重启后重新排队
+            requeued = queue.resume()
+            stale = queue.complete(second[0], 'stale.xlsx')
+
+            pool.start()
+            finished = pool.wait(timeout=120)
+            status = pool.status(job_id)
+            output_files = sorted(path.name for path in (Path(tmp) / 'out').iterdir())
+
+            # 工作进程内：认领出错后继续运行；认领为空但队列中仍有任务项（与提交并发）时不退出
+            late_job = queue.submit('vehicle_basic_info', 'excel', str(Path(tmp) / 'late'), records=records[:2])
+            real_claim = ReportJobQueue.claim
+            claims = iter([RuntimeError('database is locked'), []])
+
+            def flaky_claim(self, *args, **kwargs):
+                outcome = next(claims, None)
+                if isinstance(outcome, Exception):
+                    raise outcome
+                return real_claim(self, *args, **kwargs) if outcome is None else outcome
+
+            exiting = threading.Event()
+            with mock.patch.object(ReportJobQueue, 'claim', flaky_claim):
+                _worker_main(queue.database_url, None, None, None, 2, 60, 0.01, True, threading.Event(), exiting)
+            late_status = pool.status(late_job)
+            queue.engine.dispose()
+
+        if overlap or len(first) != 2 or len(second) != 2:
+            logger.error(f"✗ 认领结果错误: {len(first)}, {len(second)}, 重复 {overlap}")
+            return False
+        if requeued != 3 or stale:
+            logger.error(f"✗ 中断恢复错误: 重新排队 {requeued} 项, 过期认领生效 {stale}")
+            return False
+        if not finished or status['status'] != 'completed' or status['completed_items'] != 4:
+            logger.error(f"✗ 任务未完成: {status}")
+            return False
+        if len(output_files) != 4:
+            logger.error(f"✗ 报告文件数量错误: {output_files}")
+            return False
+        if late_status['status'] != 'completed' or not exiting.is_set():
+            logger.error(f"✗ 工作进程出错或认领为空后遗漏任务项: {late_status}")
+            return False
+
+        logger.info("✓ 报告任务队列正确")
+        return True
+
+    except Exception as e:
+        logger.error(f"报告任务队列测试失败: {e}")
+        return False
+
 def create_sample_excel():
     """创建示例Excel文件用于测试"""
     try:
@@ -167,6 +545,824 @@ def test_excel_parsing():
         logger.error(f"Excel解析测试失败: {e}")
         return False
 
+def test_columnar_layout():
+    """测试列式输出布局（数组类型、缺失值掩码、与记录布局一致）"""
+    try:
+        logger.info("测试列式输出布局...")
+
+        import tempfile
+        import numpy as np
+        import pandas as pd
+        from src.input_parser.excel_parser import ExcelParser
+        from src.input_parser.columnar import iter_records, missing_mask
+
+        df = pd.DataFrame({
+            'VIN码': ['LVSHFAEM1EF123456', 'LVSHFAEM1EF123457', 'LVSHFAEM1EF123458'],
+            '品牌': ['奥迪', None, '宝马'],
+            '车型': ['A4L', 'A6L', 'X3'],
+            '年份': [2023, 2022, 2021],
+            '生产日期': [pd.Timestamp('2023-01-05'), None, pd.Timestamp('2021-03-07')],
+            '发动机型号': ['EA888', 'EA888', 'B48'],
+            '排量': [2.0, None, 1.5]
+        })
+
+        with tempfile.TemporaryDirectory() as tmp:
+            excel_path = Path(tmp) / '车辆信息.xlsx'
+            df.to_excel(excel_path, index=False, sheet_name='车辆信息')
+            columns = ExcelParser(layout='columns').parse_file(str(excel_path))['structured_data']
+            records = ExcelParser().parse_file(str(excel_path))['structured_data']
+
+        vehicles = columns['vehicle_info']
+        engines = columns['engine_info']
+        if not all(isinstance(array, np.ndarray) and len(array) == 3 for array in vehicles.values()):
+            logger.error("✗ 列式数据应为等长的numpy数组")
+            return False
+
+        kinds = {name: vehicles[name].dtype.kind for name in ('VIN', 'make', 'year', 'production_date')}
+        kinds['displacement'] = engines['displacement'].dtype.kind
+        if kinds != {'VIN': 'U', 'make': 'U', 'year': 'i', 'production_date': 'M', 'displacement': 'f'}:
+            logger.error(f"✗ 列式数组类型错误: {kinds}")
+            return False
+
+        masks = {
+            'make': missing_mask(vehicles['make']).tolist(),
+            'production_date': missing_mask(vehicles['production_date']).tolist(),
+            'displacement': missing_mask(engines['displacement']).tolist()
+        }
+        if any(mask != [False, True, False] for mask in masks.values()):
+            logger.error(f"✗ 缺失值掩码错误: {masks}")
+            return False
+
+        for data_type in ('vehicle_info', 'engine_info'):
+            if list(iter_records(columns[data_type])) != records[data_type]:
+                logger.error(f"✗ {data_type} 列式数据与记录布局不一致")
+                return False
+
+        logger.info("✓ 列式输出布局正确")
+        return True
+
+    except Exception as e:
+        logger.error(f"列式输出布局测试失败: {e}")
+        return False
+
+def test_header_detection():
+    """测试表头检测（标题行、两行合并表头、低置信度）"""
+    try:
+        logger.info("测试表头检测...")
+
+        import pandas as pd
+        from src.input_parser.excel_parser import ExcelParser
+
+        parser = ExcelParser()
+
+        # 标题行 + 两行合并表头
+        df = pd.DataFrame([
+            ['车辆数据汇总表', None, None, None],
+            ['VIN码', '基本信息', None, '发动机参数'],
+            [None, '品牌', '车型', '排量'],
+            ['LVSHFAEM1EF123456', '奥迪', 'A4L', 2.0]
+        ])
+        header = parser._detect_header(df)
+        if header['header_row'] != 1 or header['header_rows'] != 2:
+            logger.error(f"✗ 合并表头检测错误: {header}")
+            return False
+
+        data = parser._apply_header(df, header['header_row'], header['header_rows'])
+        if data.columns.tolist() != ['VIN码', '品牌', '车型', '排量']:
+            logger.error(f"✗ 合并表头列名错误: {data.columns.tolist()}")
+            return False
+
+        # 纯数值表没有表头，应为低置信度
+        numeric = pd.DataFrame([[1, 2, 3], [4, 5, 6]])
+        if parser._detect_header(numeric)['confidence'] >= parser.header_confidence_threshold:
+            logger.error("✗ 纯数值表不应被识别为高置信度表头")
+            return False
+
+        logger.info(f"✓ 表头检测正确，置信度 {header['confidence']}")
+        return True
+
+    except Exception as e:
+        logger.error(f"表头检测测试失败: {e}")
+        return False
+
+def test_rule_set():
+    """测试解析规则集（实例间共享、只读、修改后重新编译）"""
+    try:
+        logger.info("测试解析规则集...")
+
+        from types import MappingProxyType
+        from src.input_parser.excel_parser import ExcelParser
+
+        first, second = ExcelParser(), ExcelParser()
+        if first.rules_version != second.rules_version or first.rule_set is not second.rule_set:
+            logger.error("✗ 相同规则的解析器未共享编译结果")
+            return False
+
+        rules = first.config_rules
+        if not isinstance(rules, MappingProxyType) or not isinstance(rules['vehicle_info']['field_mappings'], MappingProxyType):
+            logger.error(f"✗ config_rules 应为只读映射: {type(rules)}")
+            return False
+        try:
+            rules['vehicle_info'] = {}
+            logger.error("✗ config_rules 不应允许修改")
+            return False
+        except TypeError:
+            pass
+
+        edited = first.rule_set.to_dict()
+        edited['vehicle_info']['field_mappings']['make'].append('厂家')
+        first.configure_rules({'vehicle_info': edited['vehicle_info']})
+        if first.rules_version == second.rules_version:
+            logger.error("✗ 规则修改后版本号未变化")
+            return False
+        if first.rule_set.column_fields('vehicle_info', ['厂家', '车型']) != {'make': ['厂家'], 'model': ['车型']}:
+            logger.error("✗ 新增别名未参与列名匹配")
+            return False
+        if not first.rule_set.header_pattern.search('厂家') or second.rule_set.header_pattern.search('厂家'):
+            logger.error("✗ 表头关键词未随规则重新编译，或影响了其他解析器")
+            return False
+
+        first.load_default_rules()
+        if first.rule_set is not second.rule_set:
+            logger.error("✗ 恢复默认规则后未复用已编译的规则集")
+            return False
+
+        logger.info(f"✓ 解析规则集正确，版本 {second.rules_version}")
+        return True
+
+    except Exception as e:
+        logger.error(f"解析规则集测试失败: {e}")
+        return False
+
+def test_excel_preview():
+    """测试文件预览（行数/工作表数上限、空工作表、按修改时间失效的缓存）"""
+    try:
+        logger.info("测试文件预览...")
+
+        import os
+        import tempfile
+        from openpyxl import Workbook
+        from src.input_parser.excel_parser import ExcelParser
+
+        def write_workbook(path, brand):
+            workbook = Workbook()
+            vehicles = workbook.active
+            vehicles.title = '车辆信息'
+            vehicles.append(['VIN码', '品牌', '车型'])
+            for i in range(30):
+                vehicles.append([f'LVSHFAEM1EF{i:06d}', brand, 'A4L'])
+            workbook.create_sheet('空表')
+            workbook.create_sheet('仅表头').append(['VIN码', '品牌', '车型'])
+            workbook.create_sheet('备注').append(['说明'])
+            workbook.save(path)
+
+        parser = ExcelParser()
+        with tempfile.TemporaryDirectory() as tmp:
+            excel_path = Path(tmp) / 'preview.xlsx'
+            write_workbook(excel_path, '奥迪')
+            first = parser.preview_file(str(excel_path), max_rows=5, max_sheets=3)
+
+            # 返回的是缓存副本，调用方修改不影响后续预览
+            first['sheets']['车辆信息']['data'].clear()
+            cached = parser.preview_file(str(excel_path), max_rows=5, max_sheets=3)
+
+            # 文件内容变化（修改时间不同）后缓存失效
+            stat = os.stat(excel_path)
+            write_workbook(excel_path, '宝马')
+            os.utime(excel_path, ns=(stat.st_atime_ns, stat.st_mtime_ns + 1_000_000_000))
+            changed = parser.preview_file(str(excel_path), max_rows=5, max_sheets=3)
+
+        if 'error' in cached or cached['sheet_names'] != ['车辆信息', '空表', '仅表头', '备注']:
+            logger.error(f"✗ 预览结果错误: {cached}")
+            return False
+        if list(cached['sheets']) != ['车辆信息', '空表', '仅表头']:
+            logger.error(f"✗ 预览工作表数未受 max_sheets 限制: {list(cached['sheets'])}")
+            return False
+
+        vehicles = cached['sheets']['车辆信息']
+        if vehicles['shape'] != (5, 3) or len(vehicles['data']) != 5 or vehicles['columns'] != ['VIN码', '品牌', '车型']:
+            logger.error(f"✗ 预览行数未受 max_rows 限制: {vehicles['shape']}")
+            return False
+        empty = cached['sheets']['空表']
+        if empty.get('columns') != [] or empty['shape'] != (0, 0):
+            logger.error(f"✗ 空工作表预览错误: {empty}")
+            return False
+        header_only = cached['sheets']['仅表头']
+        if header_only.get('columns') != ['VIN码', '品牌', '车型'] or header_only['shape'][0] != 0:
+            logger.error(f"✗ 仅表头工作表预览错误: {header_only}")
+            return False
+        if changed['sheets']['车辆信息']['data'][0]['品牌'] != '宝马':
+            logger.error("✗ 文件修改后仍返回旧的预览缓存")
+            return False
+
+        logger.info("✓ 文件预览正确")
+        return True
+
+    except Exception as e:
+        logger.error(f"文件预览测试失败: {e}")
+        return False
+
+def test_reader_engines():
+    """测试不同读取引擎的解析结果一致"""
+    try:
+        logger.info("测试读取引擎...")
+
+        import tempfile
+        import pandas as pd
+        from src.input_parser.excel_parser import ExcelParser
+
+        df = pd.DataFrame({
+            'VIN码': ['LVSHFAEM1EF123456', 'LVSHFAEM1EF123457'],
+            '品牌': ['奥迪', '宝马'],
+            '年份': [2023, 2022],
+            '排量': [2.0, 1.5],
+            '代码': ['0123', '0456']
+        })
+
+        with tempfile.TemporaryDirectory() as tmp:
+            excel_path = Path(tmp) / '车辆信息.xlsx'
+            csv_path = Path(tmp) / '车辆信息.csv'
+            df.to_excel(excel_path, index=False, sheet_name='车辆信息')
+            df.to_csv(csv_path, index=False)
+
+            excel_result = ExcelParser(engine='openpyxl').parse_file(str(excel_path))
+            csv_result = ExcelParser().parse_file(str(csv_path))
+
+        if csv_result['file_info']['reader_engine'] != 'csv':
+            logger.error("✗ CSV文件未选择csv引擎")
+            return False
+        if excel_result['structured_data'] != csv_result['structured_data']:
+            logger.error("✗ Excel与CSV解析结果不一致")
+            return False
+
+        logger.info("✓ 各读取引擎解析结果一致")
+        return True
+
+    except Exception as e:
+        logger.error(f"读取引擎测试失败: {e}")
+        return False
+
+def test_data_validation():
+    """测试数据验证引擎"""
+    try:
+        logger.info("测试数据验证引擎...")
+
+        from src.input_parser.data_validator import DataValidator
+
+        structured_data = {
+            'vehicle_info': [
+                {'VIN': '1M8GDM9AXKP042788', 'year': 2019},
+                {'VIN': 'LVSHFAEM1EF12345', 'year': 2023},
+                {'VIN': '1M8GDM9AXKP042788', 'year': 1900}
+            ],
+            'engine_info': [
+                {'engine_code': 'EA888', 'displacement': 2.0, 'power': 140},
+                {'engine_code': 'EA888', 'displacement': 'abc', 'power': 5000}
+            ]
+        }
+
+        result = DataValidator().validate(structured_data)
+        masks = result['row_masks']
+
+        if masks['vehicle_info']['vin_format'].tolist() != [False, True, False]:
+            logger.error("✗ VIN格式检查错误")
+            return False
+        if masks['vehicle_info']['vin_duplicate'].tolist() != [True, False, True]:
+            logger.error("✗ VIN重复检查错误")
+            return False
+        if masks['vehicle_info']['vin_check_digit'].any():
+            logger.error("✗ VIN校验位检查错误")
+            return False
+        if result['invalid_rows']['engine_info'].tolist() != [False, True]:
+            logger.error("✗ 数值范围检查错误")
+            return False
+        if result['is_valid']:
+            logger.error("✗ 存在错误时验证结果应为无效")
+            return False
+
+        # 同一列混用多种日期写法：均为合法日期
+        dates = DataValidator().validate({'vehicle_info': [
+            {'VIN': '1M8GDM9AXKP042788', 'production_date': value}
+            for value in ['2023-01-05', '2023/02/06', '2023年3月7日', '20230408', '不是日期']
+        ]})
+        if dates['row_masks']['vehicle_info']['production_date_invalid'].tolist() != [False, False, False, False, True]:
+            logger.error(f"✗ 混合格式日期检查错误: {dates['row_masks']['vehicle_info']['production_date_invalid']}")
+            return False
+
+        # 直接传入DataFrame，日期列全为空值（float64）：不报错，也不算非法日期
+        import numpy as np
+        import pandas as pd
+        empty_dates = DataValidator().validate({'vehicle_info': pd.DataFrame({
+            'VIN': ['1M8GDM9AXKP042788', 'LVSHFAEM1EF123456'],
+            'test_date': [np.nan, np.nan]
+        })})
+        if empty_dates['row_masks']['vehicle_info']['test_date_invalid'].any():
+            logger.error("✗ 全为空值的日期列检查错误")
+            return False
+
+        logger.info(f"✓ 数据验证正确，发现 {len(result['errors'])} 类错误")
+        return True
+
+    except Exception as e:
+        logger.error(f"数据验证测试失败: {e}")
+        return False
+
+def test_incremental_import():
+    """测试按行指纹增量重新导入"""
+    try:
+        logger.info("测试增量导入...")
+
+        import tempfile
+        from datetime import datetime
+        from sqlalchemy import select
+        from src.database.data_importer import DataImporter
+        from src.database.models import Vehicle, Emission, Transmission, VehicleParameter, TestReport, GeneratedReport
+
+        def parsed(rows, **structured):
+            return {
+                'file_info': {'file_name': 'vehicles.xlsx', 'file_path': '/data/vehicles.xlsx', 'file_type': 'excel'},
+                'structured_data': dict(structured, vehicle_info=rows)
+            }
+
+        rows = [
+            {'VIN': f'LVSHFAEM1EF12345{i}', 'make': '奥迪', 'model': 'A4L', 'year': 2023}
+            for i in range(3)
+        ]
+
+        with tempfile.TemporaryDirectory() as tmp:
+            importer = DataImporter(f"sqlite:///{Path(tmp) / 'test.db'}")
+            # 导入前已存在的车辆：数据源删除该行时不应删除车辆
+            session = importer.get_session()
+            session.add(Vehicle(vin='LVSHFAEM1EF999999', make='奥迪', model='Q5L'))
+            session.commit()
+            rows.append({'VIN': 'LVSHFAEM1EF999999', 'make': '奥迪', 'model': 'Q5L'})
+            first = importer.import_parsed_data(parsed(rows))
+
+            # 被删除车辆的子表记录
+            deleted_id = session.scalar(select(Vehicle.id).where(Vehicle.vin == rows[2]['VIN']))
+            session.add_all([
+                Transmission(vehicle_id=deleted_id, transmission_code='DQ381'),
+                VehicleParameter(vehicle_id=deleted_id, parameter_name='整备质量'),
+                TestReport(vehicle_id=deleted_id, report_type='排放', test_date=datetime(2024, 1, 15)),
+                GeneratedReport(cache_key='k' * 64, vehicle_id=deleted_id, vin=rows[2]['VIN'],
+                                template_name='vehicle_basic_info', output_format='pdf', report_file='r.pdf')
+            ])
+            session.commit()
+
+            rows[0] = dict(rows[0], model='A6L')
+            del rows[2:]
+            second = importer.import_parsed_data(parsed(rows))
+
+            remaining_vins = set(session.scalars(select(Vehicle.vin)))
+            vehicle_ids = set(session.scalars(select(Vehicle.id)))
+            orphans = [
+                model.__tablename__ for model in (Transmission, VehicleParameter, TestReport)
+                if set(session.scalars(select(model.vehicle_id))) - vehicle_ids
+            ]
+            report_vehicle = session.scalar(select(GeneratedReport.vehicle_id))
+            session.close()
+            importer.engine.dispose()
+
+            # 多批次导入中间某行有无法转换的值（'N/A'），该字段按空值导入，后续批次照常写入
+            batch_rows = [
+                {'VIN': f'LVSHFAEM1EF20000{i}', 'make': '奥迪', 'model': 'A4L', 'year': 'N/A' if i == 3 else 2023}
+                for i in range(6)
+            ]
+            batch_importer = DataImporter(f"sqlite:///{Path(tmp) / 'batches.db'}", batch_size=2)
+            batched = batch_importer.import_parsed_data(parsed(batch_rows))
+            batch_session = batch_importer.get_session()
+            years = dict(batch_session.execute(select(Vehicle.vin, Vehicle.year)).all())
+            batch_session.close()
+            batch_importer.engine.dispose()
+
+            # 重新交付的表格保留车辆行、去掉排放行：本数据源创建的车辆删除旧排放记录，已有车辆的保留
+            child_importer = DataImporter(f"sqlite:///{Path(tmp) / 'children.db'}")
+            child_session = child_importer.get_session()
+            existing = Vehicle(vin='LVSHFAEM1EF999999', make='奥迪', model='Q5L')
+            existing.emission = Emission(emission_standard='国五')
+            child_session.add(existing)
+            child_session.commit()
+            child_rows = [{'VIN': 'LVSHFAEM1EF300000', 'make': '奥迪', 'model': 'A4L'},
+                          {'VIN': 'LVSHFAEM1EF999999', 'make': '奥迪', 'model': 'Q5L'}]
+            emissions = [{'VIN': row['VIN'], 'emission_standard': '国六'} for row in child_rows]
+            child_importer.import_parsed_data(parsed(child_rows, emission_info=emissions))
+            dropped = child_importer.import_parsed_data(parsed(child_rows))
+            remaining_emissions = dict(child_session.execute(
+                select(Vehicle.vin, Emission.emission_standard).join(Emission, Emission.vehicle_id == Vehicle.id)
+            ).all())
+            child_session.close()
+            child_importer.engine.dispose()
+
+        if first['inserted'] != 4:
+            logger.error(f"✗ 首次导入统计错误: {first}")
+            return False
+        if (second['updated'], second['deleted'], second['unchanged'], second['inserted']) != (1, 2, 1, 0):
+            logger.error(f"✗ 增量导入统计错误: {second}")
+            return False
+        if 'LVSHFAEM1EF999999' not in remaining_vins or len(remaining_vins) != 3:
+            logger.error(f"✗ 删除了不是由该数据源创建的车辆: {remaining_vins}")
+            return False
+        if orphans or report_vehicle is not None:
+            logger.error(f"✗ 删除车辆后残留子表记录: {orphans}, 报告关联 {report_vehicle}")
+            return False
+        if 'error' in batched or batched['inserted'] != 6 or len(years) != 6 \
+                or years['LVSHFAEM1EF200003'] is not None or years['LVSHFAEM1EF200005'] != 2023:
+            logger.error(f"✗ 无效值中断了批量导入: {batched}, {years}")
+            return False
+        if dropped['updated'] != 2 or remaining_emissions != {'LVSHFAEM1EF999999': '国六'}:
+            logger.error(f"✗ 表格中去掉的子表记录未删除: {dropped}, {remaining_emissions}")
+            return False
+
+        logger.info(f"✓ 增量导入正确: {second}")
+        return True
+
+    except Exception as e:
+        logger.error(f"增量导入测试失败: {e}")
+        return False
+
+def test_record_join():
+    """测试跨表、跨文件VIN关联"""
+    try:
+        logger.info("测试VIN关联引擎...")
+
+        from src.input_parser.record_joiner import RecordJoiner
+
+        vehicle_file = {
+            'vehicle_info': [
+                {'VIN': 'LVSHFAEM1EF123456', 'make': '奥迪', 'model': 'A4L'},
+                {'VIN': 'lvshfaem1ef123457 ', 'make': '奥迪', 'model': 'A6L'}
+            ],
+            'engine_info': [{'VIN': 'LVSHFAEM1EF123456', 'engine_code': 'EA888'}]
+        }
+        emission_file = {
+            'emission_info': [
+                {'VIN': 'LVSHFAEM1EF123457', 'emission_standard': '国六'},
+                {'VIN': 'LVSHFAEM1EF999999', 'emission_standard': '国六'},
+                {'emission_standard': '国五'}
+            ]
+        }
+
+        result = RecordJoiner().add(vehicle_file, 'a.xlsx').add(emission_file, 'b.xlsx').join()
+        records = result['records']
+
+        if records['LVSHFAEM1EF123457'].get('emission_info', {}).get('emission_standard') != '国六':
+            logger.error("✗ 跨文件关联失败")
+            return False
+        if 'engine_info' not in records['LVSHFAEM1EF123456']:
+            logger.error("✗ 跨表关联失败")
+            return False
+        if result['orphans']['unmatched'] != {'emission_info': ['LVSHFAEM1EF999999']}:
+            logger.error(f"✗ 孤立行报告错误: {result['orphans']}")
+            return False
+        if result['statistics']['missing_key_rows'] != 1:
+            logger.error("✗ 缺少VIN的行未报告")
+            return False
+
+        # 列式布局：同类型的多个工作表逐段累积，每列只拼接一次，列取并集
+        import numpy as np
+        from src.input_parser.columnar import ColumnChunks
+
+        chunks = ColumnChunks()
+        chunks.append({'vin': np.array(['A1', 'A2']), 'year': np.array([2020, 2021])})
+        chunks.append({'vin': np.array(['A3'])})
+        chunks.append({'vin': np.array(['A4']), 'year': np.array([2023])})
+        merged = chunks.concat()
+        if merged['vin'].tolist() != ['A1', 'A2', 'A3', 'A4'] or merged['year'].dtype != np.float64 \
+                or not np.isnan(merged['year'][2]) or merged['year'][3] != 2023:
+            logger.error(f"✗ 列式数据拼接错误: {merged}")
+            return False
+
+        logger.info(f"✓ VIN关联正确: {result['statistics']}")
+        return True
+
+    except Exception as e:
+        logger.error(f"VIN关联测试失败: {e}")
+        return False
+
+def test_scratch_spill():
+    """测试列式中间结果写入内存映射暂存区"""
+    try:
+        logger.info("测试暂存区...")
+
+        import tempfile
+        import numpy as np
+        import pandas as pd
+        from src.input_parser.excel_parser import ExcelParser
+
+        with tempfile.TemporaryDirectory() as tmp:
+            # 两个同类型工作表，结构化数据需要拼接
+            excel_file = Path(tmp) / "scratch_test.xlsx"
+            with pd.ExcelWriter(excel_file) as writer:
+                for sheet, offset in (('车辆信息', 0), ('车辆信息2', 50)):
+                    pd.DataFrame({
+                        'VIN码': [f"LVSHFAEM1EF{i:06d}" for i in range(offset, offset + 50)],
+                        '品牌': ['奥迪'] * 50,
+                        '车型': ['A4L'] * 50,
+                        '年份': [2023] * 50
+                    }).to_excel(writer, sheet_name=sheet, index=False)
+
+            expected = ExcelParser(layout='columns').parse_file(str(excel_file))
+            parser = ExcelParser(layout='columns', memory_limit=0, scratch_dir=tmp)
+            parsed = parser.parse_file(str(excel_file))
+
+            spilled = parsed['structured_data']['vehicle_info']
+            if len(spilled['VIN']) != 100 or not all(isinstance(array, np.memmap) for array in spilled.values()):
+                logger.error("✗ 超出内存上限的数据未写入暂存区")
+                return False
+            for field, array in expected['structured_data']['vehicle_info'].items():
+                if not np.array_equal(array, spilled[field]):
+                    logger.error(f"✗ 暂存数据不一致: {field}")
+                    return False
+
+            # 内存上限足够时全部驻留内存，拼接后释放的各段不再计入驻留内存
+            resident_parser = ExcelParser(layout='columns', memory_limit=1 << 30, scratch_dir=tmp)
+            resident = resident_parser.parse_file(str(excel_file))
+            retained = sum(array.nbytes for sheet in resident['sheets'].values() for array in sheet['data'].values())
+            retained += sum(array.nbytes for data in resident['structured_data'].values() for array in data.values())
+            if resident['file_info']['scratch']['resident_bytes'] != retained:
+                logger.error(f"✗ 驻留内存统计错误: {resident['file_info']['scratch']} != {retained}")
+                return False
+
+            logger.info(f"✓ 暂存区正确: {parsed['file_info']['scratch']['spilled_bytes']} 字节写入暂存文件")
+            parser.release_scratch()
+            resident_parser.release_scratch()
+        return True
+
+    except Exception as e:
+        logger.error(f"暂存区测试失败: {e}")
+        return False
+
+def create_test_pdf(pdf_file: Path, pages: int = 1):
+    """生成包含键值对正文和车辆表格的测试PDF"""
+    from reportlab.lib import colors
+    from reportlab.lib.pagesizes import A4
+    from reportlab.lib.styles import ParagraphStyle
+    from reportlab.pdfbase import pdfmetrics
+    from reportlab.pdfbase.cidfonts import UnicodeCIDFont
+    from reportlab.platypus import SimpleDocTemplate, Paragraph, Table, TableStyle, PageBreak
+
+    pdfmetrics.registerFont(UnicodeCIDFont('STSong-Light'))
+    style = ParagraphStyle('cn', fontName='STSong-Light', fontSize=10)
+
+    elements = []
+    for page in range(pages):
+        elements.append(Paragraph(f"VIN码：LVSHFAEM1EF{page:06d}　品牌：奥迪", style))
+        elements.append(Paragraph("车型：A4L　发动机型号：EA888", style))
+        table = Table([['VIN码', '品牌', '车型'], [f"LVSHFAEM2EF{page:06d}", '大众', '帕萨特']])
+        table.setStyle(TableStyle([
+            ('FONTNAME', (0, 0), (-1, -1), 'STSong-Light'),
+            ('GRID', (0, 0), (-1, -1), 0.5, colors.black)
+        ]))
+        elements.append(table)
+        elements.append(PageBreak())
+
+    SimpleDocTemplate(str(pdf_file), pagesize=A4).build(elements[:-1])
+
+def test_pdf_parsing():
+    """测试PDF正文键值对和表格提取"""
+    try:
+        logger.info("测试PDF解析...")
+
+        import tempfile
+        from src.input_parser.pdf_parser import PDFParser
+
+        with tempfile.TemporaryDirectory() as tmp:
+            pdf_file = Path(tmp) / "pdf_test.pdf"
+            create_test_pdf(pdf_file)
+
+            parsed = PDFParser().parse_file(str(pdf_file))
+            # 惰性文档只解析访问到的页面，结果与 parse_file 一致
+            with PDFParser().open_document(str(pdf_file)) as document:
+                lazy_parsed_pages = document.parsed_pages
+                lazy_text = document['pages'][0]['text']
+                lazy_structured = document['structured_data']
+
+        records = {record['VIN']: record for record in parsed['structured_data'].get('vehicle_info', [])}
+
+        if records.get('LVSHFAEM1EF000000') != {'VIN': 'LVSHFAEM1EF000000', 'make': '奥迪', 'model': 'A4L'}:
+            logger.error(f"✗ 正文键值对提取错误: {records}")
+            return False
+        if records.get('LVSHFAEM2EF000000', {}).get('model') != '帕萨特':
+            logger.error(f"✗ 表格提取错误: {records}")
+            return False
+        if len(parsed['pages']) != 1 or 'VIN码' not in parsed['raw_text']:
+            logger.error("✗ 页面文本缺失")
+            return False
+
+        if lazy_parsed_pages != 0 or lazy_text != parsed['pages'][0]['text']:
+            logger.error("✗ 惰性文档页面访问错误")
+            return False
+        if lazy_structured != parsed['structured_data']:
+            logger.error("✗ 惰性文档结构化数据不一致")
+            return False
+
+        logger.info(f"✓ PDF解析正确: {len(records)} 条车辆记录")
+        return True
+
+    except Exception as e:
+        logger.error(f"PDF解析测试失败: {e}")
+        return False
+        return False
+
+def test_pdf_parallel_extraction():
+    """测试多进程页面提取与单进程结果一致"""
+    try:
+        logger.info("测试PDF并行页面提取...")
+
+        import tempfile
+        from src.input_parser.pdf_parser import PDFParser, PARALLEL_MIN_PAGES
+
+        with tempfile.TemporaryDirectory() as tmp:
+            pdf_file = Path(tmp) / "pdf_parallel_test.pdf"
+            create_test_pdf(pdf_file, pages=PARALLEL_MIN_PAGES + 4)
+
+            sequential = PDFParser(max_workers=1, ocr=False).parse_file(str(pdf_file))
+            parallel = PDFParser(max_workers=2, ocr=False).parse_file(str(pdf_file))
+
+        if [page['page_number'] for page in parallel['pages']] != list(range(1, PARALLEL_MIN_PAGES + 5)):
+            logger.error("✗ 并行提取页序错误")
+            return False
+        if parallel['pages'] != sequential['pages'] or parallel['structured_data'] != sequential['structured_data']:
+            logger.error("✗ 并行提取结果与单进程不一致")
+            return False
+
+        logger.info(f"✓ PDF并行页面提取正确: {len(parallel['pages'])} 页")
+        return True
+
+    except Exception as e:
+        logger.error(f"PDF并行页面提取测试失败: {e}")
+        return False
+
+def test_pdf_ocr():
+    """测试扫描页检测、OCR结果缓存及按批识别"""
+    try:
+        logger.info("测试PDF扫描页OCR...")
+
+        import tempfile
+        from PIL import Image
+        from reportlab.pdfgen import canvas
+        from src.input_parser.pdf_ocr import OCREngine, needs_ocr
+        from src.input_parser.pdf_parser import PDFParser
+
+        if not needs_ocr({'text': ' \n 12 '}) or needs_ocr({'text': 'VIN码：LVSHFAEM1EF000000'}):
+            logger.error("✗ 扫描页检测错误")
+            return False
+
+        with tempfile.TemporaryDirectory() as tmp:
+            cache_dir = str(Path(tmp) / 'ocr')
+            engine = OCREngine(max_workers=2, cache_dir=cache_dir)
+            images = [Image.new('L', (40, 20), color) for color in (0, 128, 255)]
+            engine.cache.put(engine.image_key(images[0]), '缓存的识别文本')
+            other_lang = OCREngine(lang='eng', cache_dir=cache_dir)
+
+            # 命中缓存的图像直接返回；未命中的交给进程池（未安装 Tesseract 时识别失败为None）
+            first = engine.recognize(images)
+            executor = engine._executor
+            engine.recognize(images[1:])
+            reused = executor is not None and engine._executor is executor
+            engine.close()
+            lang_miss = other_lang.cache.get(other_lang.image_key(images[0])) is None
+
+            # 没有文本层的页面按 batch_size 分批识别，页序不变
+            pdf_file = Path(tmp) / 'scanned.pdf'
+            pdf = canvas.Canvas(str(pdf_file))
+            for _ in range(5):
+                pdf.rect(100, 100, 200, 200, fill=1)
+                pdf.showPage()
+            pdf.save()
+
+            batches = []
+
+            class RecordingEngine(OCREngine):
+                available = True
+
+                def recognize(self, images):
+                    batches.append(len(images))
+                    return [f"第{len(batches)}批识别的页面文本" for _ in images]
+
+            parser = PDFParser()
+            parser.ocr_engine = RecordingEngine(max_workers=1, cache_dir=cache_dir)
+            parsed = parser.parse_file(str(pdf_file))
+
+        if first[0] != '缓存的识别文本' or not lang_miss:
+            logger.error(f"✗ OCR缓存命中错误: {first}, 其他语言未命中 {lang_miss}")
+            return False
+        if not reused:
+            logger.error("✗ OCR进程池未复用")
+            return False
+        if batches != [2, 2, 1] or parsed['file_info']['ocr_pages'] != 5:
+            logger.error(f"✗ OCR分批错误: {batches}, {parsed['file_info'].get('ocr_pages')}")
+            return False
+        if [page['text'][:3] for page in parsed['pages']] != ['第1批', '第1批', '第2批', '第2批', '第3批']:
+            logger.error("✗ OCR结果页序错误")
+            return False
+
+        logger.info(f"✓ PDF扫描页OCR正确: 分批 {batches}")
+        return True
+
+    except Exception as e:
+        logger.error(f"PDF扫描页OCR测试失败: {e}")
+        return False
+
+def test_pdf_layout_template():
+    """测试按版面模板裁剪区域提取字段"""
+    try:
+        logger.info("测试PDF版面模板...")
+
+        import tempfile
+        from src.input_parser.pdf_parser import PDFParser
+        from src.input_parser.pdf_templates import TemplateRegistry
+
+        # A4 页面上 create_test_pdf 第一段正文所在区域（相对坐标）
+        registry = TemplateRegistry([{
+            'name': 'test_certificate',
+            'markers': ['VIN码', '发动机型号'],
+            'page_size': [595, 842],
+            'zones': [
+                {'field': 'VIN', 'bbox': [0.118, 0.089, 0.353, 0.109]},
+                {'field': 'make', 'bbox': [0.353, 0.089, 0.504, 0.109]},
+                {'field': 'model', 'bbox': [0.118, 0.109, 0.210, 0.124]},
+                {'field': 'engine_code', 'data_type': 'engine_info', 'bbox': [0.210, 0.109, 0.437, 0.124]}
+            ]
+        }])
+
+        with tempfile.TemporaryDirectory() as tmp:
+            pdf_file = Path(tmp) / "pdf_template_test.pdf"
+            create_test_pdf(pdf_file)
+            parsed = PDFParser(templates=registry).parse_file(str(pdf_file))
+
+        structured = parsed['structured_data']
+
+        if parsed['file_info'].get('layout_template') != 'test_certificate':
+            logger.error("✗ 版面模板未识别")
+            return False
+        if structured.get('vehicle_info') != [{'VIN': 'LVSHFAEM1EF000000', 'make': '奥迪', 'model': 'A4L'}]:
+            logger.error(f"✗ 模板区域提取错误: {structured}")
+            return False
+        if structured.get('engine_info', [{}])[0].get('VIN') != 'LVSHFAEM1EF000000':
+            logger.error(f"✗ 发动机记录未关联VIN: {structured}")
+            return False
+
+        logger.info(f"✓ 版面模板提取正确: {structured}")
+        return True
+
+    except Exception as e:
+        logger.error(f"PDF版面模板测试失败: {e}")
+        return False
+
+def test_pdf_duplicate_detection():
+    """测试PDF入库前的重复文档检测"""
+    try:
+        logger.info("测试PDF重复检测...")
+
+        import shutil
+        import tempfile
+        from PIL import Image
+        from reportlab.pdfgen import canvas
+        from src.database.data_importer import DataImporter
+        from src.input_parser.pdf_parser import PDFParser
+        from src.input_parser.pdf_readers import PDFReader, available_engines
+
+        with tempfile.TemporaryDirectory() as tmp:
+            original = Path(tmp) / "certificate.pdf"
+            create_test_pdf(original, pages=2)
+            renamed = Path(tmp) / "certificate (1).pdf"
+            shutil.copy(original, renamed)
+
+            importer = DataImporter(f"sqlite:///{Path(tmp) / 'test.db'}")
+            first = importer.ingest_file(str(original), pdf_parser=PDFParser(max_workers=1))
+            second = importer.ingest_file(str(renamed))
+            importer.engine.dispose()
+
+            # 含图片XObject的文档在各读取引擎下的指纹一致
+            image_file = Path(tmp) / "stamp.png"
+            Image.new('RGB', (20, 20), 'red').save(image_file)
+            image_pdf = Path(tmp) / "stamped.pdf"
+            page = canvas.Canvas(str(image_pdf))
+            page.drawImage(str(image_file), 50, 50)
+            page.save()
+            hashes = set()
+            for engine in available_engines():
+                with PDFReader(str(image_pdf), engine=engine) as reader:
+                    hashes.add(reader.content_hash())
+
+        if first.get('inserted') != 4:
+            logger.error(f"✗ PDF导入统计错误: {first}")
+            return False
+        if second.get('duplicate_of') is None or second['inserted'] != 0:
+            logger.error(f"✗ 重复文档未跳过: {second}")
+            return False
+        if len(hashes) != 1:
+            logger.error(f"✗ 各读取引擎的文档指纹不一致: {hashes}")
+            return False
+
+        logger.info(f"✓ 重复文档已跳过: {second}")
+        return True
+
+    except Exception as e:
+        logger.error(f"PDF重复检测测试失败: {e}")
+        return False
+
 def main():
     """主测试函数"""
     logger.info("=== 汽车数据处理工具 - 基础功能测试 ===\n")
@@ -176,7 +1372,30 @@ def main():
         ("数据库功能", test_database),
         ("Excel解析器", test_excel_parser),
         ("报告生成器", test_report_generator),
-        ("Excel文件解析", test_excel_parsing)
+        ("Excel文件解析", test_excel_parsing),
+        ("列式输出", test_columnar_layout),
+        ("表头检测", test_header_detection),
+        ("解析规则集", test_rule_set),
+        ("文件预览", test_excel_preview),
+        ("读取引擎", test_reader_engines),
+        ("数据验证", test_data_validation),
+        ("增量导入", test_incremental_import),
+        ("VIN关联", test_record_join),
+        ("暂存区", test_scratch_spill),
+        ("PDF解析", test_pdf_parsing),
+        ("PDF并行提取", test_pdf_parallel_extraction),
+        ("PDF扫描页OCR", test_pdf_ocr),
+        ("PDF重复检测", test_pdf_duplicate_detection),
+        ("PDF版面模板", test_pdf_layout_template),
+        ("批量报告", test_batch_reports),
+        ("Word模板", test_docx_template),
+        ("流式Excel报告", test_streaming_excel_report),
+        ("PDF中文渲染", test_pdf_cjk_text),
+        ("合并PDF报告", test_pdf_bundle),
+        ("查询-报告流水线", test_report_pipeline),
+        ("报告数据准备", test_prepare_data),
+        ("报告输出缓存", test_report_cache),
+        ("报告任务队列", test_report_job_queue)
     ]
 
     passed = 0